@@ -1 +1,60 @@
-from .airtable import AirtableClientFactory, AirtableSorter, SortDirection
\ No newline at end of file
+import importlib
+import sys
+
+from .airtable import AirtableClientFactory, AirtableSorter, SortDirection, Deadline
+from .ratelimit import RateLimiter, RequestPriority, RateLimitBackend, LocalRateLimitBackend, FileRateLimitBackend
+from .exceptions import AirtableDeadlineExceeded, AirtableReplayError, AirtableCircuitOpen
+
+# 任意の機能のクラス名 -> サブモジュール名
+# サブモジュールは最初に参照された時点で読み込むため、使用しない機能の依存モジュール(gzip、mmap、http.server、concurrent.futures等)は読み込まれません。
+_LAZY_ATTRIBUTES = {
+  'HedgePolicy': 'hedging',
+  'CircuitBreaker': 'breaker',
+  'CircuitState': 'breaker',
+  'StaleResponseStore': 'breaker',
+  'AirtableLoader': 'loader',
+  'AirtableRecord': 'records',
+  'AirtableSyncPlan': 'sync',
+  'Transport': 'transport',
+  'RequestsTransport': 'transport',
+  'HTTP2Transport': 'transport',
+  'RecordingTransport': 'transport',
+  'ReplayTransport': 'transport',
+  'AirtableAttachmentDownloader': 'attachments',
+  'AirtableSnapshot': 'snapshot',
+  'AirtableSnapshotWriter': 'snapshot',
+  'AirtableAggregation': 'aggregate',
+  'AirtablePipeline': 'pipeline',
+  'AirtableChange': 'webhooks',
+  'AirtableWebhook': 'webhooks',
+  'AirtableWebhookReceiver': 'webhooks',
+  'AirtableIdMap': 'migration',
+  'AirtableTableCopier': 'migration',
+}
+
+
+def __getattr__(name):
+  """任意の機能のクラスを参照された時点でサブモジュールから読み込む
+
+  :param name: 属性名
+  :type name: string
+  :raises AttributeError: 存在しない属性の場合に送出される
+  :return: クラス
+  :rtype: object
+  """
+  module_name = _LAZY_ATTRIBUTES.get(name)
+  if module_name is None:
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+  value = getattr(importlib.import_module('.' + module_name, __name__), name)
+  globals()[name] = value
+  return value
+
+
+def __dir__():
+  return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+# モジュールの__getattr__はPython 3.7以降で使用できるため、それより前のバージョンでは全て読み込む
+if sys.version_info < (3, 7):
+  for _name in _LAZY_ATTRIBUTES:
+    __getattr__(_name)
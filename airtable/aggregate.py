@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""レコードの集計
+
+テーブルのレコードをページ単位で読み込みながら、件数・合計・重複のない値を集計します。
+集計に必要なフィールドのみを取得し、読み込んだページは集計後に破棄するため、メモリ使用量はレコード数に比例しません。
+(重複のない値の集計のみ、値の種類数に比例したメモリを使用します。)
+"""
+
+
+class AirtableAggregation(object):
+  """レコードの集計クラス
+
+  ページ毎にaddでレコードを追加し、resultで集計結果を取得します。
+
+  >>> aggregation = AirtableAggregation(group_by='Region', sum='Amount')
+  >>> for page in client.iter_pages(fields=aggregation.fields()):
+  ...   aggregation.add(page.records)
+  >>> aggregation.result()
+  {'East': {'count': 120, 'sum': {'Amount': 4500}}, 'West': {'count': 80, 'sum': {'Amount': 3100}}}
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, group_by=None, sum=None, distinct=None, field=None):
+    """コンストラクタ
+
+    :param group_by: グループ化するフィールド名, defaults to None
+    :type group_by: string, optional
+    :param sum: 合計するフィールド名(またはそのリスト), defaults to None
+    :type sum: string|list, optional
+    :param distinct: 重複のない値を集計するフィールド名(またはそのリスト), defaults to None
+    :type distinct: string|list, optional
+    :param field: 件数のみを集計する場合に取得するフィールド名(値の小さいフィールドを推奨), defaults to None
+    :type field: string, optional
+    """
+    self.group_by = group_by
+    self.sum_fields = self._as_list(sum)
+    self.distinct_fields = self._as_list(distinct)
+    self.field = field
+    self._groups = {}
+    pass
+
+  @classmethod
+  def _as_list(cls, fields):
+    """フィールド名をリストに変換
+
+    :param fields: フィールド名(またはそのリスト)
+    :type fields: string|list
+    :return: フィールド名のリスト
+    :rtype: list
+    """
+    if fields is None:
+      return []
+    if isinstance(fields, str):
+      return [fields]
+    return list(fields)
+
+  @classmethod
+  def _hashable(cls, value):
+    """グループ化・重複判定のためにフィールドの値をハッシュ可能な値に変換
+
+    複数選択・リンクなどのリストの値はタプルとして扱います。
+
+    :param value: フィールドの値
+    :type value: object
+    :return: ハッシュ可能な値
+    :rtype: object
+    """
+    if isinstance(value, list):
+      return tuple(cls._hashable(item) for item in value)
+    if isinstance(value, dict):
+      return tuple(sorted((key, cls._hashable(item)) for key, item in value.items()))
+    return value
+
+  def fields(self):
+    """集計に必要なフィールド名のリストを取得
+
+    件数のみを集計する場合はfieldのみを取得します。
+    Airtableはfieldsが空の場合に全フィールドを返却するため、fieldを指定していない場合はエラーとします。
+
+    :raises ValueError: 件数のみを集計し、fieldを指定していない場合に送出される
+    :return: フィールド名のリスト
+    :rtype: list
+    """
+    names = []
+    for name in ([self.group_by] if self.group_by else []) + self.sum_fields + self.distinct_fields:
+      if name not in names:
+        names.append(name)
+    if not names:
+      if not self.field:
+        raise ValueError('field is required to count records without fetching every field.')
+      names.append(self.field)
+    return names
+
+  def _new_group(self):
+    """グループの集計値を初期化
+
+    :return: 集計値
+    :rtype: dict
+    """
+    return {
+      'count': 0,
+      'sum': {name: 0 for name in self.sum_fields},
+      'distinct': {name: set() for name in self.distinct_fields}
+    }
+
+  def add(self, records):
+    """レコードを集計に追加
+
+    合計は数値(bool以外のint/float)の値のみを対象とし、空の値や数値以外の値は無視します。
+
+    :param records: レコードのイテラブル
+    :type records: list
+    """
+    groups = self._groups
+    for record in records:
+      fields = record.get('fields', {})
+      key = self._hashable(fields.get(self.group_by)) if self.group_by else None
+      group = groups.get(key)
+      if group is None:
+        group = groups[key] = self._new_group()
+      group['count'] += 1
+      sums = group['sum']
+      for name in self.sum_fields:
+        value = fields.get(name)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+          sums[name] += value
+      for name in self.distinct_fields:
+        value = fields.get(name)
+        if value is not None:
+          group['distinct'][name].add(self._hashable(value))
+
+  def _group_result(self, group):
+    """グループの集計結果を取得
+
+    :param group: 集計値
+    :type group: dict
+    :return: {'count': 件数, 'sum': {フィールド名: 合計}, 'distinct': {フィールド名: 値のリスト}}
+    :rtype: dict
+    """
+    result = {'count': group['count']}
+    if self.sum_fields:
+      result['sum'] = dict(group['sum'])
+    if self.distinct_fields:
+      distinct = {}
+      for name, values in group['distinct'].items():
+        try:
+          distinct[name] = sorted(values)
+        except TypeError:
+          distinct[name] = list(values)
+      result['distinct'] = distinct
+    return result
+
+  def result(self):
+    """集計結果を取得
+
+    group_byを指定した場合はグループの値 -> 集計結果、指定しない場合は全体の集計結果を返却します。
+    group_byのフィールドが空のレコードはNoneのグループに集計されます。
+
+    :return: 集計結果
+    :rtype: dict
+    """
+    if self.group_by:
+      return {key: self._group_result(group) for key, group in self._groups.items()}
+    return self._group_result(self._groups.get(None) or self._new_group())
@@ -18,15 +18,18 @@ Airtable用のPythonクライアントライブラリです。
 Insipred by gtalarico/airtable-python-wrapper. It is also great library, thanks.
 (https://github.com/gtalarico/airtable-python-wrapper)
 """
-import requests
-import json
 import posixpath
 import time
 from urllib.parse import quote
 from urllib.parse import urlencode
 import enum
 import sys
-from requests.auth import AuthBase
+import threading
+import queue
+import itertools
+import re
+from .ratelimit import RateLimiter, RequestPriority
+from .exceptions import AirtableDeadlineExceeded, AirtableCircuitOpen
 
 
 class SortDirection(enum.Enum):
@@ -170,7 +173,7 @@ class AirtableResponse(object):
   :param object: objectを継承
   :type object: object
   """
-  def __init__(self, records=[], offset=None, errors=[]):
+  def __init__(self, records=[], offset=None, errors=[], stale=False):
     """コンストラクタ
 
     :param records: HTTPレスポンスのrecords, defaults to []
@@ -179,10 +182,15 @@ class AirtableResponse(object):
     :type offset: string, optional
     :param errors: HTTPレスポンスから返却されるエラー文言, defaults to []
     :type errors: list, optional
+    :param stale: サーキットブレーカーがOPENのため、保存された過去の検索結果を返却したかどうか, defaults to False
+    :type stale: bool, optional
     """
     self._records = records
     self._offset = offset
     self._errors = errors
+    self._stale = stale
+    self._id_index = None
+    self._field_indexes = {}
     pass
 
   @property
@@ -218,6 +226,15 @@ class AirtableResponse(object):
     :rtype: list
     """
     return self._errors
+
+  @property
+  def stale(self):
+    """staleのgetter
+
+    :return: 保存された過去の検索結果の場合はTrue
+    :rtype: bool
+    """
+    return self._stale
   
   def size(self):
     """recordsの要素数を取得
@@ -302,11 +319,120 @@ class AirtableResponse(object):
     else:
       return []
 
-class AirtableAuth(AuthBase):
+  def _record_list(self):
+    """recordsをlistで取得
+
+    :return: 0〜n件のレコードのリスト
+    :rtype: list
+    """
+    if isinstance(self._records, dict):
+      return [self._records]
+    elif isinstance(self._records, list):
+      return self._records
+    else:
+      return []
+
+  def by_id(self, id):
+    """レコードIDでレコードを取得
+
+    初回の呼び出し時にレコードIDの索引を構築し、以降はO(1)で取得します。
+
+    >>> print(r.by_id('XXX'))
+    {'id': 'XXX', 'fields': {...}}
+
+    :param id: レコードID
+    :type id: string
+    :return: レコード(存在しない場合はNone)
+    :rtype: dict
+    """
+    if self._id_index is None:
+      self._id_index = {record['id']: record for record in self._record_list() if 'id' in record}
+    return self._id_index.get(id)
+
+  def index_on(self, field, unique=False):
+    """フィールドの値の索引を取得
+
+    初回の呼び出し時に索引を構築し、以降は同じ索引を返却します。
+    値がlistのフィールド(リンクフィールドや複数選択等)は、要素毎に索引を作成します。
+    dict等のハッシュできない値は索引に含めません。
+
+    >>> r.index_on('Email', unique=True)['foo@example.com']
+    {'id': 'XXX', 'fields': {...}}
+    >>> r.index_on('Customer')['recXXX']
+    [{'id': 'XXX', 'fields': {...}}, {'id': 'XXX', 'fields': {...}}]
+
+    :param field: 索引を作成するフィールド名
+    :type field: string
+    :param unique: Trueの場合は値 -> 最初のレコード、Falseの場合は値 -> レコードのリスト, defaults to False
+    :type unique: bool, optional
+    :return: フィールドの値の索引
+    :rtype: dict
+    """
+    cache_key = (field, unique)
+    if cache_key not in self._field_indexes:
+      index = {}
+      for record in self._record_list():
+        value = record.get('fields', {}).get(field)
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+          try:
+            hash(item)
+          except TypeError:
+            continue
+          if unique:
+            index.setdefault(item, record)
+          else:
+            index.setdefault(item, []).append(record)
+      self._field_indexes[cache_key] = index
+    return self._field_indexes[cache_key]
+
+  def filter(self, field, value):
+    """フィールドの値が一致するレコードを取得
+
+    index_onの索引を使用するため、同じフィールドに対する2回目以降の呼び出しはO(1)です。
+
+    :param field: フィールド名
+    :type field: string
+    :param value: フィールドの値
+    :type value: object
+    :return: 一致するレコードのリスト
+    :rtype: list
+    """
+    return list(self.index_on(field).get(value, []))
+
+  def group_by(self, field):
+    """フィールドの値でレコードをグループ化
+
+    :param field: フィールド名
+    :type field: string
+    :return: フィールドの値 -> レコードのリスト
+    :rtype: dict
+    """
+    return {value: list(records) for value, records in self.index_on(field).items()}
+
+  def as_records(self, client=None):
+    """recordsを変更を追跡するレコードのリストに変換
+
+    >>> records = client.get_all().as_records(client)
+    >>> records[0]['Age'] = 20
+    >>> client.save_all(records)
+
+    :param client: 保存に使用するAirtableクライアント, defaults to None
+    :type client: AirtableClient, optional
+    :return: 変更を追跡するレコードのリスト
+    :rtype: list
+    """
+    from .records import AirtableRecord
+    return [AirtableRecord(record, client=client) for record in self.get_list() if record]
+
+class AirtableAuth(object):
   """Airtableの認証クラス
 
-  :param AuthBase: AuthBaseクラスを継承
-  :type AuthBase: requests.auth.AuthBase
+  requests.Session.authに設定する呼び出し可能オブジェクトです。
+  requests.auth.AuthBaseと同じインターフェースですが、インポート時にrequestsを読み込まないように継承していません。
+
+  :param object: objectを継承
+  :type object: object
   """
   def __init__(self, api_key):
     """コンストラクタ
@@ -322,6 +448,60 @@ class AirtableAuth(AuthBase):
     r.headers['Authorization'] = 'Bearer ' + self.api_key
     return r
 
+class Deadline(object):
+  """処理時間の上限クラス
+
+  get_allやbulk_insert等の複数リクエストにまたがる処理全体の時間の上限を表します。
+  全てのページ取得・再送・レートリミッターの待機時間が上限に含まれます。
+
+  >>> deadline = Deadline(5.0)
+  >>> deadline.remaining()
+  4.99...
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, seconds):
+    """コンストラクタ
+
+    :param seconds: 上限の秒数
+    :type seconds: float
+    """
+    self.seconds = seconds
+    self.expires_at = time.monotonic() + seconds
+    pass
+
+  @classmethod
+  def make(cls, deadline):
+    """秒数またはDeadlineからDeadlineを取得
+
+    :param deadline: 上限の秒数、またはDeadline
+    :type deadline: float|Deadline
+    :return: Deadline(deadlineがNoneの場合はNone)
+    :rtype: Deadline
+    """
+    if deadline is None or isinstance(deadline, Deadline):
+      return deadline
+    return cls(deadline)
+
+  def remaining(self):
+    """残り時間を取得
+
+    :return: 残りの秒数(超過している場合は0)
+    :rtype: float
+    """
+    return max(0.0, self.expires_at - time.monotonic())
+
+  def check(self, required=0.0):
+    """残り時間を確認
+
+    :param required: 必要な秒数, defaults to 0.0
+    :type required: float, optional
+    :raises AirtableDeadlineExceeded: 残り時間がrequired秒以下の場合に送出される
+    """
+    if self.remaining() <= required:
+      raise AirtableDeadlineExceeded('The deadline of {} seconds has been exceeded.'.format(self.seconds))
+
 class AirtableClient(object):
   """Airtableクライアントクラス
 
@@ -333,8 +513,16 @@ class AirtableClient(object):
   _API_URL = posixpath.join(_API_BASE_URL, _VERSION)
   _API_LIMIT = 1.0 / 5  # 5 per second
   _MAX_RECORDS_PER_REQUEST = 10
-
-  def __init__(self, base_id, table_name, api_key, debug=False):
+  _MAX_REQUEST_BYTES = 2 * 1024 * 1024
+  _BATCH_ENVELOPE_BYTES = len('{"records": []}')
+  _SPLITTABLE_STATUS_CODES = (413, 422)
+  _RATE_LIMIT_PENALTY = 30  # 429受信時に送信を停止する秒数
+  _DEFAULT_TIMEOUT = (10, 60)  # (接続タイムアウト, 読み込みタイムアウト)
+  _MIN_REQUEST_SECONDS = 0.1  # deadline指定時に1リクエストの送信に最低限必要な秒数
+  _MAX_URL_LENGTH = 16000  # GETのURLの最大文字数(超える場合はPOSTのlistRecordsで検索)
+  _SORT_PARAM_PATTERN = re.compile(r'^sort\[(\d+)\]\[(field|direction)\]$')
+
+  def __init__(self, base_id, table_name, api_key, debug=False, rate_limiter=None, max_records_per_request=None, max_request_bytes=None, priority=RequestPriority.INTERACTIVE, timeout=None, hedge=None, transport=None, circuit_breaker=None, stale_store=None):
     """コンストラクタ
 
     :param base_id: AirtableのBASE ID
@@ -345,16 +533,95 @@ class AirtableClient(object):
     :type api_key: string
     :param debug: デバッグモードのフラグ(True:ON/False:OFF), defaults to False
     :type debug: bool, optional
+    :param rate_limiter: ベース単位のレートリミッター, defaults to None ※未指定の場合はページ/チャンク毎に_API_LIMIT秒待機
+    :type rate_limiter: RateLimiter, optional
+    :param max_records_per_request: 一括処理の1リクエストあたりの最大レコード数, defaults to None ※未指定の場合は_MAX_RECORDS_PER_REQUEST
+    :type max_records_per_request: int, optional
+    :param max_request_bytes: 一括処理の1リクエストあたりの最大ボディサイズ(バイト), defaults to None ※未指定の場合は_MAX_REQUEST_BYTES
+    :type max_request_bytes: int, optional
+    :param priority: レートリミッターでの検索・単票処理の優先度(一括処理は常にRequestPriority.BULK), defaults to RequestPriority.INTERACTIVE
+    :type priority: RequestPriority, optional
+    :param timeout: HTTPリクエストのタイムアウト秒数(数値または(接続, 読み込み)のタプル), defaults to None ※未指定の場合は_DEFAULT_TIMEOUT
+    :type timeout: float|tuple, optional
+    :param hedge: GETリクエストをヘッジする設定(Trueの場合はデフォルト設定), defaults to None ※未指定の場合はヘッジしない
+    :type hedge: HedgePolicy|bool, optional
+    :param transport: HTTPリクエストを送信するトランスポート, defaults to None ※未指定の場合はrequests.Sessionで送信
+    :type transport: Transport, optional
+    :param circuit_breaker: ベース単位のサーキットブレーカー(Trueの場合はデフォルト設定), defaults to None ※未指定の場合は使用しない
+    :type circuit_breaker: CircuitBreaker|bool, optional
+    :param stale_store: サーキットブレーカーがOPENの間に返却する検索結果の保存先, defaults to None ※未指定の場合はAirtableCircuitOpenを送出
+    :type stale_store: StaleResponseStore, optional
     """
-    session = requests.Session()
-    session.auth = AirtableAuth(api_key=api_key)
-    self.session = session
+    self.api_key = api_key
+    self._session = None
+    self._transport = transport
+    self._session_lock = threading.Lock()
+    self._headers = {'Authorization': 'Bearer ' + api_key}
 
     self.debug = debug
+    self.rate_limiter = rate_limiter
+    self.max_records_per_request = min(max_records_per_request or self._MAX_RECORDS_PER_REQUEST, self._MAX_RECORDS_PER_REQUEST)
+    self.max_request_bytes = max_request_bytes or self._MAX_REQUEST_BYTES
+    self.priority = priority
+    self.timeout = timeout or self._DEFAULT_TIMEOUT
+    if hedge is True:
+      from .hedging import HedgePolicy
+      hedge = HedgePolicy()
+    self.hedge = hedge or None
+    if circuit_breaker is True:
+      from .breaker import CircuitBreaker
+      circuit_breaker = CircuitBreaker(key=base_id)
+    self.circuit_breaker = circuit_breaker or None
+    self.stale_store = stale_store
 
+    self.base_id = base_id
+    self.table_name = table_name
     self.BASE_URL = posixpath.join(self._API_URL, base_id, quote(table_name))
     pass
   
+  @property
+  def session(self):
+    """requests.Sessionのgetter
+
+    最初に参照された時点で生成します(requestsもその時点で読み込みます)。
+
+    :return: 認証を設定したセッション
+    :rtype: requests.Session
+    """
+    with self._session_lock:
+      if self._session is None:
+        import requests
+        session = requests.Session()
+        session.auth = AirtableAuth(api_key=self.api_key)
+        self._session = session
+      return self._session
+
+  @property
+  def transport(self):
+    """トランスポートのgetter
+
+    コンストラクタで指定されなかった場合は、最初に参照された時点でsessionで送信するRequestsTransportを生成します。
+
+    :return: トランスポート
+    :rtype: Transport
+    """
+    if self._transport is None:
+      session = self.session
+      with self._session_lock:
+        if self._transport is None:
+          from .transport import RequestsTransport
+          self._transport = RequestsTransport(session)
+    return self._transport
+
+  @transport.setter
+  def transport(self, transport):
+    """トランスポートのsetter
+
+    :param transport: トランスポート
+    :type transport: Transport
+    """
+    self._transport = transport
+
   def _make_single_condition(self, field, value):
     """filterByFormulaのfield=value条件式を1つ構築して返却
 
@@ -403,6 +670,28 @@ class AirtableClient(object):
 
     return p
   
+  def _make_list_body(self, params):
+    """POSTのlistRecords用のリクエストJSONデータを構築
+
+    sort[n][field]/sort[n][direction]形式のパラメータは{'field': field, 'direction': direction}のリストに変換します。
+
+    :param params: _make_paramsで構築したリクエストパラメータ
+    :type params: dict
+    :return: リクエストJSONデータオブジェクト
+    :rtype: dict
+    """
+    body = {}
+    sort = {}
+    for key, value in params.items():
+      m = self._SORT_PARAM_PATTERN.match(key)
+      if m:
+        sort.setdefault(int(m.group(1)), {})[m.group(2)] = value
+      else:
+        body[key] = value
+    if sort:
+      body['sort'] = [sort[i] for i in sorted(sort)]
+    return body
+
   def _process_response_error(self, response):
     """HTTPレスポンスのエラー処理
 
@@ -412,6 +701,7 @@ class AirtableClient(object):
     :return: HTTPレスポンスボディのJSONオブジェクト
     :rtype: dict
     """
+    import requests
     try:
       response.raise_for_status()
     except requests.exceptions.HTTPError as exc:
@@ -446,7 +736,27 @@ class AirtableClient(object):
     else:
       return result_dict
 
-  def _request(self, method, url, params=None, json_data=None):
+  def _request_timeout(self, deadline=None):
+    """HTTPリクエストのタイムアウトを取得
+
+    deadlineが指定された場合は、残り時間を超えないように切り詰めます。
+
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :return: (接続タイムアウト, 読み込みタイムアウト)
+    :rtype: tuple
+    """
+    if isinstance(self.timeout, tuple):
+      connect_timeout, read_timeout = self.timeout
+    else:
+      connect_timeout = read_timeout = self.timeout
+    if deadline:
+      remaining = deadline.remaining()
+      connect_timeout = min(connect_timeout, remaining)
+      read_timeout = min(read_timeout, remaining)
+    return (connect_timeout, read_timeout)
+
+  def _request(self, method, url, params=None, json_data=None, priority=None, deadline=None):
     """HTTPリクエスト送信
 
     :param method: HTTPメソッド
@@ -457,18 +767,164 @@ class AirtableClient(object):
     :type params: dict, optional
     :param json_data: リクエストJSONデータオブジェクト, defaults to None
     :type json_data: dict, optional
+    :param priority: レートリミッターでの優先度, defaults to None ※未指定の場合はself.priority
+    :type priority: RequestPriority, optional
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :raises AirtableDeadlineExceeded: 残り時間でリクエストを送信できない場合に送出される
     :return: HTTPレスポンスボディのJSONオブジェクト
     :rtype: dict
     """
-    response = self.session.request(method, url, params=params, json=json_data)
+    if self.hedge and method == 'get':
+      response = self._send_hedged(url, params=params, priority=priority, deadline=deadline)
+    else:
+      response = self._send(method, url, params=params, json_data=json_data, priority=priority, deadline=deadline)
+    return self._process_response(response)
+
+  def _send(self, method, url, params=None, json_data=None, priority=None, deadline=None, on_sent=None):
+    """レート制限とタイムアウトを適用してHTTPリクエストを1回送信
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param url: リクエストURL
+    :type url: string
+    :param params: リクエストパラメータオブジェクト, defaults to None
+    :type params: dict, optional
+    :param json_data: リクエストJSONデータオブジェクト, defaults to None
+    :type json_data: dict, optional
+    :param priority: レートリミッターでの優先度, defaults to None ※未指定の場合はself.priority
+    :type priority: RequestPriority, optional
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :param on_sent: レート制限の待機が終わり、送信する直前に呼び出す関数, defaults to None
+    :type on_sent: function, optional
+    :raises AirtableDeadlineExceeded: 残り時間でリクエストを送信できない場合に送出される
+    :raises AirtableCircuitOpen: サーキットブレーカーがOPENの場合に送出される
+    :return: レスポンスオブジェクト
+    :rtype: requests.Response
+    """
+    if deadline:
+      deadline.check(self._MIN_REQUEST_SECONDS)
+    if self.circuit_breaker:
+      self.circuit_breaker.check()
+    if self.rate_limiter:
+      timeout = deadline.remaining() - self._MIN_REQUEST_SECONDS if deadline else None
+      self.rate_limiter.acquire(priority=priority or self.priority, client_key=id(self), timeout=timeout)
+    if deadline:
+      deadline.check(self._MIN_REQUEST_SECONDS)
+    breaker = self.circuit_breaker
+    ticket = breaker.acquire() if breaker else None
+    try:
+      if on_sent:
+        on_sent()
+      started = time.monotonic()
+      import requests
+      try:
+        response = self.transport.request(method, url, params=params, json_data=json_data, timeout=self._request_timeout(deadline), headers=self._headers)
+      except requests.exceptions.Timeout as exc:
+        if deadline and deadline.remaining() <= 0:
+          raise AirtableDeadlineExceeded('The deadline of {} seconds has been exceeded.'.format(deadline.seconds)) from exc
+        if breaker:
+          breaker.record_failure(ticket)
+          ticket = None
+        raise
+      except Exception:
+        if breaker:
+          breaker.record_failure(ticket)
+          ticket = None
+        raise
+      if self.hedge and method == 'get':
+        self.hedge.record(time.monotonic() - started)
+      if breaker:
+        if response.status_code == 429 or response.status_code >= 500:
+          breaker.record_failure(ticket)
+        else:
+          breaker.record_success(time.monotonic() - started, ticket)
+        ticket = None
+    finally:
+      # 成否を記録しないで終了した場合(deadline、KeyboardInterrupt等)も試行リクエストの枠を返却する
+      if ticket is not None:
+        breaker.release(ticket)
     if self.debug:
       print(response.url)
-    
-    return self._process_response(response)
+    if response.status_code == 429 and self.rate_limiter:
+      self.rate_limiter.penalize(self._RATE_LIMIT_PENALTY)
+    return response
+
+  def _send_in_thread(self, url, kwargs, on_sent=None):
+    """GETリクエストを専用のスレッドで送信
 
-  def _get(self, formula=None, offset=None, sort=None, max_records=None, fields=None, view=None):
+    スレッドプールを使用しないため、同時に送信するリクエストの数は制限されません。
+
+    :param url: リクエストURL
+    :type url: string
+    :param kwargs: _sendの引数
+    :type kwargs: dict
+    :param on_sent: レート制限の待機が終わり、送信する直前に呼び出す関数, defaults to None
+    :type on_sent: function, optional
+    :return: レスポンスオブジェクトのFuture
+    :rtype: concurrent.futures.Future
+    """
+    from concurrent.futures import Future
+    future = Future()
+
+    def run():
+      try:
+        future.set_result(self._send('get', url, on_sent=on_sent, **kwargs))
+      except BaseException as exc:
+        future.set_exception(exc)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+  def _send_hedged(self, url, params=None, priority=None, deadline=None):
+    """GETリクエストをヘッジして送信
+
+    1つ目のリクエストの送信(レート制限の待機後)からHedgePolicy.delay()秒以内に応答しない場合は、同じリクエストをもう1つ送信し、
+    先に成功した応答を採用します(遅い方の応答は破棄します)。どちらのリクエストもレートリミッターの送信枠を消費します。
+    2つ目のリクエストを送信するまでは呼び出し元のスレッドで待機するため、待機中のヘッジがスレッドを占有することはありません。
+
+    :param url: リクエストURL
+    :type url: string
+    :param params: リクエストパラメータオブジェクト, defaults to None
+    :type params: dict, optional
+    :param priority: レートリミッターでの優先度, defaults to None ※未指定の場合はself.priority
+    :type priority: RequestPriority, optional
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :return: レスポンスオブジェクト
+    :rtype: requests.Response
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+    kwargs = {'params': params, 'priority': priority, 'deadline': deadline}
+    sent = threading.Event()
+    sent_at = []
+
+    def on_sent():
+      sent_at.append(time.monotonic())
+      sent.set()
+
+    primary = self._send_in_thread(url, kwargs, on_sent=on_sent)
+    primary.add_done_callback(lambda future: sent.set())
+    sent.wait()
+    if sent_at:
+      wait([primary], timeout=max(0.0, sent_at[0] + self.hedge.delay() - time.monotonic()))
+    if primary.done():
+      return primary.result()
+    pending = [primary, self._send_in_thread(url, kwargs)]
+    while pending:
+      done, pending = wait(pending, return_when=FIRST_COMPLETED)
+      for future in done:
+        if future.exception() is None:
+          return future.result()
+    return primary.result()
+
+  def _get(self, formula=None, offset=None, sort=None, max_records=None, fields=None, view=None, deadline=None):
     """GETリクエスト送信
 
+    パラメータを含めたURLが_MAX_URL_LENGTHを超える場合は、パラメータをJSONボディに格納してPOSTのlistRecordsで検索します。
+    レスポンスの形式とoffsetによるページングはGETと同じです。
+
     :param formula: filterByFormula値, defaults to None
     :type formula: string, optional
     :param offset: offset値, defaults to None
@@ -481,12 +937,16 @@ class AirtableClient(object):
     :type fields: list, optional
     :param view: view値, defaults to None
     :type view: string, optional
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
     :return: HTTPレスポンスボディのJSONオブジェクト
     :rtype: dict
     """
     url = self.BASE_URL
     p = self._make_params(formula, offset, sort, max_records, fields, view)
-    return self._request('get', url, params=p)
+    if len(url) + 1 + len(urlencode(p, doseq=True)) > self._MAX_URL_LENGTH:
+      return self._request('post', posixpath.join(url, 'listRecords'), json_data=self._make_list_body(p), deadline=deadline)
+    return self._request('get', url, params=p, deadline=deadline)
 
   def _post(self, data):
     """POSTリクエスト送信
@@ -514,6 +974,18 @@ class AirtableClient(object):
     url = posixpath.join(self.BASE_URL, id)
     return self._request('patch', url, json_data=data)
 
+  def _delete_batch(self, ids, deadline=None):
+    """複数レコードのDELETEリクエスト送信
+
+    :param ids: レコードIDのリスト(最大_MAX_RECORDS_PER_REQUEST件)
+    :type ids: list
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :return: HTTPレスポンスボディのJSONオブジェクト
+    :rtype: dict
+    """
+    return self._request('delete', self.BASE_URL, params={'records[]': ids}, priority=RequestPriority.BULK, deadline=deadline)
+
   def _delete(self, id):
     """DELETEリクエスト送信
 
@@ -525,28 +997,201 @@ class AirtableClient(object):
     url = posixpath.join(self.BASE_URL, id)
     return self._request('delete', url)
 
+  def _wait_api_limit(self, deadline=None):
+    """連続リクエスト間の待機
+
+    レートリミッターが設定されている場合は_request内で送信間隔を調整するため待機しません。
+
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    """
+    if not self.rate_limiter:
+      if deadline:
+        time.sleep(min(self._API_LIMIT, deadline.remaining()))
+      else:
+        time.sleep(self._API_LIMIT)
+
   def _chunk(self, iterable, length):
     """チャンク処理(分割処理)
 
+    listに限らず、ジェネレーター等の任意のイテラブルを逐次分割します。全要素をメモリに展開しません。
+
     :param iterable: 処理対象のイテラブルオブジェクト
     :type iterable: object
     :param length: チャンクサイズ
     :type length: int
-    :yield: [description]
-    :rtype: [type]
+    :yield: 最大length件の要素のリスト
+    :rtype: list
     """
-    for i in range(0, len(iterable), length):
-      yield iterable[i : i + length]
+    iterator = iter(iterable)
+    while True:
+      chunk = list(itertools.islice(iterator, length))
+      if not chunk:
+        break
+      yield chunk
 
   def _build_batch_records(self, fields_list):
-    """一括処理用のレコードリストを構築
+    """一括処理用のレコードを構築
 
-    :param fields_list: fieldsのリスト
-    :type fields_list: list
-    :return: recordsにセットするリスト
-    :rtype: list
+    :param fields_list: fieldsのイテラブル
+    :type fields_list: object
+    :return: recordsにセットするレコードのイテレーター
+    :rtype: generator
+    """
+    return ({"fields": fields} for fields in fields_list)
+
+  def _record_size(self, record):
+    """レコードをJSONにシリアライズした際のバイト数を取得
+
+    :param record: レコード
+    :type record: dict
+    :return: バイト数(区切り文字を含む)
+    :rtype: int
+    """
+    import json
+    return len(json.dumps(record).encode('utf-8')) + len(', ')
+
+  def _pack_batches(self, records):
+    """一括処理用のレコードをレコード数とボディサイズの両方で詰めて分割
+
+    1リクエストあたりmax_records_per_request件、max_request_bytesバイトを超えないように詰めます。
+    単体でmax_request_bytesを超えるレコードは、そのレコードのみのバッチになります。
+
+    :param records: 一括処理用のレコードのイテラブル
+    :type records: object
+    :yield: (先頭レコードの通し番号, バッチのレコードリスト)
+    :rtype: tuple
+    """
+    batch = []
+    batch_bytes = self._BATCH_ENVELOPE_BYTES
+    start = 0
+    index = 0
+    for record in records:
+      size = self._record_size(record)
+      if batch and (len(batch) >= self.max_records_per_request or batch_bytes + size > self.max_request_bytes):
+        yield (start, batch)
+        batch = []
+        batch_bytes = self._BATCH_ENVELOPE_BYTES
+        start = index
+      batch.append(record)
+      batch_bytes += size
+      index += 1
+    if batch:
+      yield (start, batch)
+
+  def _make_record_error(self, index, record, error):
+    """一括処理で失敗したレコードのエラー情報を構築
+
+    :param index: 失敗したレコードの通し番号
+    :type index: int
+    :param record: 失敗したレコード
+    :type record: dict
+    :param error: Airtableが返却したエラー、またはエラー文言
+    :type error: dict|string
+    :return: エラー情報
+    :rtype: dict
+    """
+    return {'index': index, 'record': record, 'error': error}
+
+  def _write_batch(self, method, start, records, deadline=None, typecast=False):
+    """一括処理の1バッチを送信
+
+    ボディサイズ超過(413)や不正な値(422)でバッチ全体が失敗した場合は、
+    バッチを半分に分割して再送し、失敗の原因となったレコードを特定します。
+    特定されたレコードはエラー情報として返却し、それ以外のレコードは処理を継続します。
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param start: 先頭レコードの通し番号
+    :type start: int
+    :param records: バッチのレコードリスト
+    :type records: list
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :param typecast: 文字列の値をフィールドの型に変換して登録するかどうか(Airtableのtypecast), defaults to False
+    :type typecast: bool, optional
+    :raises exc: 分割しても解消しないHTTPErrorをキャッチした場合は送出
+    :return: (処理されたレコードのリスト, 失敗したレコードのエラー情報のリスト)
+    :rtype: tuple
     """
-    return [{"fields": fields} for fields in fields_list]
+    if len(records) == 1 and self._BATCH_ENVELOPE_BYTES + self._record_size(records[0]) > self.max_request_bytes:
+      error = {'type': 'RECORD_TOO_LARGE', 'message': 'The record exceeds {} bytes.'.format(self.max_request_bytes)}
+      return ([], [self._make_record_error(start, records[0], error)])
+
+    import requests
+    try:
+      json_data = {'records': records}
+      if typecast:
+        json_data['typecast'] = True
+      r = self._request(method, self.BASE_URL, json_data=json_data, priority=RequestPriority.BULK, deadline=deadline)
+    except requests.exceptions.HTTPError as exc:
+      self._wait_api_limit(deadline)
+      status_code = exc.response.status_code if exc.response is not None else None
+      if status_code not in self._SPLITTABLE_STATUS_CODES:
+        raise exc
+      if len(records) == 1:
+        try:
+          error = exc.response.json().get('error', str(exc))
+        except ValueError:
+          error = str(exc)
+        return ([], [self._make_record_error(start, records[0], error)])
+
+      half = len(records) // 2
+      written_head, errors_head = self._write_batch(method, start, records[:half], deadline, typecast)
+      written_tail, errors_tail = self._write_batch(method, start + half, records[half:], deadline, typecast)
+      return (written_head + written_tail, errors_head + errors_tail)
+
+    self._wait_api_limit(deadline)
+    errors = []
+    if r.get('error'):
+      errors.append(r.get('error'))
+    return (r.get('records', []), errors)
+
+  def _write_batches(self, method, records, deadline=None, typecast=False):
+    """一括処理用のレコードをバッチに分割して送信
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param records: 一括処理用のレコードのイテラブル
+    :type records: object
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :param typecast: 文字列の値をフィールドの型に変換して登録するかどうか(Airtableのtypecast), defaults to False
+    :type typecast: bool, optional
+    :yield: バッチ毎の(処理されたレコードのリスト, 失敗したレコードのエラー情報のリスト)
+    :rtype: tuple
+    """
+    for start, batch in self._pack_batches(records):
+      yield self._write_batch(method, start, batch, deadline, typecast)
+
+  def _read_with_stale(self, method, params, read):
+    """検索結果を保存し、サーキットブレーカーがOPENの場合は保存された検索結果を返却
+
+    エラーを含まない検索結果のみを保存します。返却する保存された検索結果はstaleがTrueになります。
+
+    :param method: 検索メソッド名
+    :type method: string
+    :param params: 検索条件のリクエストパラメータ
+    :type params: dict
+    :param read: 検索を実行する関数
+    :type read: function
+    :raises AirtableCircuitOpen: サーキットブレーカーがOPENで、保存された検索結果がない場合に送出される
+    :return: 検索結果
+    :rtype: AirtableResponse
+    """
+    if self.stale_store is None:
+      return read()
+    key = self.stale_store.make_key(self.base_id, self.table_name, method, params)
+    try:
+      r = read()
+    except AirtableCircuitOpen:
+      entry = self.stale_store.get(key)
+      if entry is None:
+        raise
+      return AirtableResponse(records=entry['records'], offset=entry['offset'], errors=[], stale=True)
+    if not any(r.errors):
+      self.stale_store.put(key, r.records, r.offset)
+    return r
 
   def find(self, id, fields=None, view=None):
     """レコードIDで検索（1件取得）
@@ -566,10 +1211,13 @@ class AirtableClient(object):
     :type fields: list, optional
     :param view: 検索対象のビュー名, defaults to None
     :type view: string, optional
+    :raises AirtableCircuitOpen: サーキットブレーカーがOPENで、保存された検索結果がない場合に送出される
     :return: 検索結果
     :rtype: AirtableResponse
     """
-    return self.find_by_formula('RECORD_ID()="' + str(id) + '"', fields=fields, view=view)
+    formula = 'RECORD_ID()="' + str(id) + '"'
+    params = self._make_params(formula=formula, fields=fields, view=view)
+    return self._read_with_stale('find', params, lambda: self.find_by_formula(formula, fields=fields, view=view))
   
   def find_by(self, field, value, sort=None, fields=None, view=None):
     """対象フィールドの値に一致するレコードを検索（先頭の1件取得）
@@ -646,7 +1294,7 @@ class AirtableClient(object):
     """
     return self.get(sort=sort, max_records=1, fields=fields, view=view)
   
-  def get(self, offset=None, sort=None, max_records=None, fields=None, view=None):
+  def get(self, offset=None, sort=None, max_records=None, fields=None, view=None, include=None):
     """条件指定なしで検索し、1ページ分のレコードを取得
 
     >>> print(client.get().records) # recordsを抽出（Airtable APIのレスポンスそのまま）
@@ -711,11 +1359,16 @@ class AirtableClient(object):
     :type fields: list, optional
     :param view: 検索対象のビュー名, defaults to None
     :type view: string, optional
+    :param include: 展開するリンクフィールド名 -> リンク先テーブルのクライアント(またはクライアントと入れ子のincludeのタプル), defaults to None
+    :type include: dict, optional
     :return: 検索結果
     :rtype: AirtableResponse
     """
     r = self._get(offset=offset, sort=sort, max_records=max_records, fields=fields, view=view)
-    return AirtableResponse(records=r.get('records', []), offset=r.get('offset', None), errors=[r.get('error', None)])
+    records = r.get('records', [])
+    if include:
+      self._include_linked(records, include, {})
+    return AirtableResponse(records=records, offset=r.get('offset', None), errors=[r.get('error', None)])
 
   def get_by(self, field, value, offset=None, sort=None, max_records=None, fields=None, view=None):
     """対象フィールドの値に一致するレコードを検索（1ページ分のレコードを取得）
@@ -752,10 +1405,13 @@ class AirtableClient(object):
     :type fields: list, optional
     :param view: 検索対象のビュー名, defaults to None
     :type view: string, optional
+    :raises AirtableCircuitOpen: サーキットブレーカーがOPENで、保存された検索結果がない場合に送出される
     :return: 検索結果
     :rtype: AirtableResponse
     """
-    return self.get_by_formula(self._make_single_condition(field, value), offset=offset, sort=sort, max_records=max_records, fields=fields, view=view)
+    formula = self._make_single_condition(field, value)
+    params = self._make_params(formula=formula, offset=offset, sort=sort, max_records=max_records, fields=fields, view=view)
+    return self._read_with_stale('get_by', params, lambda: self.get_by_formula(formula, offset=offset, sort=sort, max_records=max_records, fields=fields, view=view))
 
   def get_by_formula(self, formula, offset=None, sort=None, max_records=None, fields=None, view=None):
     """条件式に一致するレコードを検索（1ページ分のレコードを取得）
@@ -803,7 +1459,7 @@ class AirtableClient(object):
     r = self._get(formula=formula, offset=offset, sort=sort, max_records=max_records, fields=fields, view=view)
     return AirtableResponse(records=r.get('records', []), offset=r.get('offset', None), errors=[r.get('error', None)])
   
-  def get_all(self, formula=None, sort=None, fields=None, view=None):
+  def get_all(self, formula=None, sort=None, fields=None, view=None, deadline=None, include=None):
     """全てのレコードを検索（全ページ）
 
     >>> print(client.get_all().get())
@@ -839,31 +1495,200 @@ class AirtableClient(object):
     :type fields: list, optional
     :param view: 検索対象のビュー名, defaults to None
     :type view: string, optional
+    :param deadline: 全ページの取得にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :param include: 展開するリンクフィールド名 -> リンク先テーブルのクライアント(またはクライアントと入れ子のincludeのタプル), defaults to None
+    :type include: dict, optional
+    :raises AirtableDeadlineExceeded: deadlineまでに全ページを取得できない場合に送出される
+    :raises AirtableCircuitOpen: サーキットブレーカーがOPENで、保存された検索結果がない場合に送出される
     :return: 検索結果
     :rtype: AirtableResponse
     """
-    offset = None
+    def read():
+      all_records = []
+      errors = []
 
-    all_records = []
-    errors = []
+      for page in self.iter_pages(formula=formula, sort=sort, fields=fields, view=view, deadline=deadline, include=include):
+        all_records.extend(page.records)
+        errors.extend(page.errors)
+
+      return AirtableResponse(records=all_records, errors=errors)
+
+    params = self._make_params(formula=formula, sort=sort, fields=fields, view=view)
+    if include:
+      params['include'] = sorted(include)
+    return self._read_with_stale('get_all', params, read)
+  
+  def iter_pages(self, formula=None, sort=None, fields=None, view=None, prefetch=0, deadline=None, include=None):
+    """全てのレコードをページ単位で検索（ジェネレーター）
+
+    1ページ分の検索結果をAirtableResponseとして順に返却します。全ページ分のレコードをメモリに保持しません。
+    prefetchを指定すると、バックグラウンドのスレッドで次のページを先読みします。
+    呼び出し側がページを処理している間に次のページを取得するため、ネットワーク待ちと処理が重なります。
+    先読みするページ数はprefetchで上限が決まるため、メモリ使用量も制限されます。
+
+    >>> for page in client.iter_pages(prefetch=2):
+    ...   for record in page.records:
+    ...     process(record)
+
+    :param formula: 任意の条件式(Airtableのformulaを参照), defaults to None
+    :type formula: string, optional
+    :param sort: 検索結果のソート順, defaults to None
+    :type sort: AirtableSorter|dict|list, optional
+    :param fields: レスポンスに含めるフィールド名のリスト, defaults to None
+    :type fields: list, optional
+    :param view: 検索対象のビュー名, defaults to None
+    :type view: string, optional
+    :param prefetch: 先読みするページ数の上限(0の場合は先読みしない), defaults to 0
+    :type prefetch: int, optional
+    :param deadline: 全ページの取得にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :param include: 展開するリンクフィールド名 -> リンク先テーブルのクライアント(またはクライアントと入れ子のincludeのタプル), defaults to None
+    :type include: dict, optional
+    :return: 1ページ分の検索結果のイテレーター
+    :rtype: generator
+    """
+    pages = self._fetch_pages(formula=formula, sort=sort, fields=fields, view=view, deadline=Deadline.make(deadline), include=include)
+    if prefetch and prefetch > 0:
+      return self._prefetch(pages, prefetch)
+    return pages
+
+  def _fetch_pages(self, formula=None, sort=None, fields=None, view=None, deadline=None, include=None):
+    """offsetを辿って1ページずつ検索
+
+    :param formula: filterByFormula値, defaults to None
+    :type formula: string, optional
+    :param sort: sort値, defaults to None
+    :type sort: AirtableSorter|dict|list, optional
+    :param fields: fields値, defaults to None
+    :type fields: list, optional
+    :param view: view値, defaults to None
+    :type view: string, optional
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :param include: 展開するリンクフィールドの設定, defaults to None
+    :type include: dict, optional
+    :yield: 1ページ分の検索結果
+    :rtype: AirtableResponse
+    """
+    offset = None
+    loaders = {}
 
     while True:
-      r = self._get(formula=formula, offset=offset, sort=sort, fields=fields, view=view)
+      r = self._get(formula=formula, offset=offset, sort=sort, fields=fields, view=view, deadline=deadline)
       if len(r) == 0:
         break
-      records = r.get('records')
       error = r.get('error')
-      if error:
-        errors.append(error)
-      all_records.extend(records)
       offset = r.get('offset')
+      records = r.get('records', [])
+      if include:
+        self._include_linked(records, include, loaders)
+      yield AirtableResponse(records=records, offset=offset, errors=[error] if error else [])
       if not offset:
         break
-      time.sleep(self._API_LIMIT)
-    
-    return AirtableResponse(records=all_records, errors=errors)
-  
-  def get_all_by(self, field, value, sort=None, fields=None, view=None):
+      self._wait_api_limit(deadline)
+
+  def _include_linked(self, records, include, loaders):
+    """リンクフィールドのレコードIDをリンク先のレコードに展開
+
+    recordsに含まれるリンク先のレコードIDを重複を除いてまとめて検索し、
+    各レコードの'included'にフィールド名 -> リンク先レコードのリストとして格納します。
+    検索したリンク先のレコードはloadersに保持され、同じスキャン内では再検索しません。
+
+    >>> client.get_all(include={'Customer': customers, 'Items': (items, {'Product': products})})
+
+    :param records: 展開対象のレコードのリスト
+    :type records: list
+    :param include: 展開するリンクフィールド名 -> リンク先テーブルのクライアント(またはクライアントと入れ子のincludeのタプル)
+    :type include: dict
+    :param loaders: リンクフィールド名 -> (リンク先を検索するAirtableLoader, 入れ子のloaders)
+    :type loaders: dict
+    """
+    from .loader import AirtableLoader
+
+    for field, target in include.items():
+      if isinstance(target, tuple):
+        client, nested_include = target
+      else:
+        client, nested_include = target, None
+      if field not in loaders:
+        loaders[field] = (AirtableLoader(client), {})
+      loader, nested_loaders = loaders[field]
+
+      futures = {}
+      for record in records:
+        for linked_id in record.get('fields', {}).get(field) or []:
+          if linked_id not in futures:
+            futures[linked_id] = loader.load(linked_id)
+      loader.dispatch()
+
+      linked = {}
+      for linked_id, future in futures.items():
+        for linked_record in future.result().records:
+          linked[linked_id] = linked_record
+
+      if nested_include:
+        pending = [linked_record for linked_record in linked.values() if 'included' not in linked_record]
+        self._include_linked(pending, nested_include, nested_loaders)
+
+      for record in records:
+        ids = record.get('fields', {}).get(field) or []
+        record.setdefault('included', {})[field] = [linked[linked_id] for linked_id in ids if linked_id in linked]
+
+  def _prefetch(self, iterable, depth):
+    """イテラブルをバックグラウンドのスレッドで先読み
+
+    最大depth件を先読みしてキューに保持します。
+    呼び出し側でイテレーションを中断した場合は、先読みを停止します。
+    先読み中に発生した例外は、呼び出し側のイテレーションで送出されます。
+
+    :param iterable: 先読み対象のイテラブルオブジェクト
+    :type iterable: object
+    :param depth: 先読みする要素数の上限
+    :type depth: int
+    :yield: iterableの要素
+    :rtype: object
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+      while not stop.is_set():
+        try:
+          buffer.put(item, timeout=0.1)
+          return True
+        except queue.Full:
+          continue
+      return False
+
+    def produce():
+      try:
+        for item in iterable:
+          if not put((item, None)):
+            break
+      except BaseException as exc:
+        put((end, exc))
+      else:
+        put((end, None))
+      finally:
+        if hasattr(iterable, 'close'):
+          iterable.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+      while True:
+        item, exc = buffer.get()
+        if exc is not None:
+          raise exc
+        if item is end:
+          break
+        yield item
+    finally:
+      stop.set()
+
+  def get_all_by(self, field, value, sort=None, fields=None, view=None, deadline=None):
     """対象フィールドの値に一致するレコードを検索（全ページ）
 
     >>> print(client.get_all_by('Age', '16').get())
@@ -894,10 +1719,228 @@ class AirtableClient(object):
     :type fields: list, optional
     :param view: 検索対象のビュー名, defaults to None
     :type view: string, optional
+    :param deadline: 全ページの取得にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
     :return: 検索結果
     :rtype: AirtableResponse
     """
-    return self.get_all(self._make_single_condition(field, value), sort=sort, fields=fields, view=view)
+    return self.get_all(self._make_single_condition(field, value), sort=sort, fields=fields, view=view, deadline=deadline)
+
+  def download_attachments(self, destination, fields=None, thumbnails=None, formula=None, view=None, max_workers=4):
+    """添付ファイルを並行してダウンロード
+
+    全ページのレコードを順に読み込みながら(次のページは先読み)、添付ファイルをmax_workers並列でダウンロードします。
+    ファイルはチャンク単位で書き出すため、ファイル全体をメモリに保持しません。
+    ダウンロード済みのファイル(添付ファイルIDとサイズが一致)はスキップします。
+
+    >>> result = client.download_attachments('/backup/media', fields=['Photos'], thumbnails=['large'], max_workers=8)
+    >>> print(result['downloaded'], result['skipped'], result['errors'])
+
+    :param destination: 保存先のディレクトリ、または(添付ファイル情報, チャンクのイテレーター)を受け取る関数
+    :type destination: string|function
+    :param fields: 対象とする添付ファイルのフィールド名のリスト, defaults to None ※未指定の場合は添付ファイル形式の全フィールド
+    :type fields: list, optional
+    :param thumbnails: ダウンロードするサムネイルのサイズのリスト('small', 'large', 'full'), defaults to None
+    :type thumbnails: list, optional
+    :param formula: 対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param view: 対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param max_workers: 同時にダウンロードするファイル数, defaults to 4
+    :type max_workers: int, optional
+    :return: {'downloaded': 件数, 'skipped': 件数, 'errors': [(添付ファイル情報, 例外), ...]}
+    :rtype: dict
+    """
+    from .attachments import AirtableAttachmentDownloader
+    downloader = AirtableAttachmentDownloader(destination, fields=fields, thumbnails=thumbnails, max_workers=max_workers, timeout=self.timeout)
+    pages = self.iter_pages(formula=formula, fields=fields, view=view, prefetch=1)
+    return downloader.download(record for page in pages for record in page.records)
+
+  def snapshot(self, path, formula=None, fields=None, view=None, compresslevel=6, deadline=None):
+    """テーブルのスナップショットを圧縮したJSON Lines形式のファイルに保存
+
+    全ページのレコードを順に読み込みながら(次のページは先読み)、ページ毎に圧縮して書き込みます。
+    全レコードをメモリに保持しません。あわせて索引ファイル({path}.idx)を作成します。
+    保存したスナップショットはAirtableSnapshotで読み込めます。
+
+    >>> client.snapshot('orders.jsonl.gz')
+    {'records': 1200, 'blocks': 12}
+    >>> with AirtableSnapshot('orders.jsonl.gz') as snapshot:
+    ...   record = snapshot.get('recXXX')
+
+    :param path: 保存先のファイルパス
+    :type path: string
+    :param formula: 対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param fields: 保存するフィールド名のリスト, defaults to None
+    :type fields: list, optional
+    :param view: 対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param compresslevel: gzipの圧縮レベル(1〜9), defaults to 6
+    :type compresslevel: int, optional
+    :param deadline: 全ページの取得にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :raises requests.exceptions.HTTPError: ページの取得に失敗した場合に送出される(ファイルは置き換えません)
+    :return: {'records': レコード数, 'blocks': ブロック数}
+    :rtype: dict
+    """
+    import requests
+    from .snapshot import AirtableSnapshotWriter
+    with AirtableSnapshotWriter(path, compresslevel=compresslevel) as writer:
+      for page in self.iter_pages(formula=formula, fields=fields, view=view, prefetch=1, deadline=deadline):
+        if page.errors:
+          raise requests.exceptions.HTTPError('Failed to fetch a page: {}'.format(page.errors))
+        writer.write_block(page.records)
+    return {'records': writer.count, 'blocks': writer.blocks}
+
+  def aggregate(self, group_by=None, sum=None, distinct=None, formula=None, view=None, field=None, deadline=None):
+    """レコードを集計
+
+    集計に必要なフィールドのみを取得し、全ページのレコードを順に読み込みながら(次のページは先読み)集計します。
+    全レコードをメモリに保持しません。件数のみを集計する場合は、取得するフィールドをfieldで指定してください。
+
+    >>> client.aggregate(group_by='Region', sum='Amount', formula='{Status}="Paid"')
+    {'East': {'count': 120, 'sum': {'Amount': 4500}}, 'West': {'count': 80, 'sum': {'Amount': 3100}}}
+    >>> client.aggregate(sum=['Amount', 'Tax'], distinct='Region')
+    {'count': 200, 'sum': {'Amount': 7600, 'Tax': 760}, 'distinct': {'Region': ['East', 'West']}}
+
+    :param group_by: グループ化するフィールド名, defaults to None
+    :type group_by: string, optional
+    :param sum: 合計するフィールド名(またはそのリスト), defaults to None
+    :type sum: string|list, optional
+    :param distinct: 重複のない値を集計するフィールド名(またはそのリスト), defaults to None
+    :type distinct: string|list, optional
+    :param formula: 対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param view: 対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param field: 件数のみを集計する場合に取得するフィールド名, defaults to None
+    :type field: string, optional
+    :param deadline: 全ページの取得にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :raises ValueError: 件数のみを集計し、fieldを指定していない場合に送出される
+    :return: 集計結果(group_by指定時はグループの値 -> 集計結果)
+    :rtype: dict
+    """
+    from .aggregate import AirtableAggregation
+    aggregation = AirtableAggregation(group_by=group_by, sum=sum, distinct=distinct, field=field)
+    for page in self.iter_pages(formula=formula, fields=aggregation.fields(), view=view, prefetch=1, deadline=deadline):
+      aggregation.add(page.records)
+    return aggregation.result()
+
+  def count(self, formula=None, view=None, field=None, deadline=None):
+    """レコード数を取得
+
+    fieldのみを取得して通信量を削減します。値の小さいフィールド(プライマリフィールド等)を指定してください。
+
+    >>> client.count(formula='{Status}="Paid"', field='Name')
+    200
+
+    :param formula: 対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param view: 対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param field: 取得するフィールド名
+    :type field: string
+    :param deadline: 全ページの取得にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :raises ValueError: fieldを指定していない場合に送出される
+    :return: レコード数
+    :rtype: int
+    """
+    return self.aggregate(formula=formula, view=view, field=field, deadline=deadline)['count']
+
+  def map_records(self, func, formula=None, fields=None, view=None, workers=4, processes=False, ordered=True, max_pending=None, chunk_size=1, write=None, deadline=None):
+    """全てのレコードに関数を並列に適用（ジェネレーター）
+
+    全ページのレコードを順に読み込みながら(次のページは先読み)、スレッドプールまたはプロセスプールで関数を適用します。
+    処理待ちのタスク数がmax_pendingに達するとレコードの読み込みが待機するため、メモリ使用量は制限されます。
+
+    writeに'insert'/'update'を指定すると、関数の戻り値(Noneは除く)を一括登録/一括更新に逐次渡し、
+    バッチ毎の結果(AirtableResponse)を返却するジェネレーターになります。
+
+    >>> for result in client.map_records(transform, workers=8, processes=True, chunk_size=50):
+    ...   print(result)
+    >>> for r in client.map_records(lambda record: {'id': record['id'], 'fields': {'Score': score(record)}}, write='update'):
+    ...   print(r.errors)
+
+    :param func: レコードに適用する関数
+    :type func: function
+    :param formula: 対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param fields: 取得するフィールド名のリスト, defaults to None
+    :type fields: list, optional
+    :param view: 対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param workers: 並列数, defaults to 4
+    :type workers: int, optional
+    :param processes: プロセスプールを使用するかどうか(Falseの場合はスレッドプール), defaults to False
+    :type processes: bool, optional
+    :param ordered: レコードの順に結果を返却するかどうか(Falseの場合は完了順), defaults to True
+    :type ordered: bool, optional
+    :param max_pending: 処理待ちのタスク数の上限, defaults to None ※未指定の場合はworkersの2倍
+    :type max_pending: int, optional
+    :param chunk_size: 1つのタスクにまとめるレコード数, defaults to 1
+    :type chunk_size: int, optional
+    :param write: 関数の戻り値の書き込み方法('insert'/'update'), defaults to None
+    :type write: string, optional
+    :param deadline: 全ページの取得(と書き込み)にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :raises ValueError: writeが'insert'/'update'以外の場合に送出される
+    :return: 関数の戻り値(writeを指定した場合はバッチ毎の書き込み結果)のイテレーター
+    :rtype: generator
+    """
+    from .pipeline import AirtablePipeline
+    if write not in (None, 'insert', 'update'):
+      raise ValueError("'write' must be None, 'insert' or 'update'.")
+    deadline = Deadline.make(deadline)
+    pipeline = AirtablePipeline(func, workers=workers, processes=processes, ordered=ordered, max_pending=max_pending, chunk_size=chunk_size)
+    pages = self.iter_pages(formula=formula, fields=fields, view=view, prefetch=1, deadline=deadline)
+    results = pipeline.map(record for page in pages for record in page.records)
+    if write == 'insert':
+      return self.bulk_insert((result for result in results if result is not None), stream=True, deadline=deadline)
+    if write == 'update':
+      return self.bulk_update((result for result in results if result is not None), stream=True, deadline=deadline)
+    return results
+
+  def copy_to(self, destination, fields=None, exclude=None, link_fields=None, id_map=None, transform=None, formula=None, view=None, source_id_field=None):
+    """テーブルのレコードを別のテーブルにコピー
+
+    コピー元のページを先読みしながら、リンクフィールドを除いたレコードをコピー先に一括登録します。
+    ベース毎にレート制限があるため、別のベースへのコピーでは読み込みと書き込みが並行して進みます。
+    その後、リンクフィールドのレコードIDをIDマップで置き換えてコピー先を一括更新します。
+    id_mapにファイルパスを指定すると、中断後の再実行ではコピー済みのレコードとリンクを更新済みのレコードをスキップします。
+    source_id_fieldを指定すると、コピー先に保存したコピー元のレコードIDからIDマップを復元し、登録直後に中断したレコードも重複して登録しません。
+
+    >>> source = AirtableClientFactory(base_id='appSRC', api_key='XXX').create('Tasks')
+    >>> destination = AirtableClientFactory(base_id='appDST', api_key='XXX').create('Tasks')
+    >>> source.copy_to(destination, exclude=['Total'], link_fields=['Parent'], id_map='tasks.idmap', source_id_field='Source ID')
+    {'copied': 1200, 'skipped': 0, 'recovered': 0, 'linked': 310, 'unmapped_links': 0, 'errors': []}
+
+    :param destination: コピー先のクライアント
+    :type destination: AirtableClient
+    :param fields: コピーするフィールド名のリスト, defaults to None ※未指定の場合は全フィールド
+    :type fields: list, optional
+    :param exclude: コピーしないフィールド名のリスト(数式・ロールアップ等の計算フィールド), defaults to None
+    :type exclude: list, optional
+    :param link_fields: テーブル内へのリンクフィールド名のリスト、またはフィールド名 -> リンク先テーブルのAirtableIdMap, defaults to None
+    :type link_fields: list|dict, optional
+    :param id_map: このテーブルのIDマップ(またはその保存先のファイルパス), defaults to None
+    :type id_map: AirtableIdMap|string, optional
+    :param transform: 登録前にフィールドを変換する関数, defaults to None
+    :type transform: function, optional
+    :param formula: コピー対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param view: コピー対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param source_id_field: コピー元のレコードIDを保存するコピー先のテキストフィールド名, defaults to None
+    :type source_id_field: string, optional
+    :return: {'copied': 登録件数, 'skipped': コピー済みの件数, 'recovered': コピー先から復元したIDの件数, 'linked': リンクを更新した件数, 'unmapped_links': 置き換えられなかったリンク数, 'errors': エラー情報のリスト}
+    :rtype: dict
+    """
+    from .migration import AirtableTableCopier
+    with AirtableTableCopier(self, destination, fields=fields, exclude=exclude, link_fields=link_fields, id_map=id_map, transform=transform, formula=formula, view=view, source_id_field=source_id_field) as copier:
+      return copier.run()
 
   def insert(self, fields):
     """1件のレコードを新規登録
@@ -912,26 +1955,69 @@ class AirtableClient(object):
     r = self._post(data={'fields': fields})
     return AirtableResponse(records=r)
 
-  def bulk_insert(self, fields_list):
+  def bulk_insert(self, fields_list, stream=False, deadline=None, typecast=False):
     """一括でレコードを新規登録
 
+    レコード数とボディサイズの両方の上限に収まるようにバッチを詰めて送信します。
+    バッチが413/422で失敗した場合は分割して再送し、原因となったレコードのみをerrorsに格納します。
+    errorsの各要素は{'index': 通し番号, 'record': レコード, 'error': エラー}です。
+
+    fields_listはlistに限らず、CSVやDBカーソルから逐次読み込むジェネレーター等も指定できます。
+    streamにTrueを指定すると、登録結果を全件保持せずにバッチ毎のAirtableResponseを返却するジェネレーターになります。
+
     >>> client.bulk_insert([{'Name': 'eee', 'Age': 23}, {'Name': 'fff', 'Age': 19})
 
-    :param fields_list: レコードのフィールドリスト
+    >>> for r in client.bulk_insert(read_rows(), stream=True):
+    ...   print(r.size(), r.errors)
+
+    :param fields_list: レコードのフィールドのイテラブル
     :type fields_list: list
-    :return: 登録結果
+    :param stream: バッチ毎に登録結果を返却するかどうか, defaults to False
+    :type stream: bool, optional
+    :param deadline: 全バッチの登録にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :param typecast: 文字列の値をフィールドの型に変換して登録するかどうか(Airtableのtypecast), defaults to False
+    :type typecast: bool, optional
+    :raises AirtableDeadlineExceeded: deadlineまでに全バッチを登録できない場合に送出される
+    :return: 登録結果(streamがTrueの場合はバッチ毎の登録結果のイテレーター)
+    :rtype: AirtableResponse|generator
+    """
+    batches = self._iter_write_responses('post', self._build_batch_records(fields_list), Deadline.make(deadline), typecast)
+    if stream:
+      return batches
+    return self._merge_responses(batches)
+
+  def _iter_write_responses(self, method, records, deadline=None, typecast=False):
+    """一括処理のバッチ毎の結果をAirtableResponseとして返却
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param records: 一括処理用のレコードのイテラブル
+    :type records: object
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :param typecast: 文字列の値をフィールドの型に変換して登録するかどうか(Airtableのtypecast), defaults to False
+    :type typecast: bool, optional
+    :yield: バッチ毎の処理結果
     :rtype: AirtableResponse
     """
-    inserted_records = []
+    for written, errors in self._write_batches(method, records, deadline, typecast):
+      yield AirtableResponse(records=written, errors=errors)
 
-    # TODO fields_listがarrayかのチェック
+  def _merge_responses(self, responses):
+    """複数のAirtableResponseのrecordsとerrorsを1つにまとめる
 
-    for chunk_records in self._chunk(fields_list, self._MAX_RECORDS_PER_REQUEST):
-        new_records = self._build_batch_records(chunk_records)
-        r = self._post(data={"records": new_records})
-        inserted_records += r.get('records')
-        time.sleep(self._API_LIMIT)
-    return AirtableResponse(records=inserted_records)
+    :param responses: AirtableResponseのイテラブル
+    :type responses: object
+    :return: まとめた結果
+    :rtype: AirtableResponse
+    """
+    records = []
+    errors = []
+    for response in responses:
+      records += response.records
+      errors += response.errors
+    return AirtableResponse(records=records, errors=errors)
 
   def update(self, id, fields):
     """対象のレコードを更新
@@ -948,6 +2034,96 @@ class AirtableClient(object):
     r = self._patch(id, data={'fields': fields})
     return AirtableResponse(records=r)
 
+  def bulk_update(self, records, stream=False, deadline=None):
+    """一括でレコードを更新
+
+    recordsの各要素のfieldsに指定されたフィールドのみ上書きします。
+    レコード数とボディサイズの両方の上限に収まるようにバッチを詰めてPATCHで送信します。
+    バッチが413/422で失敗した場合は分割して再送し、原因となったレコードのみをerrorsに格納します。
+
+    >>> client.bulk_update([{'id': 'XXX', 'fields': {'Age': 20}}, {'id': 'XXX', 'fields': {'Age': 21}}])
+
+    :param records: 更新対象のレコードのイテラブル({'id': 'XXX', 'fields': {...}})
+    :type records: list
+    :param stream: バッチ毎に更新結果を返却するかどうか, defaults to False
+    :type stream: bool, optional
+    :param deadline: 全バッチの更新にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :raises AirtableDeadlineExceeded: deadlineまでに全バッチを更新できない場合に送出される
+    :return: 更新結果(streamがTrueの場合はバッチ毎の更新結果のイテレーター)
+    :rtype: AirtableResponse|generator
+    """
+    batches = self._iter_write_responses('patch', ({'id': record['id'], 'fields': record['fields']} for record in records), Deadline.make(deadline))
+    if stream:
+      return batches
+    return self._merge_responses(batches)
+
+  def save_all(self, records, deadline=None):
+    """変更を追跡するレコードのうち、変更されたレコードの変更されたフィールドのみを一括で保存
+
+    変更のないレコードは送信しません。保存に成功したレコードは変更なしの状態に戻ります。
+    errorsの'index'は変更されたレコードの中での通し番号です。
+
+    >>> records = client.get_all().as_records(client)
+    >>> for record in records:
+    ...   record['Status'] = 'done'
+    >>> client.save_all(records)
+
+    :param records: 変更を追跡するレコードのイテラブル
+    :type records: list
+    :param deadline: 保存にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :return: 更新結果
+    :rtype: AirtableResponse
+    """
+    dirty = [record for record in records if record.is_dirty()]
+    if not dirty:
+      return AirtableResponse(records=[])
+
+    r = self.bulk_update(({'id': record.id, 'fields': record.changed_fields()} for record in dirty), deadline=deadline)
+    failed = set(error['index'] for error in r.errors if isinstance(error, dict) and 'index' in error)
+    for index, record in enumerate(dirty):
+      if index not in failed:
+        record.mark_clean()
+    return r
+
+  def sync_to(self, rows, key, dry_run=False, delete=True, formula=None, view=None, deadline=None):
+    """テーブルのレコードを指定したレコードの集合と一致させる
+
+    現在のテーブルをページ単位で読み込み、keyのフィールドでrowsと対応付けます。
+    フィールド値のハッシュを比較して、変更のないレコードは送信しません。
+    rowsにないレコードの登録、値の異なるレコードの更新、テーブルにのみあるレコードの削除を一括処理で行います。
+    dry_runにTrueを指定すると、テーブルを変更せずに同期計画のみを返却します。
+
+    >>> plan = client.sync_to([{'Code': 'A', 'Name': 'aaa'}, {'Code': 'B', 'Name': 'bbb'}], key='Code', dry_run=True)
+    >>> print(plan.summary())
+    {'create': 1, 'update': 1, 'delete': 2, 'unchanged': 0}
+    >>> plan.apply()
+
+    :param rows: テーブルの内容とするレコードのフィールドのイテラブル
+    :type rows: list
+    :param key: レコードを対応付けるキーのフィールド名
+    :type key: string
+    :param dry_run: 同期計画のみを作成するかどうか, defaults to False
+    :type dry_run: bool, optional
+    :param delete: rowsに含まれないレコードを削除するかどうか, defaults to True
+    :type delete: bool, optional
+    :param formula: 同期対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param view: 同期対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param deadline: 適用にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :raises ValueError: rowsにキーのないレコードや重複したキーがある場合に送出される
+    :return: 同期計画(dry_runがFalseの場合は適用済み)
+    :rtype: AirtableSyncPlan
+    """
+    from .sync import AirtableSyncPlan
+    plan = AirtableSyncPlan.build(self, rows, key, delete=delete, formula=formula, view=view)
+    if not dry_run:
+      plan.apply(deadline=deadline)
+    return plan
+
   def delete(self, id):
     """1件のレコードを削除
 
@@ -961,40 +2137,126 @@ class AirtableClient(object):
     r = self._delete(id)
     return AirtableResponse(records=r)
 
-  def bulk_delete(self, ids=[], records=[]):
+  def bulk_delete(self, ids=[], records=[], stream=False, deadline=None):
     """一括でレコードを削除
 
+    _MAX_RECORDS_PER_REQUEST件ずつまとめて1リクエストで削除します。
+    ids、recordsはlistに限らず、ジェネレーター等の任意のイテラブルを指定できます。
+    streamにTrueを指定すると、削除結果を全件保持せずにバッチ毎のAirtableResponseを返却するジェネレーターになります。
+
     >>> client.bulk_delete(ids=['XXX', 'XXX'])
 
     >>> client.bulk_delete(records=[{'id': 'XXX', 'fields': {...}}, {'id': 'XXX', 'fields': {...}}])
 
-    :param ids: 削除対象のレコードIDリスト, defaults to []
+    :param ids: 削除対象のレコードIDのイテラブル, defaults to []
     :type ids: list, optional
-    :param records: 削除対象のレコードリスト(idを含めること), defaults to []
+    :param records: 削除対象のレコードのイテラブル(idを含めること), defaults to []
     :type records: list, optional
-    :return: 削除結果
+    :param stream: バッチ毎に削除結果を返却するかどうか, defaults to False
+    :type stream: bool, optional
+    :param deadline: 全バッチの削除にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :raises AirtableDeadlineExceeded: deadlineまでに全バッチを削除できない場合に送出される
+    :return: 削除結果(streamがTrueの場合はバッチ毎の削除結果のイテレーター)
+    :rtype: AirtableResponse|generator
+    """
+    batches = self._iter_delete_responses(ids, records, Deadline.make(deadline))
+    if stream:
+      return batches
+    return self._merge_responses(batches)
+
+  def _iter_delete_responses(self, ids, records, deadline=None):
+    """一括削除のバッチ毎の結果をAirtableResponseとして返却
+
+    :param ids: 削除対象のレコードIDのイテラブル
+    :type ids: object
+    :param records: 削除対象のレコードのイテラブル(idを含めること)
+    :type records: object
+    :param deadline: 処理時間の上限, defaults to None
+    :type deadline: Deadline, optional
+    :yield: バッチ毎の削除結果
     :rtype: AirtableResponse
     """
-    deleted_records = []
+    all_ids = itertools.chain(ids or [], (record['id'] for record in records or []))
+    for chunk_ids in self._chunk(all_ids, self.max_records_per_request):
+      r = self._delete_batch(chunk_ids, deadline)
+      error = r.get('error')
+      yield AirtableResponse(records=r.get('records', []), errors=[error] if error else [])
+      self._wait_api_limit(deadline)
 
-    # ids指定の場合
-    if ids:
-      for chunk_ids in self._chunk(ids, self._MAX_RECORDS_PER_REQUEST):
-        for id in chunk_ids:
-          r = self._delete(id)
-          deleted_records.append(r)
-        time.sleep(self._API_LIMIT)
-    
-    # records指定の場合
-    if records:
-      ids = [record['id'] for record in records]
-      for chunk_ids in self._chunk(ids, self._MAX_RECORDS_PER_REQUEST):
-        for id in chunk_ids:
-          r = self._delete(id)
-          deleted_records.append(r)
-        time.sleep(self._API_LIMIT)
+class AirtableFanOutResult(object):
+  """ファンアウト実行結果クラス
 
-    return AirtableResponse(records=deleted_records)
+  どのベース・テーブル・クエリの結果かを示す情報と、検索結果またはエラーを保持します。
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, base_id, table_name, query, response=None, error=None):
+    """コンストラクタ
+
+    :param base_id: AirtableのベースID
+    :type base_id: string
+    :param table_name: Airtableのテーブル名
+    :type table_name: string
+    :param query: 実行したクエリ(get_allの引数)
+    :type query: dict
+    :param response: 検索結果, defaults to None
+    :type response: AirtableResponse, optional
+    :param error: 実行時に発生した例外, defaults to None
+    :type error: Exception, optional
+    """
+    self._base_id = base_id
+    self._table_name = table_name
+    self._query = query
+    self._response = response
+    self._error = error
+    pass
+
+  @property
+  def base_id(self):
+    """base_idのgetter
+
+    :return: コンストラクタにセットしたbase_id
+    :rtype: string
+    """
+    return self._base_id
+
+  @property
+  def table_name(self):
+    """table_nameのgetter
+
+    :return: コンストラクタにセットしたtable_name
+    :rtype: string
+    """
+    return self._table_name
+
+  @property
+  def query(self):
+    """queryのgetter
+
+    :return: コンストラクタにセットしたquery
+    :rtype: dict
+    """
+    return self._query
+
+  @property
+  def response(self):
+    """responseのgetter
+
+    :return: コンストラクタにセットしたresponse
+    :rtype: AirtableResponse
+    """
+    return self._response
+
+  @property
+  def error(self):
+    """errorのgetter
+
+    :return: コンストラクタにセットしたerror
+    :rtype: Exception
+    """
+    return self._error
 
 class AirtableClientFactory:
   """AirtableClientのファクトリクラス
@@ -1003,8 +2265,12 @@ class AirtableClientFactory:
 
   ベースIDとAPIキーは必須です。コンストラクタでベースIDとAPIキーを指定しない場合は、createメソッドをコールする際に指定してください。
 
+  生成したクライアントはベース毎のレートリミッター(とサーキットブレーカー)を共有します。
+
   """
-  def __init__(self, base_id=None, api_key=None, debug=False):
+  _DEFAULT_MAX_WORKERS = 8
+
+  def __init__(self, base_id=None, api_key=None, debug=False, rate_limit_backend=None, timeout=None, hedge=None, transport=None, circuit_breaker=None, stale_store=None):
     """コンストラクタ
 
     :param base_id: AirtableのベースID, defaults to None
@@ -1013,13 +2279,112 @@ class AirtableClientFactory:
     :type api_key: string, optional
     :param debug: デバッグモードフラグ(True:ON/False:OFF), defaults to False
     :type debug: bool, optional
+    :param rate_limit_backend: レートリミッターの送信枠を管理するバックエンド, defaults to None ※複数プロセスで共有する場合はFileRateLimitBackendを指定
+    :type rate_limit_backend: RateLimitBackend, optional
+    :param timeout: 生成するクライアントのHTTPリクエストのタイムアウト秒数(数値または(接続, 読み込み)のタプル), defaults to None
+    :type timeout: float|tuple, optional
+    :param hedge: 生成するクライアントのGETリクエストをヘッジする設定(Trueの場合はデフォルト設定), defaults to None
+    :type hedge: HedgePolicy|bool, optional
+    :param transport: 生成するクライアントで共有するトランスポート('http2'の場合はHTTP2Transport), defaults to None ※未指定の場合はクライアント毎にrequests.Sessionで送信
+    :type transport: Transport|string, optional
+    :param circuit_breaker: ベース毎のサーキットブレーカーの設定(Trueの場合はデフォルト設定、dictの場合はCircuitBreakerの引数), defaults to None ※未指定またはFalseの場合は使用しない
+    :type circuit_breaker: bool|dict, optional
+    :param stale_store: 生成するクライアントで共有する検索結果の保存先, defaults to None
+    :type stale_store: StaleResponseStore, optional
+    :raises ValueError: circuit_breakerにbool、dict以外を指定した場合に送出される
     """
     self.base_id = base_id
     self.api_key = api_key
     self.debug = debug
+    self.rate_limit_backend = rate_limit_backend
+    self.timeout = timeout
+    if hedge is True:
+      from .hedging import HedgePolicy
+      hedge = HedgePolicy()
+    self.hedge = hedge
+    if transport == 'http2':
+      from .transport import HTTP2Transport
+      transport = HTTP2Transport()
+    self.transport = transport
+    self._rate_limiters = {}
+    self._rate_limiters_lock = threading.Lock()
+    if circuit_breaker is True:
+      circuit_breaker = {}
+    elif not circuit_breaker:
+      circuit_breaker = None
+    elif not isinstance(circuit_breaker, dict):
+      raise ValueError("'circuit_breaker' must be a bool or a dict of CircuitBreaker arguments. Pass a CircuitBreaker instance to AirtableClient directly.")
+    self.circuit_breaker = circuit_breaker
+    self.stale_store = stale_store
+    self._circuit_breakers = {}
+    self._circuit_breakers_lock = threading.Lock()
     pass
 
-  def create(self, table_name, base_id=None, api_key=None):
+  def close(self):
+    """共有しているトランスポートのコネクションを閉じる
+    """
+    if self.transport:
+      self.transport.close()
+
+  def prewarm(self):
+    """HTTPクライアントの読み込みとAirtable APIへの接続を事前に行う
+
+    トランスポートが未指定の場合は、以降に生成するクライアントで共有するRequestsTransportを生成します。
+    APIのホストにHEADリクエストを送信してコネクション(TLSハンドシェイクを含む)を確立し、コネクションプールに保持します。
+    APIの呼び出しには数えられません。接続に失敗しても例外は送出しません。
+
+    >>> atf = AirtableClientFactory(base_id='XXX', api_key='XXX')
+    >>> atf.prewarm()
+    True
+
+    :return: 接続に成功した場合はTrue
+    :rtype: bool
+    """
+    if self.transport is None:
+      from .transport import RequestsTransport
+      self.transport = RequestsTransport()
+    try:
+      self.transport.request('head', AirtableClient._API_BASE_URL, timeout=self.timeout or AirtableClient._DEFAULT_TIMEOUT)
+    except Exception:
+      if self.debug:
+        raise
+      return False
+    return True
+
+  def get_rate_limiter(self, base_id):
+    """ベースIDに対応するレートリミッターを取得
+
+    同じベースIDに対しては常に同じインスタンスを返却します。
+
+    :param base_id: AirtableのベースID
+    :type base_id: string
+    :return: レートリミッター
+    :rtype: RateLimiter
+    """
+    with self._rate_limiters_lock:
+      if base_id not in self._rate_limiters:
+        self._rate_limiters[base_id] = RateLimiter(rate=1.0 / AirtableClient._API_LIMIT, backend=self.rate_limit_backend, key=base_id)
+      return self._rate_limiters[base_id]
+
+  def get_circuit_breaker(self, base_id):
+    """ベースIDに対応するサーキットブレーカーを取得
+
+    同じベースIDに対しては常に同じインスタンスを返却します。
+
+    :param base_id: AirtableのベースID
+    :type base_id: string
+    :return: サーキットブレーカー(circuit_breakerを指定していない場合はNone)
+    :rtype: CircuitBreaker
+    """
+    if self.circuit_breaker is None:
+      return None
+    from .breaker import CircuitBreaker
+    with self._circuit_breakers_lock:
+      if base_id not in self._circuit_breakers:
+        self._circuit_breakers[base_id] = CircuitBreaker(key=base_id, **self.circuit_breaker)
+      return self._circuit_breakers[base_id]
+
+  def create(self, table_name, base_id=None, api_key=None, priority=RequestPriority.INTERACTIVE):
     """Airtableクライアントのインスタンスを生成して返却
 
     1) ベース毎にインスタンスを生成する場合
@@ -1038,6 +2403,8 @@ class AirtableClientFactory:
     :type base_id: string, optional
     :param api_key: AirtableのAPIキー, defaults to None
     :type api_key: string, optional
+    :param priority: 検索・単票処理の優先度(バックグラウンド処理用のクライアントはRequestPriority.BULK), defaults to RequestPriority.INTERACTIVE
+    :type priority: RequestPriority, optional
     :raises ValueError: ベースIDとAPIキーを指定していない場合に送出される
     :return: Airtableクライアント
     :rtype: AirtableClient
@@ -1050,4 +2417,95 @@ class AirtableClientFactory:
     if not self.base_id or not self.api_key:
       raise ValueError("'base_id' and 'api_key' are required. Please through args to constructor or this method.")
 
-    return AirtableClient(self.base_id, table_name, self.api_key, debug=self.debug)
+    return self._create_client(table_name, self.base_id, self.api_key, priority=priority)
+
+  def _create_client(self, table_name, base_id, api_key, priority=RequestPriority.INTERACTIVE):
+    """ベースのレートリミッターとサーキットブレーカーを共有するクライアントを生成
+
+    :param table_name: Airtableのテーブル名
+    :type table_name: string
+    :param base_id: AirtableのベースID
+    :type base_id: string
+    :param api_key: AirtableのAPIキー
+    :type api_key: string
+    :param priority: 検索・単票処理の優先度, defaults to RequestPriority.INTERACTIVE
+    :type priority: RequestPriority, optional
+    :return: Airtableクライアント
+    :rtype: AirtableClient
+    """
+    return AirtableClient(base_id, table_name, api_key, debug=self.debug, rate_limiter=self.get_rate_limiter(base_id), priority=priority, timeout=self.timeout, hedge=self.hedge, transport=self.transport,
+                          circuit_breaker=self.get_circuit_breaker(base_id), stale_store=self.stale_store)
+
+  def _parse_fan_out_spec(self, spec):
+    """ファンアウトの指定を(base_id, table_name, query, api_key)に正規化
+
+    :param spec: (base_id, table_name[, query])のタプル、またはbase_id/table_name/query/api_keyキーを持つdict
+    :type spec: tuple|dict
+    :raises ValueError: ベースIDとAPIキーを特定できない場合に送出される
+    :return: (base_id, table_name, query, api_key)
+    :rtype: tuple
+    """
+    if isinstance(spec, dict):
+      base_id = spec.get('base_id') or self.base_id
+      table_name = spec['table_name']
+      query = spec.get('query') or {}
+      api_key = spec.get('api_key') or self.api_key
+    else:
+      base_id = spec[0] or self.base_id
+      table_name = spec[1]
+      query = spec[2] if len(spec) > 2 and spec[2] else {}
+      api_key = self.api_key
+
+    if not base_id or not api_key:
+      raise ValueError("'base_id' and 'api_key' are required. Please through args to constructor or spec.")
+
+    return (base_id, table_name, query, api_key)
+
+  def fan_out(self, specs, max_workers=None, method='get_all'):
+    """複数のベース・テーブルに対するクエリを並行実行
+
+    レート制限はベース単位のため、異なるベースへのクエリは並行して実行できます。
+    同じベースへのクエリはベース毎のレートリミッターで送信間隔が調整されます。
+    全体の同時実行数はmax_workersで制限されます。
+    結果は完了した順にAirtableFanOutResultとして返却されます(ジェネレーター)。
+    個別のクエリで発生した例外は送出せず、AirtableFanOutResult.errorにセットされます。
+
+    >>> specs = [
+    ...   ('appXXX', 'Orders', {'formula': '{Status}="open"'}),
+    ...   ('appYYY', 'Orders', {'formula': '{Status}="open"'}),
+    ...   {'base_id': 'appZZZ', 'table_name': 'Orders', 'query': {'view': 'Grid view'}},
+    ... ]
+    >>> for result in factory.fan_out(specs, max_workers=4):
+    ...   print(result.base_id, result.table_name, result.response.size())
+
+    :param specs: (base_id, table_name[, query])のタプル、またはbase_id/table_name/query/api_keyキーを持つdictのイテラブル
+    :type specs: list
+    :param max_workers: 全体の同時実行数の上限, defaults to None ※未指定の場合は_DEFAULT_MAX_WORKERS
+    :type max_workers: int, optional
+    :param method: 実行するクライアントのメソッド名(get_all/get_all_by/get/get_by/get_by_formula等), defaults to 'get_all'
+    :type method: string, optional
+    :raises ValueError: ベースIDとAPIキーを特定できない場合に送出される
+    :yield: 実行結果
+    :rtype: AirtableFanOutResult
+    """
+    parsed_specs = [self._parse_fan_out_spec(spec) for spec in specs]
+    if not parsed_specs:
+      return
+
+    def run(base_id, table_name, query, api_key):
+      try:
+        client = self._create_client(table_name, base_id, api_key)
+        response = getattr(client, method)(**query)
+      except Exception as exc:
+        return AirtableFanOutResult(base_id, table_name, query, error=exc)
+      return AirtableFanOutResult(base_id, table_name, query, response=response)
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    with ThreadPoolExecutor(max_workers=max_workers or self._DEFAULT_MAX_WORKERS) as executor:
+      futures = [executor.submit(run, *spec) for spec in parsed_specs]
+      try:
+        for future in as_completed(futures):
+          yield future.result()
+      finally:
+        for future in futures:
+          future.cancel()
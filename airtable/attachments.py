@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""添付ファイルのダウンロード
+
+レコードの添付ファイル(およびサムネイル)を並行してダウンロードします。
+ファイルはチャンク単位でディスク(または任意の関数)に書き出すため、ファイル全体をメモリに保持しません。
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AirtableAttachmentDownloader(object):
+  """添付ファイルのダウンローダークラス
+
+  destinationにディレクトリを指定した場合は、{directory}/{レコードID}/{添付ファイルID}_{ファイル名}に保存します。
+  同じ名前でサイズが一致するファイルが既にある場合はダウンロードしません。
+  destinationに関数を指定した場合は、(添付ファイル情報のdict, バイト列のチャンクのイテレーター)を引数として呼び出します。
+
+  >>> downloader = AirtableAttachmentDownloader('/backup/media', max_workers=8)
+  >>> result = downloader.download(client.get_all().get_list())
+
+  :param object: objectを継承
+  :type object: object
+  """
+  _CHUNK_SIZE = 64 * 1024
+  _PART_SUFFIX = '.part'
+
+  def __init__(self, destination, fields=None, thumbnails=None, max_workers=4, timeout=(10, 60), chunk_size=None):
+    """コンストラクタ
+
+    :param destination: 保存先のディレクトリ、または(添付ファイル情報, チャンクのイテレーター)を受け取る関数
+    :type destination: string|function
+    :param fields: 対象とする添付ファイルのフィールド名のリスト, defaults to None ※未指定の場合は添付ファイル形式の全フィールド
+    :type fields: list, optional
+    :param thumbnails: ダウンロードするサムネイルのサイズのリスト('small', 'large', 'full'), defaults to None
+    :type thumbnails: list, optional
+    :param max_workers: 同時にダウンロードするファイル数, defaults to 4
+    :type max_workers: int, optional
+    :param timeout: (接続タイムアウト, 読み込みタイムアウト), defaults to (10, 60)
+    :type timeout: tuple, optional
+    :param chunk_size: 書き出すチャンクのバイト数, defaults to None ※未指定の場合は_CHUNK_SIZE
+    :type chunk_size: int, optional
+    """
+    self.destination = destination
+    self.fields = fields
+    self.thumbnails = thumbnails or []
+    self.max_workers = max_workers
+    self.timeout = timeout
+    self.chunk_size = chunk_size or self._CHUNK_SIZE
+    import requests
+    self.session = requests.Session()
+    pass
+
+  @classmethod
+  def _is_attachment(cls, value):
+    """添付ファイル形式のフィールド値かどうか
+
+    :param value: フィールドの値
+    :type value: object
+    :return: 添付ファイル形式の場合はTrue
+    :rtype: bool
+    """
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(item, dict) and 'url' in item and 'id' in item for item in value)
+
+  @classmethod
+  def _safe_name(cls, name):
+    """ファイル名として使用できない文字を置換
+
+    :param name: 名前
+    :type name: string
+    :return: 置換後の名前
+    :rtype: string
+    """
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', '_', str(name))
+
+  def iter_attachments(self, records):
+    """レコードに含まれる添付ファイル・サムネイルの情報を列挙
+
+    :param records: レコードのイテラブル
+    :type records: object
+    :yield: 添付ファイル情報(record_id, field, id, url, filename, size, thumbnail)
+    :rtype: dict
+    """
+    for record in records:
+      for field, value in record.get('fields', {}).items():
+        if self.fields is not None and field not in self.fields:
+          continue
+        if not self._is_attachment(value):
+          continue
+        for attachment in value:
+          filename = attachment.get('filename') or attachment['id']
+          yield {
+            'record_id': record['id'],
+            'field': field,
+            'id': attachment['id'],
+            'url': attachment['url'],
+            'filename': filename,
+            'size': attachment.get('size'),
+            'thumbnail': None
+          }
+          for size_name in self.thumbnails:
+            thumbnail = (attachment.get('thumbnails') or {}).get(size_name)
+            if thumbnail and thumbnail.get('url'):
+              yield {
+                'record_id': record['id'],
+                'field': field,
+                'id': attachment['id'],
+                'url': thumbnail['url'],
+                'filename': filename,
+                'size': None,
+                'thumbnail': size_name
+              }
+
+  def _path(self, info):
+    """添付ファイルの保存先パスを取得
+
+    :param info: 添付ファイル情報
+    :type info: dict
+    :return: 保存先パス
+    :rtype: string
+    """
+    if info['thumbnail']:
+      name = '{}_{}_{}'.format(info['id'], info['thumbnail'], info['filename'])
+    else:
+      name = '{}_{}'.format(info['id'], info['filename'])
+    return os.path.join(self.destination, self._safe_name(info['record_id']), self._safe_name(name))
+
+  def _exists(self, path, info):
+    """ダウンロード済みかどうか
+
+    :param path: 保存先パス
+    :type path: string
+    :param info: 添付ファイル情報
+    :type info: dict
+    :return: 同じ名前のファイルがあり、サイズが一致する(サイズが不明な場合は存在する)場合はTrue
+    :rtype: bool
+    """
+    if not os.path.isfile(path):
+      return False
+    return info['size'] is None or os.path.getsize(path) == info['size']
+
+  def _download_one(self, info):
+    """添付ファイルを1つダウンロード
+
+    ディレクトリに保存する場合は一時ファイルに書き出してから置き換えるため、中断しても不完全なファイルは残りません。
+
+    :param info: 添付ファイル情報
+    :type info: dict
+    :return: ダウンロードした場合はTrue、スキップした場合はFalse
+    :rtype: bool
+    """
+    if callable(self.destination):
+      with self.session.get(info['url'], stream=True, timeout=self.timeout) as response:
+        response.raise_for_status()
+        self.destination(info, response.iter_content(chunk_size=self.chunk_size))
+      return True
+
+    path = self._path(info)
+    if self._exists(path, info):
+      return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = path + self._PART_SUFFIX
+    try:
+      with self.session.get(info['url'], stream=True, timeout=self.timeout) as response:
+        response.raise_for_status()
+        with open(part_path, 'wb') as f:
+          for chunk in response.iter_content(chunk_size=self.chunk_size):
+            f.write(chunk)
+      os.replace(part_path, path)
+    finally:
+      if os.path.exists(part_path):
+        os.remove(part_path)
+    return True
+
+  def download(self, records):
+    """レコードの添付ファイルを並行してダウンロード
+
+    レコードは逐次読み込み、同時に処理中のファイル数はmax_workersの2倍までに制限されます。
+    個別のダウンロードで発生した例外は送出せず、結果のerrorsに格納します。
+
+    :param records: レコードのイテラブル
+    :type records: object
+    :return: {'downloaded': 件数, 'skipped': 件数, 'errors': [(添付ファイル情報, 例外), ...]}
+    :rtype: dict
+    """
+    result = {'downloaded': 0, 'skipped': 0, 'errors': []}
+    lock = threading.Lock()
+    slots = threading.BoundedSemaphore(self.max_workers * 2)
+
+    def run(info):
+      try:
+        downloaded = self._download_one(info)
+      except Exception as exc:
+        with lock:
+          result['errors'].append((info, exc))
+      else:
+        with lock:
+          result['downloaded' if downloaded else 'skipped'] += 1
+      finally:
+        slots.release()
+
+    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+      for info in self.iter_attachments(records):
+        slots.acquire()
+        executor.submit(run, info)
+
+    return result
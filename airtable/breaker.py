@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""サーキットブレーカー
+
+Airtable APIの障害時に、失敗が続くベースへのリクエストを一定時間送信せずに即座に失敗させます。
+呼び出し元がタイムアウトまで待たされ続けることを防ぎ、障害中のAPIに再試行が殺到することも防ぎます。
+
+ブレーカーは以下の状態を遷移します。
+
+- CLOSED: 通常の状態です。連続した失敗(またはレイテンシの超過)がfailure_threshold回に達するとOPENになります。
+- OPEN: リクエストを送信せずにAirtableCircuitOpenを送出します。reset_timeout秒経過するとHALF_OPENになります。
+- HALF_OPEN: half_open_requests件までの試行リクエストを送信します。成功するとCLOSED、失敗するとOPENに戻ります。
+
+acquireが返却するチケットには、送信した時点の世代(OPENになる度に進む番号)と試行リクエストかどうかを記録します。
+OPENになる前に送信したリクエストの結果が後から届いた場合は、状態を変更しません。
+
+StaleResponseStoreを使用すると、OPENの間は検索(find/get_by/get_all)に最後に成功した結果を返却できます。
+"""
+import collections
+import enum
+import json
+import threading
+import time
+
+from .exceptions import AirtableCircuitOpen
+
+
+class CircuitState(enum.Enum):
+  """サーキットブレーカーの状態の列挙型
+
+  :param CLOSED: 通常(リクエストを送信する)
+  :type CLOSED: string
+  :param OPEN: 遮断中(リクエストを送信しない)
+  :type OPEN: string
+  :param HALF_OPEN: 試行中(一部のリクエストのみ送信する)
+  :type HALF_OPEN: string
+  """
+  CLOSED = 'closed'
+  OPEN = 'open'
+  HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker(object):
+  """ベース単位のサーキットブレーカークラス
+
+  同じベースに対するクライアント同士でインスタンスを共有します(AirtableClientFactoryがベース毎に生成します)。
+
+  >>> breaker = CircuitBreaker(failure_threshold=5, latency_threshold=10.0, reset_timeout=30.0)
+  >>> client = AirtableClient('XXX', 'XXX', 'XXX', circuit_breaker=breaker)
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, failure_threshold=5, latency_threshold=None, reset_timeout=30.0, half_open_requests=1, key=None):
+    """コンストラクタ
+
+    :param failure_threshold: OPENにする連続した失敗の回数, defaults to 5
+    :type failure_threshold: int, optional
+    :param latency_threshold: 失敗とみなすレイテンシ(秒), defaults to None ※未指定の場合はレイテンシを判定しない
+    :type latency_threshold: float, optional
+    :param reset_timeout: OPENからHALF_OPENにするまでの秒数, defaults to 30.0
+    :type reset_timeout: float, optional
+    :param half_open_requests: HALF_OPENの間に同時に送信する試行リクエストの数, defaults to 1
+    :type half_open_requests: int, optional
+    :param key: エラーメッセージに表示するキー(ベースID), defaults to None
+    :type key: string, optional
+    """
+    self.failure_threshold = failure_threshold
+    self.latency_threshold = latency_threshold
+    self.reset_timeout = reset_timeout
+    self.half_open_requests = half_open_requests
+    self.key = key or 'default'
+    self._state = CircuitState.CLOSED
+    self._failures = 0
+    self._opened_at = None
+    self._probes = 0
+    self._generation = 0
+    self._lock = threading.Lock()
+    pass
+
+  @property
+  def state(self):
+    """現在の状態のgetter
+
+    OPENでreset_timeout秒経過している場合はHALF_OPENを返却します。
+
+    :return: 状態
+    :rtype: CircuitState
+    """
+    with self._lock:
+      return self._current_state()
+
+  def _current_state(self):
+    """ロックを取得した状態で現在の状態を取得し、必要な場合はHALF_OPENに遷移
+
+    :return: 状態
+    :rtype: CircuitState
+    """
+    if self._state is CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+      self._state = CircuitState.HALF_OPEN
+      self._probes = 0
+    return self._state
+
+  def _raise_open(self):
+    """AirtableCircuitOpenを送出
+
+    :raises AirtableCircuitOpen: 常に送出される
+    """
+    retry_after = max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+    raise AirtableCircuitOpen('The circuit for {} is open. Retry after {:.1f} seconds.'.format(self.key, retry_after), retry_after=retry_after)
+
+  def check(self):
+    """リクエストを送信できる状態かどうかを確認
+
+    送信枠の確保(レートリミッターでの待機)の前に呼び出し、OPENの場合は待機せずに失敗させます。
+
+    :raises AirtableCircuitOpen: OPENの場合に送出される
+    """
+    with self._lock:
+      if self._current_state() is CircuitState.OPEN:
+        self._raise_open()
+
+  def acquire(self):
+    """リクエストの送信を開始
+
+    HALF_OPENの場合は試行リクエストの枠を確保します。
+    呼び出した後は、返却したチケットを渡してrecord_success/record_failure/releaseのいずれかを必ず呼び出してください
+    (例外で中断する場合も含むため、try/finallyで呼び出してください)。
+
+    :raises AirtableCircuitOpen: OPEN、またはHALF_OPENで試行リクエストの枠がない場合に送出される
+    :return: チケット(世代, 試行リクエストかどうか)
+    :rtype: tuple
+    """
+    with self._lock:
+      state = self._current_state()
+      if state is CircuitState.OPEN:
+        self._raise_open()
+      probe = state is CircuitState.HALF_OPEN
+      if probe:
+        if self._probes >= self.half_open_requests:
+          self._raise_open()
+        self._probes += 1
+      return (self._generation, probe)
+
+  def _finish(self, ticket):
+    """ロックを取得した状態でチケットの試行リクエストの枠を返却
+
+    :param ticket: acquireが返却したチケット(Noneの場合は現在の世代の試行リクエストとみなす)
+    :type ticket: tuple
+    :return: チケットが現在の世代の場合はTrue
+    :rtype: bool
+    """
+    generation, probe = ticket if ticket is not None else (self._generation, True)
+    if generation != self._generation:
+      return False
+    if probe:
+      self._probes = max(0, self._probes - 1)
+    return True
+
+  def release(self, ticket=None):
+    """成否を判定しないでリクエストを終了
+
+    呼び出し元の都合(deadline、割り込み等)で送信を中断した場合に呼び出します。
+
+    :param ticket: acquireが返却したチケット, defaults to None
+    :type ticket: tuple, optional
+    """
+    with self._lock:
+      self._finish(ticket)
+
+  def record_success(self, latency=None, ticket=None):
+    """リクエストの成功を記録
+
+    latencyがlatency_thresholdを超えている場合は失敗として記録します。
+    OPENになる前に送信したリクエストが後から成功した場合は、状態を変更しません。
+
+    :param latency: レイテンシ(秒), defaults to None
+    :type latency: float, optional
+    :param ticket: acquireが返却したチケット, defaults to None
+    :type ticket: tuple, optional
+    """
+    if self.latency_threshold is not None and latency is not None and latency > self.latency_threshold:
+      self.record_failure(ticket)
+      return
+    with self._lock:
+      if self._finish(ticket) and self._current_state() is not CircuitState.OPEN:
+        self._failures = 0
+        self._state = CircuitState.CLOSED
+
+  def record_failure(self, ticket=None):
+    """リクエストの失敗を記録
+
+    HALF_OPENの場合、またはCLOSEDで連続した失敗がfailure_threshold回に達した場合はOPENにします。
+    OPENになる前に送信したリクエストが後から失敗した場合は、状態を変更しません。
+
+    :param ticket: acquireが返却したチケット, defaults to None
+    :type ticket: tuple, optional
+    """
+    with self._lock:
+      if not self._finish(ticket):
+        return
+      self._failures += 1
+      state = self._current_state()
+      if state is CircuitState.HALF_OPEN or (state is CircuitState.CLOSED and self._failures >= self.failure_threshold):
+        self._open()
+
+  def _open(self):
+    """ロックを取得した状態でOPENにし、世代を進める
+    """
+    self._state = CircuitState.OPEN
+    self._opened_at = time.monotonic()
+    self._probes = 0
+    self._generation += 1
+
+  def reset(self):
+    """CLOSEDに戻す
+    """
+    with self._lock:
+      self._state = CircuitState.CLOSED
+      self._failures = 0
+      self._probes = 0
+      self._opened_at = None
+      self._generation += 1
+
+
+class StaleResponseStore(object):
+  """最後に成功した検索結果を保存するクラス
+
+  サーキットブレーカーがOPENの間、検索の代わりに返却する結果を保存します。
+  pathを指定した場合はdbmでファイルに保存するため、プロセスを再起動しても使用できます。
+  pathを指定しない場合はメモリ上にmax_entries件まで保持し、古いものから破棄します。
+
+  >>> store = StaleResponseStore(max_age=3600)
+  >>> atf = AirtableClientFactory(base_id='XXX', api_key='XXX', circuit_breaker=True, stale_store=store)
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, path=None, max_entries=1024, max_age=None):
+    """コンストラクタ
+
+    :param path: 保存先のファイルパス, defaults to None
+    :type path: string, optional
+    :param max_entries: メモリ上に保持する件数の上限, defaults to 1024
+    :type max_entries: int, optional
+    :param max_age: 返却する結果の保存からの経過秒数の上限, defaults to None ※未指定の場合は無期限
+    :type max_age: float, optional
+    """
+    self.path = path
+    self.max_entries = max_entries
+    self.max_age = max_age
+    if path:
+      import dbm
+      self._entries = dbm.open(path, 'c')
+    else:
+      self._entries = collections.OrderedDict()
+    self._lock = threading.Lock()
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  @classmethod
+  def make_key(cls, *parts):
+    """検索条件から保存のキーを構築
+
+    :param parts: ベースID、テーブル名、メソッド名、リクエストパラメータ等
+    :type parts: object
+    :return: キー
+    :rtype: string
+    """
+    return json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+
+  def put(self, key, records, offset=None):
+    """検索結果を保存
+
+    :param key: キー
+    :type key: string
+    :param records: 検索結果のレコードのリスト
+    :type records: list
+    :param offset: 検索結果のページオフセット値, defaults to None
+    :type offset: string, optional
+    """
+    value = json.dumps({'records': records, 'offset': offset, 'stored_at': time.time()})
+    with self._lock:
+      if self.path:
+        self._entries[key] = value
+        return
+      self._entries[key] = value
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def get(self, key):
+    """保存した検索結果を取得
+
+    :param key: キー
+    :type key: string
+    :return: {'records': レコードのリスト, 'offset': ページオフセット値, 'stored_at': 保存時刻}(保存されていない、またはmax_ageを超えている場合はNone)
+    :rtype: dict
+    """
+    with self._lock:
+      value = self._entries.get(key)
+    if value is None:
+      return None
+    entry = json.loads(value)
+    if self.max_age is not None and time.time() - entry['stored_at'] > self.max_age:
+      return None
+    return entry
+
+  def close(self):
+    """ファイルを閉じる
+    """
+    if self.path:
+      with self._lock:
+        self._entries.close()
@@ -0,0 +1,692 @@
+# -*- coding: utf-8 -*-
+"""コマンドラインツール
+
+テーブルのレコードをファイルにエクスポート、またはファイルからインポートします。
+
+exportはページを先読みしながら、JSONL/CSV/Parquetに書き出します(全件をメモリに保持しません)。
+CSV/Parquetの列は全てのレコードのフィールドから決まるため、全ページを一時ファイルに書き出してから出力します。
+importはJSONL/CSVを読み込みながら、バッチ毎に複数のスレッドで並行して登録します。
+--stateを指定すると登録済みのバッチを記録し、中断後に再実行すると続きから登録します。
+
+  $ airtable-client export --base-id appXXX --table Tasks --output tasks.jsonl
+  $ airtable-client import --base-id appXXX --table Tasks --input tasks.csv --concurrency 4 --state tasks.state
+
+APIキーは--api-keyまたは環境変数AIRTABLE_API_KEYで指定します。
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from .airtable import AirtableClient
+from .pipeline import AirtablePipeline
+from .ratelimit import RateLimiter, RequestPriority
+from .transport import RequestsTransport
+
+_FORMATS = ('jsonl', 'csv', 'parquet')
+_IMPORT_FORMATS = ('jsonl', 'csv')
+_RECORD_COLUMNS = ['id', 'createdTime']
+_SPOOL_BATCH_RECORDS = 1000
+
+
+class _Progress(object):
+  """処理件数とスループットを標準エラー出力に表示するクラス
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, label, quiet=False, interval=1.0, stream=None):
+    """コンストラクタ
+
+    :param label: 表示する処理名
+    :type label: string
+    :param quiet: 途中経過を表示しないかどうか, defaults to False
+    :type quiet: bool, optional
+    :param interval: 途中経過を表示する間隔(秒), defaults to 1.0
+    :type interval: float, optional
+    :param stream: 表示先, defaults to None ※未指定の場合は標準エラー出力
+    :type stream: file, optional
+    """
+    self.label = label
+    self.quiet = quiet
+    self.interval = interval
+    self.stream = stream or sys.stderr
+    self.records = 0
+    self.errors = 0
+    self.started = time.time()
+    self._reported = self.started
+    pass
+
+  def add(self, records, errors=0):
+    """処理件数を加算
+
+    :param records: 処理したレコード数
+    :type records: int
+    :param errors: 失敗したレコード数, defaults to 0
+    :type errors: int, optional
+    """
+    self.records += records
+    self.errors += errors
+    now = time.time()
+    if not self.quiet and now - self._reported >= self.interval:
+      self._reported = now
+      self._print(now)
+
+  def finish(self):
+    """最終結果を表示
+    """
+    self._print(time.time())
+
+  def _print(self, now):
+    """処理件数、経過時間、スループットを表示
+
+    :param now: 現在時刻(time.time()の値)
+    :type now: float
+    """
+    elapsed = max(now - self.started, 1e-9)
+    self.stream.write('{}: {} records, {} errors, {:.1f}s, {:.1f} records/s\n'.format(
+      self.label, self.records, self.errors, elapsed, self.records / elapsed))
+    self.stream.flush()
+
+
+class _Columns(object):
+  """CSV/Parquetの列を管理するクラス
+
+  列は--fieldsの指定順、未指定の場合はエクスポートしたレコードに現れたフィールドの順に決まります。
+  Airtableは値が空のフィールドをレコードに含めないため、列は全ページを読み終えるまで確定しません。
+  列毎に値の型(bool/int/float/string/json)も記録し、Parquetの列の型に使用します。
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, fields=None):
+    """コンストラクタ
+
+    :param fields: 出力するフィールド名のリスト, defaults to None
+    :type fields: list, optional
+    """
+    self.fixed = bool(fields)
+    self.names = _RECORD_COLUMNS + list(fields or [])
+    self.kinds = {}
+    pass
+
+  @property
+  def json_names(self):
+    """JSON文字列として書き出した列名のリストのgetter
+
+    :return: 列名のリスト
+    :rtype: list
+    """
+    return [name for name in self.names if 'json' in self.kinds.get(name, ())]
+
+  def add(self, records):
+    """レコードに含まれる列と値の型を記録
+
+    :param records: レコードのリスト
+    :type records: list
+    """
+    for record in records:
+      for name, value in record.get('fields', {}).items():
+        if name not in self.kinds:
+          self.kinds[name] = set()
+          if not self.fixed and name not in self.names:
+            self.names.append(name)
+        if value is not None:
+          self.kinds[name].add(_value_kind(value))
+
+  def rows(self, records):
+    """レコードを列名 -> 値のdictに変換
+
+    リスト・dictの値(添付ファイル、リンク等)はJSON文字列に変換します。
+
+    :param records: レコードのリスト
+    :type records: list
+    :return: 行のリスト
+    :rtype: list
+    """
+    rows = []
+    for record in records:
+      row = {'id': record.get('id'), 'createdTime': record.get('createdTime')}
+      for name, value in record.get('fields', {}).items():
+        row[name] = json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+      rows.append(row)
+    return rows
+
+
+def _value_kind(value):
+  """フィールドの値の型を分類
+
+  :param value: フィールドの値
+  :type value: object
+  :return: 'bool'、'int'、'float'、'json'、'string'のいずれか
+  :rtype: string
+  """
+  if isinstance(value, bool):
+    return 'bool'
+  if isinstance(value, int):
+    return 'int'
+  if isinstance(value, float):
+    return 'float'
+  if isinstance(value, (list, dict)):
+    return 'json'
+  return 'string'
+
+
+class _ImportState(object):
+  """インポートの進捗(登録済みのバッチ)を保存するクラス
+
+  先頭から連続して登録済みの行数と、それ以降で登録済みのバッチの先頭行番号を保存します。
+  並行して登録するため、バッチは入力の順に完了するとは限りません。
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, path, batch_size):
+    """コンストラクタ
+
+    :param path: 保存先のファイルパス(Noneの場合は保存しない)
+    :type path: string
+    :param batch_size: 1バッチあたりの行数
+    :type batch_size: int
+    :raises ValueError: 保存されたバッチの行数とbatch_sizeが異なる場合に送出される
+    """
+    self.path = path
+    self.batch_size = batch_size
+    self.done = 0
+    self.completed = set()
+    if path and os.path.isfile(path):
+      with open(path, 'r') as f:
+        state = json.load(f)
+      if state['batch_size'] != batch_size:
+        raise ValueError('The state file {} was written with --batch-size {}.'.format(path, state['batch_size']))
+      self.done = state['done']
+      self.completed = set(state['completed'])
+    pass
+
+  def is_done(self, start):
+    """バッチが登録済みかどうか
+
+    :param start: バッチの先頭行番号
+    :type start: int
+    :return: 登録済みの場合はTrue
+    :rtype: bool
+    """
+    return start < self.done or start in self.completed
+
+  def mark(self, start):
+    """バッチを登録済みとして保存
+
+    :param start: バッチの先頭行番号
+    :type start: int
+    """
+    self.completed.add(start)
+    while self.done in self.completed:
+      self.completed.remove(self.done)
+      self.done += self.batch_size
+    if not self.path:
+      return
+    tmp_path = self.path + '.tmp'
+    with open(tmp_path, 'w') as f:
+      json.dump({'batch_size': self.batch_size, 'done': self.done, 'completed': sorted(self.completed)}, f)
+    os.replace(tmp_path, self.path)
+
+
+def _infer_format(path, formats, default='jsonl'):
+  """ファイルの拡張子から形式を推定
+
+  :param path: ファイルパス
+  :type path: string
+  :param formats: 対応する形式のリスト
+  :type formats: tuple
+  :param default: 推定できない場合の形式, defaults to 'jsonl'
+  :type default: string, optional
+  :return: 形式
+  :rtype: string
+  """
+  extension = os.path.splitext(path or '')[1].lstrip('.').lower()
+  if extension == 'ndjson':
+    extension = 'jsonl'
+  return extension if extension in formats else default
+
+
+def _make_client(args, rate_limiter, transport):
+  """コマンドラインの引数からクライアントを生成
+
+  :param args: コマンドラインの引数
+  :type args: argparse.Namespace
+  :param rate_limiter: クライアントで共有するレートリミッター
+  :type rate_limiter: RateLimiter
+  :param transport: クライアントで共有するトランスポート
+  :type transport: Transport
+  :raises ValueError: APIキーを指定していない場合に送出される
+  :return: Airtableクライアント
+  :rtype: AirtableClient
+  """
+  api_key = args.api_key or os.environ.get('AIRTABLE_API_KEY')
+  if not api_key:
+    raise ValueError('--api-key or the AIRTABLE_API_KEY environment variable is required.')
+  return AirtableClient(args.base_id, args.table, api_key, rate_limiter=rate_limiter, priority=RequestPriority.BULK,
+                        max_records_per_request=getattr(args, 'batch_size', None), timeout=args.timeout, transport=transport)
+
+
+def _open_text(path, mode):
+  """テキストファイルを開く('-'の場合は標準入出力)
+
+  :param path: ファイルパス
+  :type path: string
+  :param mode: 'r'または'w'
+  :type mode: string
+  :return: ファイルオブジェクト
+  :rtype: file
+  """
+  if path == '-':
+    return sys.stdin if mode == 'r' else sys.stdout
+  return open(path, mode, encoding='utf-8', newline='')
+
+
+def _iter_records(pages, progress, columns):
+  """ページ毎のレコードのリストを返却し、進捗と列を記録（ジェネレーター）
+
+  :param pages: 1ページ分の検索結果のイテラブル
+  :type pages: object
+  :param progress: 進捗
+  :type progress: _Progress
+  :param columns: 列
+  :type columns: _Columns
+  :yield: 1ページ分のレコードのリスト
+  :rtype: list
+  """
+  for page in pages:
+    columns.add(page.records)
+    progress.add(len(page.records))
+    yield page.records
+
+
+def _spool_records(batches, spool):
+  """全てのレコードを一時ファイルに書き出し、書き出したレコードを読み直すイテレーターを返却
+
+  全ページを読み終えて列が確定するまで、レコードをメモリに保持しないように一時ファイルを経由します。
+
+  :param batches: レコードのリストのイテラブル
+  :type batches: object
+  :param spool: 一時ファイル(テキストモードで読み書きできること)
+  :type spool: file
+  :return: レコードのリストのイテレーター
+  :rtype: object
+  """
+  for records in batches:
+    for record in records:
+      spool.write(json.dumps(record, ensure_ascii=False))
+      spool.write('\n')
+  spool.seek(0)
+  return _read_spool(spool)
+
+
+def _read_spool(spool):
+  """一時ファイルのレコードを_SPOOL_BATCH_RECORDS件ずつ読み込み（ジェネレーター）
+
+  :param spool: 一時ファイル
+  :type spool: file
+  :yield: レコードのリスト
+  :rtype: list
+  """
+  records = (json.loads(line) for line in spool)
+  while True:
+    batch = list(itertools.islice(records, _SPOOL_BATCH_RECORDS))
+    if not batch:
+      return
+    yield batch
+
+
+def _export_jsonl(batches, f):
+  """レコードを1行1件のJSONとして書き出す
+
+  :param batches: レコードのリストのイテラブル
+  :type batches: object
+  :param f: 出力先のファイル
+  :type f: file
+  """
+  for records in batches:
+    for record in records:
+      f.write(json.dumps(record, ensure_ascii=False))
+      f.write('\n')
+
+
+def _export_csv(batches, f, columns):
+  """レコードをCSVの行として書き出す
+
+  :param batches: レコードのリストのイテラブル
+  :type batches: object
+  :param f: 出力先のファイル
+  :type f: file
+  :param columns: 出力する列(確定していること)
+  :type columns: _Columns
+  """
+  writer = csv.DictWriter(f, fieldnames=columns.names)
+  writer.writeheader()
+  for records in batches:
+    writer.writerows(columns.rows(records))
+
+
+def _import_pyarrow():
+  """pyarrowをインポート
+
+  :raises ImportError: pyarrowがインストールされていない場合に送出される
+  :return: pyarrowモジュール
+  :rtype: module
+  """
+  try:
+    import pyarrow
+    import pyarrow.parquet
+  except ImportError:
+    raise ImportError('Parquet export requires pyarrow. Please install it with "pip install airtable_client[parquet]".')
+  return pyarrow
+
+
+def _export_parquet(batches, path, columns):
+  """レコードをParquetのrow groupとして書き出す
+
+  列の型は全てのレコードの値の型から決めます(columns.kindsが記録済みであること)。
+  整数のみの列はint64、整数と小数が混在する列はfloat64、真偽値のみの列はboolとし、
+  それ以外(値がない列、型が混在する列、JSON文字列の列)は文字列の列として値を文字列に変換します。
+
+  :param batches: レコードのリストのイテラブル
+  :type batches: object
+  :param path: 出力先のファイルパス
+  :type path: string
+  :param columns: 出力する列(確定していること)
+  :type columns: _Columns
+  :raises ImportError: pyarrowがインストールされていない場合に送出される
+  """
+  pyarrow = _import_pyarrow()
+
+  def column_type(kinds):
+    if kinds == {'bool'}:
+      return pyarrow.bool_()
+    if kinds == {'int'}:
+      return pyarrow.int64()
+    if kinds and kinds <= {'int', 'float'}:
+      return pyarrow.float64()
+    return pyarrow.string()
+
+  schema = pyarrow.schema([(name, column_type(columns.kinds.get(name, set()))) for name in columns.names])
+  float_columns = [field.name for field in schema if pyarrow.types.is_float64(field.type)]
+  string_columns = [field.name for field in schema if pyarrow.types.is_string(field.type)]
+  writer = pyarrow.parquet.ParquetWriter(path, schema)
+  try:
+    for records in batches:
+      rows = columns.rows(records)
+      for row in rows:
+        for name in float_columns:
+          if row.get(name) is not None:
+            row[name] = float(row[name])
+        for name in string_columns:
+          value = row.get(name)
+          if value is not None and not isinstance(value, str):
+            row[name] = str(value)
+      writer.write_table(pyarrow.Table.from_pylist(rows, schema=schema))
+  finally:
+    writer.close()
+
+
+def run_export(args):
+  """テーブルのレコードをファイルにエクスポート
+
+  CSVで--fieldsを指定しない場合とParquetの場合は、列(と型)を確定するために全てのレコードを一時ファイルに書き出してから出力します。
+
+  :param args: コマンドラインの引数
+  :type args: argparse.Namespace
+  :return: 終了コード
+  :rtype: int
+  """
+  output_format = args.format or _infer_format(args.output, _FORMATS)
+  if output_format == 'parquet':
+    if args.output == '-':
+      raise ValueError('Parquet cannot be written to stdout. Please specify --output.')
+    _import_pyarrow()
+  client = _make_client(args, RateLimiter(rate=args.rate, key=args.base_id), None)
+  pages = client.iter_pages(formula=args.formula, fields=args.fields, view=args.view, prefetch=args.prefetch)
+  progress = _Progress('export', quiet=args.quiet)
+  columns = _Columns(args.fields)
+  batches = _iter_records(pages, progress, columns)
+  with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+    if output_format == 'parquet' or (output_format == 'csv' and not columns.fixed):
+      batches = _spool_records(batches, spool)
+    if output_format == 'parquet':
+      _export_parquet(batches, args.output, columns)
+    else:
+      f = _open_text(args.output, 'w')
+      try:
+        if output_format == 'csv':
+          _export_csv(batches, f, columns)
+        else:
+          _export_jsonl(batches, f)
+      finally:
+        if f is sys.stdout:
+          f.flush()
+        else:
+          f.close()
+  progress.finish()
+  if output_format == 'csv' and columns.json_names:
+    sys.stderr.write('export: columns holding JSON values (pass them to import --json-fields): {}\n'.format(' '.join(columns.json_names)))
+  return 0
+
+
+def _read_rows(f, input_format, json_fields=()):
+  """入力ファイルから登録するフィールドを読み込み（ジェネレーター）
+
+  JSONLの各行はフィールドのdict、またはexportの出力と同じ{'fields': {...}}の形式です。
+  CSVの空欄は未入力として扱い、id/createdTime列は登録しません。
+  CSVのjson_fieldsの列のセル(exportがリスト・dictの値を書き出したもの)はJSONとして元の値に戻します。
+  添付ファイルはURLとファイル名のみを登録します。
+
+  :param f: 入力ファイル
+  :type f: file
+  :param input_format: 'jsonl'または'csv'
+  :type input_format: string
+  :param json_fields: CSVでJSONとして読み込む列名のリスト, defaults to ()
+  :type json_fields: list, optional
+  :yield: レコードのフィールド
+  :rtype: dict
+  """
+  from .migration import AirtableTableCopier
+  if input_format == 'csv':
+    json_fields = set(json_fields or ())
+    for row in csv.DictReader(f):
+      yield {name: AirtableTableCopier._copy_value(_decode_cell(value) if name in json_fields else value)
+             for name, value in row.items() if name not in _RECORD_COLUMNS and value != ''}
+    return
+  for line in f:
+    line = line.strip()
+    if not line:
+      continue
+    row = json.loads(line)
+    fields = row['fields'] if isinstance(row.get('fields'), dict) else row
+    yield {name: AirtableTableCopier._copy_value(value) for name, value in fields.items()}
+
+
+def _decode_cell(value):
+  """JSONの列のセルを元の値に戻す
+
+  JSONとして読み込めないセルはそのまま登録します(フィールドの型と合わない場合はAirtableがエラーとして返却します)。
+
+  :param value: セルの値
+  :type value: string
+  :return: 読み込んだ値、またはセルの値
+  :rtype: object
+  """
+  try:
+    return json.loads(value)
+  except ValueError:
+    return value
+
+
+def run_import(args):
+  """ファイルのレコードをテーブルにインポート
+
+  batch_size行毎のバッチをconcurrency個のスレッドで並行して登録します。
+  同時に処理するバッチ数には上限があるため、ファイルの読み込みは登録に合わせて待機します。
+
+  :param args: コマンドラインの引数
+  :type args: argparse.Namespace
+  :return: 終了コード(失敗したレコードがある場合は1)
+  :rtype: int
+  """
+  if not 1 <= args.batch_size <= AirtableClient._MAX_RECORDS_PER_REQUEST:
+    raise ValueError('--batch-size must be between 1 and {}.'.format(AirtableClient._MAX_RECORDS_PER_REQUEST))
+  input_format = args.format or _infer_format(args.input, _IMPORT_FORMATS)
+  state = _ImportState(args.state, args.batch_size)
+  rate_limiter = RateLimiter(rate=args.rate, key=args.base_id)
+  transport = RequestsTransport()
+  _make_client(args, rate_limiter, transport)
+  local = threading.local()
+
+  def insert(batch):
+    if not hasattr(local, 'client'):
+      local.client = _make_client(args, rate_limiter, transport)
+    start, rows = batch
+    try:
+      return start, rows, local.client.bulk_insert(rows, typecast=args.typecast)
+    except Exception as exc:
+      return start, rows, exc
+
+  f = _open_text(args.input, 'r')
+  errors = _open_text(args.errors, 'w') if args.errors else sys.stderr
+  progress = _Progress('import', quiet=args.quiet)
+  skipped = []
+  stopped = threading.Event()
+  try:
+    batches = _iter_batches(_read_rows(f, input_format, args.json_fields), state, skipped, stopped)
+    pipeline = AirtablePipeline(insert, workers=args.concurrency, ordered=False)
+    for start, rows, r in pipeline.map(batches):
+      if isinstance(r, Exception):
+        # 実行中のバッチの結果は保存するため、新しいバッチの読み込みのみを止める
+        stopped.set()
+        errors.write(json.dumps({'row': start, 'rows': len(rows), 'error': str(r)}, ensure_ascii=False))
+        errors.write('\n')
+        progress.add(0, len(rows))
+        continue
+      failed = 0
+      complete = True
+      for error in r.errors:
+        if isinstance(error, dict) and 'index' in error:
+          failed += 1
+          error = dict(error, row=start + error['index'])
+        else:
+          complete = False
+          failed = len(rows)
+          error = {'row': start, 'rows': len(rows), 'error': error}
+        errors.write(json.dumps(error, ensure_ascii=False))
+        errors.write('\n')
+      if complete:
+        state.mark(start)
+      progress.add(len(rows) - failed, failed)
+  finally:
+    if f is not sys.stdin:
+      f.close()
+    if errors is not sys.stderr and errors is not sys.stdout:
+      errors.close()
+  progress.finish()
+  if skipped:
+    sys.stderr.write('import: {} rows already imported were skipped\n'.format(sum(skipped)))
+  if stopped.is_set():
+    sys.stderr.write('import: stopped after a request error; rerun with the same --state to resume\n')
+  return 1 if progress.errors else 0
+
+
+def _iter_batches(rows, state, skipped, stopped):
+  """入力の行をバッチに分割し、登録済みのバッチを除いて返却（ジェネレーター）
+
+  stoppedがセットされると、以降のバッチは返却しません。
+
+  :param rows: 入力の行のイテラブル
+  :type rows: object
+  :param state: インポートの進捗
+  :type state: _ImportState
+  :param skipped: 除いたバッチの行数を追加するリスト
+  :type skipped: list
+  :param stopped: 読み込みを止めるイベント
+  :type stopped: threading.Event
+  :yield: (バッチの先頭行番号, 行のリスト)
+  :rtype: tuple
+  """
+  rows = iter(rows)
+  for start in itertools.count(0, state.batch_size):
+    if stopped.is_set():
+      return
+    batch = list(itertools.islice(rows, state.batch_size))
+    if not batch:
+      return
+    if state.is_done(start):
+      skipped.append(len(batch))
+      continue
+    yield start, batch
+
+
+def _build_parser():
+  """コマンドラインの引数のパーサーを構築
+
+  :return: パーサー
+  :rtype: argparse.ArgumentParser
+  """
+  common = argparse.ArgumentParser(add_help=False)
+  common.add_argument('--base-id', required=True, help='Airtable base id')
+  common.add_argument('--table', required=True, help='table name')
+  common.add_argument('--api-key', help='API key (defaults to the AIRTABLE_API_KEY environment variable)')
+  common.add_argument('--rate', type=float, default=5, help='maximum requests per second to the base (default: 5)')
+  common.add_argument('--timeout', type=float, help='HTTP timeout in seconds')
+  common.add_argument('--quiet', action='store_true', help='print only the final summary')
+
+  parser = argparse.ArgumentParser(prog='airtable-client', description='Bulk export and import of Airtable records.')
+  commands = parser.add_subparsers(dest='command')
+  commands.required = True
+
+  export = commands.add_parser('export', parents=[common], help='export records to JSONL, CSV or Parquet')
+  export.add_argument('--output', default='-', help="output file ('-' for stdout, the default)")
+  export.add_argument('--format', choices=_FORMATS, help='output format (inferred from the file extension, defaults to jsonl)')
+  export.add_argument('--fields', nargs='+', help='fields to export (also the CSV/Parquet column order)')
+  export.add_argument('--formula', help='filterByFormula')
+  export.add_argument('--view', help='view name')
+  export.add_argument('--prefetch', type=int, default=2, help='pages read ahead while writing (default: 2)')
+  export.set_defaults(func=run_export)
+
+  load = commands.add_parser('import', parents=[common], help='import records from JSONL or CSV')
+  load.add_argument('--input', default='-', help="input file ('-' for stdin, the default)")
+  load.add_argument('--format', choices=_IMPORT_FORMATS, help='input format (inferred from the file extension, defaults to jsonl)')
+  load.add_argument('--batch-size', type=int, default=AirtableClient._MAX_RECORDS_PER_REQUEST, help='records per request (default: 10)')
+  load.add_argument('--concurrency', type=int, default=4, help='batches in flight (default: 4)')
+  load.add_argument('--state', help='file recording imported batches; rerunning with it resumes the import')
+  load.add_argument('--errors', help='file receiving failed records as JSONL (defaults to stderr)')
+  load.add_argument('--json-fields', nargs='+', help='CSV columns holding JSON values (lists and objects written by export)')
+  load.add_argument('--typecast', action='store_true', help='let Airtable convert string values (e.g. CSV cells) to the field types')
+  load.set_defaults(func=run_import)
+  return parser
+
+
+def main(argv=None):
+  """コマンドラインツールのエントリーポイント
+
+  :param argv: コマンドラインの引数, defaults to None ※未指定の場合はsys.argv
+  :type argv: list, optional
+  :return: 終了コード
+  :rtype: int
+  """
+  parser = _build_parser()
+  args = parser.parse_args(argv)
+  try:
+    return args.func(args)
+  except (ValueError, ImportError, OSError) as exc:
+    sys.stderr.write('{}: error: {}\n'.format(parser.prog, exc))
+    return 2
+  except KeyboardInterrupt:
+    sys.stderr.write('{}: interrupted\n'.format(parser.prog))
+    return 130
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Airtableクライアントの例外
+"""
+
+
+class AirtableDeadlineExceeded(TimeoutError):
+  """処理時間の上限(deadline)を超過した場合に送出される例外
+
+  残り時間で次のリクエストを送信できない場合にも、送信せずに送出されます。
+
+  :param TimeoutError: TimeoutErrorを継承
+  :type TimeoutError: TimeoutError
+  """
+  pass
+
+
+class AirtableReplayError(LookupError):
+  """再生用のファイルに記録されていないリクエストを送信した場合に送出される例外
+
+  :param LookupError: LookupErrorを継承
+  :type LookupError: LookupError
+  """
+  pass
+
+
+class AirtableCircuitOpen(ConnectionError):
+  """サーキットブレーカーがOPENのため、リクエストを送信せずに失敗させた場合に送出される例外
+
+  :param ConnectionError: ConnectionErrorを継承
+  :type ConnectionError: ConnectionError
+  """
+  def __init__(self, message, retry_after=None):
+    """コンストラクタ
+
+    :param message: エラーメッセージ
+    :type message: string
+    :param retry_after: 試行リクエストを送信できるまでの秒数, defaults to None
+    :type retry_after: float, optional
+    """
+    super(AirtableCircuitOpen, self).__init__(message)
+    self.retry_after = retry_after
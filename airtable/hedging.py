@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""ヘッジリクエスト
+
+冪等なGETリクエストの応答が遅い場合に、同じリクエストをもう1つ送信して先に返ってきた応答を採用します。
+2つ目のリクエストを送信するまでの待ち時間は、直近のレイテンシの分位点から決定します。
+少量のリクエスト枠と引き換えに、レイテンシのばらつき(p99等)を抑えることができます。
+"""
+import collections
+import math
+import threading
+
+
+class HedgePolicy(object):
+  """ヘッジリクエストの設定クラス
+
+  直近のGETリクエストのレイテンシを記録し、percentileの分位点を2つ目のリクエストを送信するまでの待ち時間とします。
+  記録がmin_samples件に満たない間はdefault_delayを使用します。
+
+  >>> client = AirtableClient('XXX', 'XXX', 'XXX', hedge=HedgePolicy(percentile=95))
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, percentile=95, min_delay=0.05, default_delay=1.0, min_samples=20, window=200):
+    """コンストラクタ
+
+    :param percentile: 待ち時間とするレイテンシの分位点(0〜100), defaults to 95
+    :type percentile: float, optional
+    :param min_delay: 待ち時間の下限(秒), defaults to 0.05
+    :type min_delay: float, optional
+    :param default_delay: 記録が不足している間の待ち時間(秒), defaults to 1.0
+    :type default_delay: float, optional
+    :param min_samples: 分位点を計算するのに必要な記録件数, defaults to 20
+    :type min_samples: int, optional
+    :param window: 記録する直近のレイテンシの件数, defaults to 200
+    :type window: int, optional
+    """
+    self.percentile = percentile
+    self.min_delay = min_delay
+    self.default_delay = default_delay
+    self.min_samples = min_samples
+    self._latencies = collections.deque(maxlen=window)
+    self._lock = threading.Lock()
+    pass
+
+  def record(self, latency):
+    """レイテンシを記録
+
+    :param latency: レイテンシ(秒)
+    :type latency: float
+    """
+    with self._lock:
+      self._latencies.append(latency)
+
+  def delay(self):
+    """2つ目のリクエストを送信するまでの待ち時間を取得
+
+    :return: 待ち時間(秒)
+    :rtype: float
+    """
+    with self._lock:
+      latencies = sorted(self._latencies)
+    if len(latencies) < self.min_samples:
+      return self.default_delay
+    index = min(len(latencies) - 1, int(math.ceil(len(latencies) * self.percentile / 100.0)) - 1)
+    return max(self.min_delay, latencies[max(0, index)])
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""検索のバッチ化
+
+短い時間内に発行されたfind/find_byをまとめて、OR(...)の条件式による1回の検索に変換します。
+レコード毎に検索するN+1パターンを、1〜数回のリクエストに削減できます。
+"""
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from .airtable import AirtableResponse
+
+
+class AirtableLoader(object):
+  """find/find_byをまとめて検索するローダークラス
+
+  window秒以内に発行された検索をフィールド毎にまとめ、OR(...)の条件式で検索します。
+  条件式がmax_formula_lengthを超える場合は複数の検索に分割します。
+  検索結果は検索値毎に振り分けられ、各呼び出し元に返却されます。
+
+  複数のスレッドから呼び出す場合は、find/find_byをそのまま使用できます。
+
+  同じ検索値の結果は最大cache_size件まで再利用し、古いものから破棄します(cache_ttlを指定した場合は期限切れのものも破棄します)。
+  失敗した検索の結果は再利用しないため、同じ検索値で再度検索できます。
+
+  >>> loader = AirtableLoader(client)
+  >>> loader.find_by('Email', 'foo@example.com').get()
+
+  1つのスレッドでまとめて検索する場合は、load/load_byでFutureを取得してからdispatchを呼び出します。
+
+  >>> futures = [loader.load_by('Email', email) for email in emails]
+  >>> loader.dispatch()
+  >>> records = [future.result().get() for future in futures]
+
+  :param object: objectを継承
+  :type object: object
+  """
+  _RECORD_ID = None
+  _MAX_FORMULA_LENGTH = 20000  # 長い条件式はAirtableClientがPOSTのlistRecordsで検索する
+
+  def __init__(self, client, window=0.005, fields=None, view=None, max_formula_length=None, cache=True, cache_size=1024, cache_ttl=None):
+    """コンストラクタ
+
+    :param client: 検索に使用するAirtableクライアント
+    :type client: AirtableClient
+    :param window: 検索をまとめる時間(秒), defaults to 0.005
+    :type window: float, optional
+    :param fields: レスポンスに含めるフィールド名のリスト, defaults to None
+    :type fields: list, optional
+    :param view: 検索対象のビュー名, defaults to None
+    :type view: string, optional
+    :param max_formula_length: 1回の検索の条件式の最大文字数, defaults to None ※未指定の場合は_MAX_FORMULA_LENGTH
+    :type max_formula_length: int, optional
+    :param cache: 同じ検索値の結果を再利用するかどうか, defaults to True
+    :type cache: bool, optional
+    :param cache_size: 再利用する検索結果の件数の上限, defaults to 1024
+    :type cache_size: int, optional
+    :param cache_ttl: 検索結果を再利用する秒数, defaults to None ※未指定の場合は無期限
+    :type cache_ttl: float, optional
+    """
+    self.client = client
+    self.window = window
+    self.fields = fields
+    self.view = view
+    self.max_formula_length = max_formula_length or self._MAX_FORMULA_LENGTH
+    self.cache = cache
+    self.cache_size = cache_size
+    self.cache_ttl = cache_ttl
+    self._pending = {}
+    self._futures = collections.OrderedDict()
+    self._timer = None
+    self._lock = threading.Lock()
+    pass
+
+  def load(self, id):
+    """レコードIDによる検索を予約
+
+    :param id: 検索対象のレコードID
+    :type id: string
+    :return: 検索結果(AirtableResponse)のFuture
+    :rtype: concurrent.futures.Future
+    """
+    return self.load_by(self._RECORD_ID, id)
+
+  def load_by(self, field, value):
+    """対象フィールドの値による検索を予約
+
+    :param field: 検索対象のフィールド名
+    :type field: string
+    :param value: 検索対象のフィールド値
+    :type value: string
+    :return: 検索結果(AirtableResponse)のFuture
+    :rtype: concurrent.futures.Future
+    """
+    key = (field, str(value))
+    with self._lock:
+      if self.cache:
+        future = self._get_cached(key)
+        if future is not None:
+          return future
+      future = Future()
+      if self.cache:
+        self._futures[key] = (future, time.monotonic())
+        while len(self._futures) > self.cache_size:
+          self._futures.popitem(last=False)
+      self._pending.setdefault(field, {}).setdefault(key[1], []).append(future)
+      if self._timer is None:
+        self._timer = threading.Timer(self.window, self.dispatch)
+        self._timer.daemon = True
+        self._timer.start()
+    return future
+
+  def _get_cached(self, key):
+    """ロックを取得した状態で再利用する検索結果を取得
+
+    :param key: (フィールド名, 検索値)
+    :type key: tuple
+    :return: 検索結果のFuture(再利用できない場合はNone)
+    :rtype: concurrent.futures.Future
+    """
+    entry = self._futures.get(key)
+    if entry is None:
+      return None
+    future, stored_at = entry
+    if self.cache_ttl is not None and time.monotonic() - stored_at > self.cache_ttl:
+      del self._futures[key]
+      return None
+    self._futures.move_to_end(key)
+    return future
+
+  def _forget(self, field, values, futures_by_value):
+    """失敗した検索の結果を再利用しないように破棄
+
+    :param field: フィールド名(Noneの場合はレコードID)
+    :type field: string
+    :param values: 検索値のリスト
+    :type values: list
+    :param futures_by_value: 検索値 -> Futureのリスト
+    :type futures_by_value: dict
+    """
+    with self._lock:
+      for value in values:
+        entry = self._futures.get((field, value))
+        if entry is not None and entry[0] in futures_by_value[value]:
+          del self._futures[(field, value)]
+
+  def find(self, id):
+    """レコードIDで検索（1件取得）
+
+    :param id: 検索対象のレコードID
+    :type id: string
+    :return: 検索結果
+    :rtype: AirtableResponse
+    """
+    return self.load(id).result()
+
+  def find_by(self, field, value):
+    """対象フィールドの値に一致するレコードを検索（先頭の1件取得）
+
+    :param field: 検索対象のフィールド名
+    :type field: string
+    :param value: 検索対象のフィールド値
+    :type value: string
+    :return: 検索結果
+    :rtype: AirtableResponse
+    """
+    return self.load_by(field, value).result()
+
+  def clear(self):
+    """再利用する検索結果を破棄
+    """
+    with self._lock:
+      self._futures = collections.OrderedDict()
+
+  def invalidate(self, ids, negative=True):
+    """変更されたレコードに関係する検索結果のみを破棄
+
+    以下の検索結果を破棄します。
+
+    - 変更されたレコードのレコードIDによる検索結果
+    - 変更されたレコードを含む検索結果
+    - 実行中の検索結果(変更前の結果の可能性があるため)
+    - negativeがTrueの場合は、該当なしの検索結果(登録・更新により一致するレコードができた可能性があるため)
+
+    :param ids: 登録・更新・削除されたレコードIDのイテラブル
+    :type ids: list
+    :param negative: 該当なしの検索結果も破棄するかどうか, defaults to True
+    :type negative: bool, optional
+    """
+    ids = set(ids)
+    if not ids:
+      return
+    with self._lock:
+      for key, (future, _) in list(self._futures.items()):
+        field, value = key
+        if field is self._RECORD_ID and value in ids:
+          stale = True
+        elif not future.done() or future.exception() is not None:
+          stale = True
+        else:
+          records = future.result().records
+          stale = any(record['id'] in ids for record in records) or (negative and not records)
+        if stale:
+          del self._futures[key]
+
+  def dispatch(self):
+    """予約されている検索をまとめて実行
+    """
+    with self._lock:
+      pending = self._pending
+      self._pending = {}
+      if self._timer is not None:
+        self._timer.cancel()
+        self._timer = None
+
+    for field, futures_by_value in pending.items():
+      for values in self._split_values(field, list(futures_by_value)):
+        self._dispatch_values(field, values, futures_by_value)
+
+  def _make_condition(self, field, value):
+    """検索値1つ分の条件式を構築
+
+    :param field: フィールド名(Noneの場合はレコードID)
+    :type field: string
+    :param value: 検索値
+    :type value: string
+    :return: 条件式
+    :rtype: string
+    """
+    if field is self._RECORD_ID:
+      return 'RECORD_ID()="' + value + '"'
+    return self.client._make_single_condition(field, value)
+
+  def _make_formula(self, field, values):
+    """複数の検索値をOR(...)でまとめた条件式を構築
+
+    :param field: フィールド名(Noneの場合はレコードID)
+    :type field: string
+    :param values: 検索値のリスト
+    :type values: list
+    :return: 条件式
+    :rtype: string
+    """
+    return 'OR(' + ','.join(self._make_condition(field, value) for value in values) + ')'
+
+  def _split_values(self, field, values):
+    """条件式がmax_formula_lengthを超えないように検索値を分割
+
+    :param field: フィールド名(Noneの場合はレコードID)
+    :type field: string
+    :param values: 検索値のリスト
+    :type values: list
+    :yield: 1回の検索で使用する検索値のリスト
+    :rtype: list
+    """
+    chunk = []
+    length = len('OR()')
+    for value in values:
+      condition_length = len(self._make_condition(field, value)) + 1
+      if chunk and length + condition_length > self.max_formula_length:
+        yield chunk
+        chunk = []
+        length = len('OR()')
+      chunk.append(value)
+      length += condition_length
+    if chunk:
+      yield chunk
+
+  def _dispatch_values(self, field, values, futures_by_value):
+    """検索値をまとめて検索し、結果を各Futureに振り分け
+
+    検索が失敗した場合(例外、またはエラーを含むレスポンス)は、結果を再利用しないように破棄します。
+
+    :param field: フィールド名(Noneの場合はレコードID)
+    :type field: string
+    :param values: 検索値のリスト
+    :type values: list
+    :param futures_by_value: 検索値 -> Futureのリスト
+    :type futures_by_value: dict
+    """
+    fields = self.fields
+    if fields and field is not self._RECORD_ID and field not in fields:
+      fields = list(fields) + [field]
+
+    try:
+      r = self.client.get_all(formula=self._make_formula(field, values), fields=fields, view=self.view)
+    except Exception as exc:
+      self._forget(field, values, futures_by_value)
+      for value in values:
+        for future in futures_by_value[value]:
+          future.set_exception(exc)
+      return
+    if r.errors:
+      self._forget(field, values, futures_by_value)
+
+    matches = {}
+    for record in r.records:
+      if field is self._RECORD_ID:
+        key = record['id']
+      else:
+        key = str(record.get('fields', {}).get(field))
+      matches.setdefault(key, record)
+
+    for value in values:
+      record = matches.get(value)
+      response = AirtableResponse(records=[record] if record else [], errors=r.errors)
+      for future in futures_by_value[value]:
+        future.set_result(response)
@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""テーブルのコピー
+
+テーブルのレコードを別のベース(または同じベース)のテーブルにコピーします。
+
+1回目の走査では、コピー元をページ単位で先読みしながら、リンクフィールドを除いたレコードをコピー先に一括登録します。
+コピー元とコピー先はベース毎のレート制限を持つため、読み込みと書き込みは並行して進みます。
+登録したレコードのID(コピー元 -> コピー先)はIDマップに保存します。
+2回目の走査では、リンクフィールドのレコードIDをIDマップで置き換えてコピー先を一括更新します。
+
+IDマップをファイルに保存した場合、中断後に再実行するとコピー済みのレコードはスキップされます。
+IDマップはバッチを登録する度に書き出します。登録とIDマップへの書き出しの間で中断した場合に備えて、
+source_id_fieldを指定するとコピー先のフィールドにコピー元のレコードIDを保存し、再実行時にIDマップを復元します。
+リンクを更新したレコードもIDマップに記録し、再実行時には更新しません。
+"""
+import itertools
+
+
+class AirtableIdMap(object):
+  """コピー元 -> コピー先のレコードIDの対応表クラス
+
+  pathを指定した場合はdbmでファイルに保存するため、レコード数が多くてもメモリに保持しません。
+  pathを指定しない場合はメモリ上のdictに保持します。
+  リンクの更新が完了したコピー元のレコードID(pathを指定した場合は path + '.linked' のファイル)も保持します。
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, path=None):
+    """コンストラクタ
+
+    :param path: 保存先のファイルパス(既存の場合は続きから使用), defaults to None
+    :type path: string, optional
+    """
+    self.path = path
+    if path:
+      import dbm
+      self._map = dbm.open(path, 'c')
+      self._linked = dbm.open(path + '.linked', 'c')
+    else:
+      self._map = {}
+      self._linked = {}
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def __contains__(self, source_id):
+    return source_id in self._map
+
+  def __len__(self):
+    return len(self._map)
+
+  def __setitem__(self, source_id, destination_id):
+    self._map[source_id] = destination_id
+
+  def get(self, source_id, default=None):
+    """コピー先のレコードIDを取得
+
+    :param source_id: コピー元のレコードID
+    :type source_id: string
+    :param default: 対応するIDがない場合の値, defaults to None
+    :type default: object, optional
+    :return: コピー先のレコードID
+    :rtype: string
+    """
+    value = self._map.get(source_id)
+    if value is None:
+      return default
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+  def is_linked(self, source_id):
+    """リンクの更新が完了しているかどうか
+
+    :param source_id: コピー元のレコードID
+    :type source_id: string
+    :return: 完了している場合はTrue
+    :rtype: bool
+    """
+    return source_id in self._linked
+
+  def mark_linked(self, source_id):
+    """リンクの更新の完了を記録
+
+    :param source_id: コピー元のレコードID
+    :type source_id: string
+    """
+    self._linked[source_id] = '1'
+
+  def flush(self):
+    """ファイルに書き出す
+    """
+    for entries in (self._map, self._linked):
+      sync = getattr(entries, 'sync', None)
+      if sync is not None:
+        sync()
+
+  def close(self):
+    """ファイルを閉じる
+    """
+    if self.path:
+      self._map.close()
+      self._linked.close()
+
+
+class AirtableTableCopier(object):
+  """テーブルのコピークラス
+
+  >>> source = AirtableClientFactory(base_id='appSRC', api_key='XXX').create('Tasks')
+  >>> destination = AirtableClientFactory(base_id='appDST', api_key='XXX').create('Tasks')
+  >>> copier = AirtableTableCopier(source, destination, link_fields=['Parent'], id_map='tasks.idmap', source_id_field='Source ID')
+  >>> copier.run()
+  {'copied': 1200, 'skipped': 0, 'recovered': 0, 'linked': 310, 'unmapped_links': 0, 'errors': []}
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, source, destination, fields=None, exclude=None, link_fields=None, id_map=None, transform=None, formula=None, view=None, prefetch=2, source_id_field=None):
+    """コンストラクタ
+
+    link_fieldsにはリスト(テーブル内へのリンク)、またはフィールド名 -> リンク先テーブルのAirtableIdMapのdictを指定します。
+    dictの値がNoneのフィールドはテーブル内へのリンクとして扱います。
+
+    :param source: コピー元のクライアント
+    :type source: AirtableClient
+    :param destination: コピー先のクライアント
+    :type destination: AirtableClient
+    :param fields: コピーするフィールド名のリスト, defaults to None ※未指定の場合は全フィールド
+    :type fields: list, optional
+    :param exclude: コピーしないフィールド名のリスト(数式・ロールアップ等の計算フィールド), defaults to None
+    :type exclude: list, optional
+    :param link_fields: リンクフィールドの設定, defaults to None
+    :type link_fields: list|dict, optional
+    :param id_map: このテーブルのIDマップ(またはその保存先のファイルパス), defaults to None
+    :type id_map: AirtableIdMap|string, optional
+    :param transform: 登録前にフィールドを変換する関数, defaults to None
+    :type transform: function, optional
+    :param formula: コピー対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param view: コピー対象とするビュー名, defaults to None
+    :type view: string, optional
+    :param prefetch: コピー元から先読みするページ数, defaults to 2
+    :type prefetch: int, optional
+    :param source_id_field: コピー元のレコードIDを保存するコピー先のテキストフィールド名, defaults to None
+    :type source_id_field: string, optional
+    """
+    self.source = source
+    self.destination = destination
+    self.fields = fields
+    self.exclude = set(exclude or [])
+    if isinstance(link_fields, dict):
+      self.link_fields = dict(link_fields)
+    else:
+      self.link_fields = {field: None for field in (link_fields or [])}
+    self._owns_id_map = not isinstance(id_map, AirtableIdMap)
+    self.id_map = AirtableIdMap(id_map) if self._owns_id_map else id_map
+    self.transform = transform
+    self.formula = formula
+    self.view = view
+    self.prefetch = prefetch
+    self.source_id_field = source_id_field
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def close(self):
+    """コンストラクタでファイルパスを指定して開いたIDマップを閉じる
+    """
+    if self._owns_id_map:
+      self.id_map.close()
+
+  @classmethod
+  def _copy_value(cls, value):
+    """フィールドの値を登録用の値に変換
+
+    添付ファイルはURLとファイル名のみを指定して登録します(コピー先でファイルが再取得されます)。
+
+    :param value: フィールドの値
+    :type value: object
+    :return: 登録用の値
+    :rtype: object
+    """
+    from .attachments import AirtableAttachmentDownloader
+    if AirtableAttachmentDownloader._is_attachment(value):
+      return [{'url': item['url'], 'filename': item.get('filename')} for item in value]
+    return value
+
+  def _copy_fields(self, record):
+    """コピー元のレコードから登録するフィールドを取得
+
+    :param record: コピー元のレコード
+    :type record: dict
+    :return: 登録するフィールド
+    :rtype: dict
+    """
+    fields = {}
+    for name, value in record.get('fields', {}).items():
+      if name in self.exclude or name in self.link_fields:
+        continue
+      fields[name] = self._copy_value(value)
+    if self.transform:
+      fields = self.transform(fields)
+    if self.source_id_field:
+      fields[self.source_id_field] = record['id']
+    return fields
+
+  def _iter_source(self, fields=None):
+    """コピー元のレコードを先読みしながら取得
+
+    :param fields: 取得するフィールド名のリスト, defaults to None
+    :type fields: list, optional
+    :yield: レコード
+    :rtype: dict
+    """
+    pages = self.source.iter_pages(formula=self.formula, fields=fields, view=self.view, prefetch=self.prefetch)
+    for page in pages:
+      for record in page.records:
+        yield record
+
+  @classmethod
+  def _chunk(cls, iterable, size):
+    """イテラブルをsize件ずつに分割
+
+    :param iterable: イテラブル
+    :type iterable: object
+    :param size: 件数
+    :type size: int
+    :yield: size件以下のリスト
+    :rtype: list
+    """
+    iterator = iter(iterable)
+    while True:
+      chunk = list(itertools.islice(iterator, size))
+      if not chunk:
+        return
+      yield chunk
+
+  def _recover_ids(self, result):
+    """コピー先のsource_id_fieldから、IDマップにないコピー済みのレコードを復元
+
+    登録した後、IDマップに書き出す前に中断した場合でも、再実行時に重複して登録しないようにします。
+
+    :param result: 結果を集計するdict
+    :type result: dict
+    """
+    formula = 'NOT({' + self.source_id_field + '}="")'
+    for page in self.destination.iter_pages(formula=formula, fields=[self.source_id_field], prefetch=self.prefetch):
+      for record in page.records:
+        source_id = record.get('fields', {}).get(self.source_id_field)
+        if source_id and source_id not in self.id_map:
+          self.id_map[source_id] = record['id']
+          result['recovered'] += 1
+    self.id_map.flush()
+
+  def _copy_records(self, result):
+    """1回目の走査: リンクフィールドを除いたレコードを登録
+
+    バッチ毎に、登録したレコードのIDを他の処理より先にIDマップに書き出します。
+
+    :param result: 結果を集計するdict
+    :type result: dict
+    """
+    fields = None
+    if self.fields is not None:
+      fields = [name for name in self.fields if name not in self.link_fields]
+    pending = (record for record in self._iter_source(fields) if self._pending(record, result))
+    for chunk in self._chunk(pending, self.destination.max_records_per_request):
+      r = self.destination.bulk_insert([self._copy_fields(record) for record in chunk])
+      failed = set()
+      for error in r.errors:
+        if isinstance(error, dict) and 'index' in error:
+          failed.add(error['index'])
+        else:
+          failed.update(range(len(chunk)))
+      written = iter(r.records)
+      for index, record in enumerate(chunk):
+        if index not in failed:
+          self.id_map[record['id']] = next(written)['id']
+      self.id_map.flush()
+      result['copied'] += len(chunk) - len(failed)
+      for error in r.errors:
+        if isinstance(error, dict) and 'index' in error:
+          result['errors'].append(dict(error, source_id=chunk[error['index']]['id']))
+        else:
+          result['errors'].append({'error': error, 'source_ids': [record['id'] for record in chunk]})
+
+  def _pending(self, record, result):
+    """コピー済みでないかどうか
+
+    :param record: コピー元のレコード
+    :type record: dict
+    :param result: 結果を集計するdict
+    :type result: dict
+    :return: コピー済みでない場合はTrue
+    :rtype: bool
+    """
+    if record['id'] in self.id_map:
+      result['skipped'] += 1
+      return False
+    return True
+
+  def _link_updates(self, result, complete):
+    """リンクフィールドを置き換えた更新内容を生成
+
+    リンクの更新が完了しているレコードは除きます。
+    全てのリンクを置き換えられたレコードは、completeにコピー先のレコードID -> コピー元のレコードIDを追加します。
+
+    :param result: 結果を集計するdict
+    :type result: dict
+    :param complete: 更新が成功したら完了として記録するレコード
+    :type complete: dict
+    :yield: 更新内容({'id': コピー先のレコードID, 'fields': {...}})
+    :rtype: dict
+    """
+    for record in self._iter_source(list(self.link_fields)):
+      destination_id = self.id_map.get(record['id'])
+      if destination_id is None or self.id_map.is_linked(record['id']):
+        continue
+      unmapped = result['unmapped_links']
+      fields = {}
+      for name, linked_map in self.link_fields.items():
+        source_ids = record.get('fields', {}).get(name)
+        if not source_ids:
+          continue
+        linked_map = linked_map or self.id_map
+        mapped = []
+        for source_id in source_ids:
+          linked_id = linked_map.get(source_id)
+          if linked_id is None:
+            result['unmapped_links'] += 1
+          else:
+            mapped.append(linked_id)
+        fields[name] = mapped
+      if fields:
+        if result['unmapped_links'] == unmapped:
+          complete[destination_id] = record['id']
+        yield {'id': destination_id, 'fields': fields}
+
+  def _link_records(self, result):
+    """2回目の走査: リンクフィールドのレコードIDを置き換えて更新
+
+    全てのリンクを置き換えて更新したレコードは、バッチ毎にIDマップに完了として記録します。
+    置き換えられなかったリンクがあるレコードは、リンク先のコピー後に再実行すると再度更新します。
+
+    :param result: 結果を集計するdict
+    :type result: dict
+    """
+    complete = {}
+    for r in self.destination.bulk_update(self._link_updates(result, complete), stream=True):
+      for record in r.records:
+        source_id = complete.pop(record['id'], None)
+        if source_id is not None:
+          self.id_map.mark_linked(source_id)
+      self.id_map.flush()
+      result['linked'] += len(r.records)
+      result['errors'].extend(r.errors)
+
+  def run(self):
+    """テーブルをコピー
+
+    :return: {'copied': 登録件数, 'skipped': コピー済みの件数, 'recovered': コピー先から復元したIDの件数, 'linked': リンクを更新した件数, 'unmapped_links': 置き換えられなかったリンク数, 'errors': エラー情報のリスト}
+    :rtype: dict
+    """
+    result = {'copied': 0, 'skipped': 0, 'recovered': 0, 'linked': 0, 'unmapped_links': 0, 'errors': []}
+    if self.source_id_field:
+      self._recover_ids(result)
+    self._copy_records(result)
+    if self.link_fields:
+      self._link_records(result)
+    return result
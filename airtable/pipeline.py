@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""レコードの並列処理
+
+レコードを読み込みながら、スレッドプールまたはプロセスプールで関数を並列に適用します。
+処理待ちのタスク数に上限を設けるため、処理が追いつかない場合はレコードの読み込みが待機します(バックプレッシャー)。
+"""
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _apply(func, records):
+  """レコードのリストに関数を適用
+
+  プロセスプールで実行するため、モジュールのトップレベルに定義しています。
+
+  :param func: 適用する関数
+  :type func: function
+  :param records: レコードのリスト
+  :type records: list
+  :return: 関数の戻り値のリスト
+  :rtype: list
+  """
+  return [func(record) for record in records]
+
+
+class AirtablePipeline(object):
+  """レコードの並列処理クラス
+
+  orderedがTrueの場合は入力の順に、Falseの場合は処理が完了した順に結果を返却します。
+  プロセスプールを使用する場合、関数とレコードはpickle可能である必要があります。
+  プロセス間の通信量を減らすため、chunk_size件のレコードをまとめて1つのタスクとして送信します。
+
+  >>> pipeline = AirtablePipeline(transform, workers=8, processes=True, chunk_size=50)
+  >>> for result in pipeline.map(records):
+  ...   print(result)
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, func, workers=4, processes=False, ordered=True, max_pending=None, chunk_size=1):
+    """コンストラクタ
+
+    :param func: レコードに適用する関数
+    :type func: function
+    :param workers: 並列数, defaults to 4
+    :type workers: int, optional
+    :param processes: プロセスプールを使用するかどうか(Falseの場合はスレッドプール), defaults to False
+    :type processes: bool, optional
+    :param ordered: 入力の順に結果を返却するかどうか, defaults to True
+    :type ordered: bool, optional
+    :param max_pending: 処理待ちのタスク数の上限, defaults to None ※未指定の場合はworkersの2倍
+    :type max_pending: int, optional
+    :param chunk_size: 1つのタスクにまとめるレコード数, defaults to 1
+    :type chunk_size: int, optional
+    """
+    self.func = func
+    self.workers = workers
+    self.processes = processes
+    self.ordered = ordered
+    self.max_pending = max_pending or workers * 2
+    self.chunk_size = max(chunk_size, 1)
+    pass
+
+  def _chunks(self, records):
+    """レコードをchunk_size件ずつに分割
+
+    :param records: レコードのイテラブル
+    :type records: object
+    :yield: レコードのリスト
+    :rtype: list
+    """
+    chunk = []
+    for record in records:
+      chunk.append(record)
+      if len(chunk) >= self.chunk_size:
+        yield chunk
+        chunk = []
+    if chunk:
+      yield chunk
+
+  def map(self, records):
+    """レコードに関数を並列に適用（ジェネレーター）
+
+    関数で発生した例外は、その結果を返却する時点で送出されます。
+    途中で反復を終了した場合、未実行のタスクはキャンセルされます。
+
+    :param records: レコードのイテラブル
+    :type records: object
+    :yield: 関数の戻り値
+    :rtype: object
+    """
+    if self.processes:
+      from concurrent.futures import ProcessPoolExecutor
+      executor_class = ProcessPoolExecutor
+    else:
+      executor_class = ThreadPoolExecutor
+    executor = executor_class(max_workers=self.workers)
+    pending = collections.deque() if self.ordered else set()
+    try:
+      for chunk in self._chunks(records):
+        if len(pending) >= self.max_pending:
+          for result in self._drain(pending):
+            yield result
+        future = executor.submit(_apply, self.func, chunk)
+        if self.ordered:
+          pending.append(future)
+        else:
+          pending.add(future)
+      while pending:
+        for result in self._drain(pending):
+          yield result
+    finally:
+      for future in pending:
+        future.cancel()
+      executor.shutdown(wait=True)
+
+  def _drain(self, pending):
+    """処理待ちのタスクから完了した結果を取り出す
+
+    orderedの場合は先頭のタスクの完了を待ち、そうでない場合はいずれかのタスクの完了を待ちます。
+
+    :param pending: 処理待ちのタスク
+    :type pending: collections.deque|set
+    :yield: 関数の戻り値
+    :rtype: object
+    """
+    if self.ordered:
+      done = [pending.popleft()]
+    else:
+      done, _ = wait(pending, return_when=FIRST_COMPLETED)
+      pending.difference_update(done)
+    for future in done:
+      for result in future.result():
+        yield result
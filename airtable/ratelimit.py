@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+"""Airtable APIのレート制限
+
+Airtable APIはベース毎に秒間5リクエストまでの制限があります。
+このモジュールはベース単位でリクエスト送信間隔を調整するリミッターを提供します。
+同じベースに対するクライアント同士でリミッターを共有することで、制限を超えないように送信できます。
+
+リミッターは送信待ちのリクエストを優先度順に送信します。
+同じ優先度のリクエストは、クライアント毎に順番に(ラウンドロビンで)送信されます。
+
+送信枠の管理はバックエンドに委譲します。
+LocalRateLimitBackendはプロセス内、FileRateLimitBackendは同一ホストの複数プロセス間で送信枠を共有します。
+RateLimitBackendを継承することで、ネットワーク越しに共有するバックエンドも追加できます。
+"""
+import collections
+import enum
+import os
+import re
+import threading
+import time
+
+from .exceptions import AirtableDeadlineExceeded
+
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+
+class RequestPriority(enum.Enum):
+  """リクエストの優先度の列挙型
+
+  値が小さいほど優先されます。
+
+  :param INTERACTIVE: 対話的な処理(find_by等のレイテンシを重視するリクエスト)
+  :type INTERACTIVE: int
+  :param BULK: 一括処理(bulk_insert等のバックグラウンドのリクエスト)
+  :type BULK: int
+  """
+  INTERACTIVE = 0
+  BULK = 1
+
+
+class RateLimitBackend(object):
+  """送信枠を管理するバックエンドの基底クラス
+
+  キー(ベースID)毎に次の送信可能時刻を保持し、送信枠の確保をアトミックに行います。
+  時刻はプロセス間で比較できるようにtime.time()の値を使用します。
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def reserve(self, key, interval, max_wait=None):
+    """送信枠を確保
+
+    次の送信可能時刻を返却し、保持している時刻をinterval秒進めます。
+    次の送信可能時刻までmax_wait秒より長く待つ必要がある場合は、送信枠を確保せずにNoneを返却します。
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :param interval: 送信間隔(秒)
+    :type interval: float
+    :param max_wait: 待機できる最大秒数, defaults to None ※未指定の場合は無制限
+    :type max_wait: float, optional
+    :return: 確保した送信枠の時刻(time.time()の値、確保しなかった場合はNone)
+    :rtype: float
+    """
+    raise NotImplementedError()
+
+  def penalize(self, key, seconds):
+    """送信を一定時間停止
+
+    429(Too Many Requests)を受け取った場合など、全てのプロセスの送信を止めるために使用します。
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :param seconds: 送信を停止する秒数
+    :type seconds: float
+    """
+    raise NotImplementedError()
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+  """プロセス内で送信枠を管理するバックエンド
+
+  :param RateLimitBackend: RateLimitBackendを継承
+  :type RateLimitBackend: RateLimitBackend
+  """
+  def __init__(self):
+    """コンストラクタ
+    """
+    self._next_slots = {}
+    self._lock = threading.Lock()
+    pass
+
+  def reserve(self, key, interval, max_wait=None):
+    """送信枠を確保
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :param interval: 送信間隔(秒)
+    :type interval: float
+    :param max_wait: 待機できる最大秒数, defaults to None ※未指定の場合は無制限
+    :type max_wait: float, optional
+    :return: 確保した送信枠の時刻(time.time()の値、確保しなかった場合はNone)
+    :rtype: float
+    """
+    with self._lock:
+      now = time.time()
+      slot = max(now, self._next_slots.get(key, 0.0))
+      if max_wait is not None and slot - now > max_wait:
+        return None
+      self._next_slots[key] = slot + interval
+    return slot
+
+  def penalize(self, key, seconds):
+    """送信を一定時間停止
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :param seconds: 送信を停止する秒数
+    :type seconds: float
+    """
+    with self._lock:
+      self._next_slots[key] = max(self._next_slots.get(key, 0.0), time.time() + seconds)
+
+
+class FileRateLimitBackend(RateLimitBackend):
+  """ファイルロックで同一ホストの複数プロセス間の送信枠を管理するバックエンド
+
+  キー毎にファイルを作成し、flockで排他制御しながら次の送信可能時刻を読み書きします。
+  gunicornやceleryのワーカープロセス間で同じdirectoryを指定してください。
+  fcntlが利用できない環境(Windows)では使用できません。
+
+  >>> backend = FileRateLimitBackend('/var/run/airtable')
+  >>> factory = AirtableClientFactory(base_id='XXX', api_key='XXX', rate_limit_backend=backend)
+
+  :param RateLimitBackend: RateLimitBackendを継承
+  :type RateLimitBackend: RateLimitBackend
+  """
+  _DEFAULT_DIRECTORY_NAME = 'airtable_client_ratelimit'
+
+  def __init__(self, directory=None):
+    """コンストラクタ
+
+    :param directory: 送信枠のファイルを配置するディレクトリ, defaults to None ※未指定の場合は一時ディレクトリ配下
+    :type directory: string, optional
+    :raises RuntimeError: fcntlが利用できない場合に送出される
+    """
+    if fcntl is None:
+      raise RuntimeError("FileRateLimitBackend requires 'fcntl'. It is not available on this platform.")
+    if not directory:
+      import tempfile
+      directory = os.path.join(tempfile.gettempdir(), self._DEFAULT_DIRECTORY_NAME)
+    self.directory = directory
+    os.makedirs(self.directory, exist_ok=True)
+    pass
+
+  def _path(self, key):
+    """キーに対応するファイルパスを取得
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :return: ファイルパス
+    :rtype: string
+    """
+    return os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', str(key)) + '.slot')
+
+  def _update(self, key, update):
+    """ファイルロックを取得して次の送信可能時刻を更新
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :param update: 保持している時刻を受け取り、(戻り値, 新しい時刻)を返す関数
+    :type update: function
+    :return: updateの戻り値
+    :rtype: object
+    """
+    fd = os.open(self._path(key), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+      fcntl.flock(fd, fcntl.LOCK_EX)
+      try:
+        data = os.read(fd, 64)
+        try:
+          next_slot = float(data) if data else 0.0
+        except ValueError:
+          next_slot = 0.0
+        result, new_next_slot = update(next_slot)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, repr(new_next_slot).encode('ascii'))
+        return result
+      finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+      os.close(fd)
+
+  def reserve(self, key, interval, max_wait=None):
+    """送信枠を確保
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :param interval: 送信間隔(秒)
+    :type interval: float
+    :param max_wait: 待機できる最大秒数, defaults to None ※未指定の場合は無制限
+    :type max_wait: float, optional
+    :return: 確保した送信枠の時刻(time.time()の値、確保しなかった場合はNone)
+    :rtype: float
+    """
+    def update(next_slot):
+      now = time.time()
+      slot = max(now, next_slot)
+      if max_wait is not None and slot - now > max_wait:
+        return (None, next_slot)
+      return (slot, slot + interval)
+    return self._update(key, update)
+
+  def penalize(self, key, seconds):
+    """送信を一定時間停止
+
+    :param key: 送信枠を共有するキー
+    :type key: string
+    :param seconds: 送信を停止する秒数
+    :type seconds: float
+    """
+    def update(next_slot):
+      return (None, max(next_slot, time.time() + seconds))
+    self._update(key, update)
+
+
+class RateLimiter(object):
+  """ベース単位のレートリミッター
+
+  スレッドセーフです。同じベースにアクセスする複数のクライアント(スレッド)で共有してください。
+  送信待ちのリクエストは優先度の高いものから、同じ優先度ではクライアント毎に公平に送信枠を割り当てます。
+
+  送信枠はバックエンドから確保します。プロセス内で同時に確保する送信枠は1つだけのため、
+  複数プロセスでバックエンドを共有しても優先度の高いリクエストが後回しになることはありません。
+
+  >>> limiter = RateLimiter(rate=5)
+  >>> limiter.acquire()  # 送信可能になるまで待機
+  >>> limiter.acquire(priority=RequestPriority.BULK, client_key='import-job')
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, rate=5, per=1.0, backend=None, key=None):
+    """コンストラクタ
+
+    :param rate: per秒あたりの最大リクエスト数, defaults to 5
+    :type rate: int, optional
+    :param per: レートの単位秒数, defaults to 1.0
+    :type per: float, optional
+    :param backend: 送信枠を管理するバックエンド, defaults to None ※未指定の場合はLocalRateLimitBackend
+    :type backend: RateLimitBackend, optional
+    :param key: バックエンドで送信枠を共有するキー(ベースID), defaults to None
+    :type key: string, optional
+    """
+    self.interval = float(per) / rate
+    self.backend = backend or LocalRateLimitBackend()
+    self.key = key or 'default'
+    self._dispatching = False
+    self._cond = threading.Condition()
+    # 優先度の値 -> (クライアントキー -> 送信待ちチケットのdeque)
+    self._queues = {}
+    pass
+
+  def _head(self):
+    """次に送信枠を割り当てるチケットを取得
+
+    :return: チケット(送信待ちがない場合はNone)
+    :rtype: object
+    """
+    for priority in sorted(self._queues):
+      clients = self._queues[priority]
+      if clients:
+        tickets = next(iter(clients.values()))
+        return tickets[0]
+    return None
+
+  def _pop_head(self):
+    """先頭のチケットを取り出し、そのクライアントを同じ優先度の末尾に回す
+    """
+    for priority in sorted(self._queues):
+      clients = self._queues[priority]
+      if clients:
+        client_key, tickets = next(iter(clients.items()))
+        tickets.popleft()
+        del clients[client_key]
+        if tickets:
+          clients[client_key] = tickets
+        return
+
+  def _remove(self, priority, client_key, ticket):
+    """送信待ちのチケットを取り消す
+
+    :param priority: 優先度の値
+    :type priority: int
+    :param client_key: クライアントキー
+    :type client_key: object
+    :param ticket: チケット
+    :type ticket: object
+    """
+    clients = self._queues.get(priority, {})
+    tickets = clients.get(client_key)
+    if tickets is not None and ticket in tickets:
+      tickets.remove(ticket)
+      if not tickets:
+        del clients[client_key]
+
+  def acquire(self, priority=RequestPriority.INTERACTIVE, client_key=None, timeout=None):
+    """送信枠を確保
+
+    優先度の高い送信待ちがなくなり、バックエンドから確保した送信枠の時刻になるまで待機します。
+
+    :param priority: リクエストの優先度, defaults to RequestPriority.INTERACTIVE
+    :type priority: RequestPriority, optional
+    :param client_key: 公平に送信枠を割り当てる単位となるクライアントのキー, defaults to None
+    :type client_key: object, optional
+    :param timeout: 待機できる最大秒数, defaults to None ※未指定の場合は無制限
+    :type timeout: float, optional
+    :raises AirtableDeadlineExceeded: timeout秒以内に送信枠を確保できない場合に送出される
+    :return: 待機した秒数
+    :rtype: float
+    """
+    if isinstance(priority, RequestPriority):
+      priority = priority.value
+    ticket = object()
+    started = time.monotonic()
+
+    with self._cond:
+      clients = self._queues.setdefault(priority, collections.OrderedDict())
+      clients.setdefault(client_key, collections.deque()).append(ticket)
+      try:
+        while self._dispatching or self._head() is not ticket:
+          if timeout is None:
+            self._cond.wait()
+            continue
+          remaining = timeout - (time.monotonic() - started)
+          if remaining <= 0:
+            raise AirtableDeadlineExceeded('Timed out waiting for the rate limiter.')
+          self._cond.wait(remaining)
+      except BaseException:
+        self._remove(priority, client_key, ticket)
+        self._cond.notify_all()
+        raise
+      self._pop_head()
+      self._dispatching = True
+
+    try:
+      # 残り時間で送信できない送信枠は確保しない(確保すると、共有している他のクライアントが送信されないリクエストの後ろで待たされる)
+      if timeout is None:
+        slot = self.backend.reserve(self.key, self.interval)
+      else:
+        slot = self.backend.reserve(self.key, self.interval, max_wait=timeout - (time.monotonic() - started))
+        if slot is None:
+          raise AirtableDeadlineExceeded('Timed out waiting for the rate limiter.')
+      wait = slot - time.time()
+      if wait > 0:
+        time.sleep(wait)
+    finally:
+      with self._cond:
+        self._dispatching = False
+        self._cond.notify_all()
+
+    return time.monotonic() - started
+
+  def penalize(self, seconds):
+    """送信を一定時間停止
+
+    バックエンドを共有している全てのリミッターの送信を止めます。
+
+    :param seconds: 送信を停止する秒数
+    :type seconds: float
+    """
+    self.backend.penalize(self.key, seconds)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""変更を追跡するレコード
+
+検索結果のレコードをラップし、フィールドの変更を追跡します。
+保存時には変更されたフィールドのみを送信し、変更のないレコードは送信しません。
+"""
+import copy
+
+
+class AirtableRecord(object):
+  """変更を追跡するレコードクラス
+
+  読み込み時のフィールドの値を保持し、現在の値と比較して変更されたフィールドを判定します。
+  元と同じ値を再設定した場合は変更なしとして扱います。
+
+  >>> records = client.get_all().as_records(client)
+  >>> records[0]['Age'] = 20
+  >>> records[0].changed_fields()
+  {'Age': 20}
+  >>> records[0].save()
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, record, client=None):
+    """コンストラクタ
+
+    :param record: 検索結果のレコード({'id': 'XXX', 'fields': {...}})
+    :type record: dict
+    :param client: 保存に使用するAirtableクライアント, defaults to None
+    :type client: AirtableClient, optional
+    """
+    self.id = record.get('id')
+    self.created_time = record.get('createdTime')
+    self.fields = copy.deepcopy(record.get('fields', {}))
+    self.client = client
+    self._original = copy.deepcopy(self.fields)
+    pass
+
+  def __getitem__(self, field):
+    """フィールドの値を取得
+
+    :param field: フィールド名
+    :type field: string
+    :return: フィールドの値
+    :rtype: object
+    """
+    return self.fields[field]
+
+  def __setitem__(self, field, value):
+    """フィールドの値を設定
+
+    :param field: フィールド名
+    :type field: string
+    :param value: フィールドの値
+    :type value: object
+    """
+    self.fields[field] = value
+
+  def __delitem__(self, field):
+    """フィールドの値を削除(保存時は空の値で更新)
+
+    :param field: フィールド名
+    :type field: string
+    """
+    del self.fields[field]
+
+  def get(self, field, default=None):
+    """フィールドの値を取得
+
+    :param field: フィールド名
+    :type field: string
+    :param default: フィールドがない場合の値, defaults to None
+    :type default: object, optional
+    :return: フィールドの値
+    :rtype: object
+    """
+    return self.fields.get(field, default)
+
+  def changed_fields(self):
+    """変更されたフィールドを取得
+
+    削除されたフィールドはNone(空の値)として返却します。
+
+    :return: フィールド名 -> 変更後の値
+    :rtype: dict
+    """
+    changed = {}
+    for field, value in self.fields.items():
+      if field not in self._original or self._original[field] != value:
+        changed[field] = value
+    for field in self._original:
+      if field not in self.fields:
+        changed[field] = None
+    return changed
+
+  def is_dirty(self):
+    """変更されているかどうか
+
+    :return: 変更されたフィールドがある場合はTrue
+    :rtype: bool
+    """
+    return bool(self.changed_fields())
+
+  def mark_clean(self):
+    """現在の値を保存済みの値として扱う
+    """
+    self._original = copy.deepcopy(self.fields)
+
+  def to_dict(self):
+    """検索結果と同じ形式のdictに変換
+
+    :return: {'id': 'XXX', 'fields': {...}}
+    :rtype: dict
+    """
+    record = {'id': self.id, 'fields': copy.deepcopy(self.fields)}
+    if self.created_time:
+      record['createdTime'] = self.created_time
+    return record
+
+  def save(self):
+    """変更されたフィールドのみを保存
+
+    変更がない場合はリクエストを送信しません。
+
+    :raises ValueError: クライアントが設定されていない場合に送出される
+    :return: 更新結果(変更がない場合は空の結果)
+    :rtype: AirtableResponse
+    """
+    if self.client is None:
+      raise ValueError("'client' is required to save the record.")
+    return self.client.save_all([self])
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""テーブルのスナップショット
+
+テーブルのレコードを圧縮したJSON Lines形式のファイルに保存し、メモリマップで読み込みます。
+
+ファイルはページ毎に独立したgzipのメンバーを連結した形式のため、全体を通常のgzipファイル(.jsonl.gz)として展開できます。
+あわせて作成する索引ファイル({path}.idx)にはレコードID -> (ブロックの位置, ブロックのサイズ, ブロック内の行番号)を記録します。
+索引は固定長のエントリをレコードIDの順に並べた形式で、読み込み時はメモリマップ上で二分探索します。
+読み込み時は必要なブロックのみを展開するため、全レコード(索引を含む)をメモリに保持せずに順次読み込み・ID指定の読み込みができます。
+"""
+import bisect
+import gzip
+import heapq
+import json
+import mmap
+import os
+import struct
+import zlib
+
+# 索引ファイルの先頭の識別子
+_INDEX_MAGIC = b'ATSIDX1\n'
+# 索引のエントリ: レコードID(UTF-8、_ID_WIDTHバイトまで0x00で埋める), ブロックの位置, ブロックのサイズ, ブロック内の行番号
+_ID_WIDTH = 32
+_ENTRY = struct.Struct('>{}sQII'.format(_ID_WIDTH))
+
+
+def _id_key(id):
+  """レコードIDを索引のキー(固定長のバイト列)に変換
+
+  0x00で埋めるため、キーのバイト列の順序はレコードIDのUTF-8のバイト列の順序と一致します。
+
+  :param id: レコードID
+  :type id: string
+  :raises ValueError: レコードIDが_ID_WIDTHバイトを超える場合に送出される
+  :return: キー
+  :rtype: bytes
+  """
+  key = id.encode('utf-8')
+  if len(key) > _ID_WIDTH:
+    raise ValueError('Record ids longer than {} bytes cannot be indexed: {}'.format(_ID_WIDTH, id))
+  return key.ljust(_ID_WIDTH, b'\0')
+
+
+class AirtableSnapshotWriter(object):
+  """スナップショットの書き込みクラス
+
+  >>> with AirtableSnapshotWriter('orders.jsonl.gz') as writer:
+  ...   for page in client.iter_pages():
+  ...     writer.write_block(page.records)
+
+  :param object: objectを継承
+  :type object: object
+  """
+  _INDEX_SUFFIX = '.idx'
+  _TMP_SUFFIX = '.tmp'
+  _SORT_BUFFER_ENTRIES = 65536  # 索引のエントリをメモリ上で並べ替える件数(超えた分は一時ファイルに書き出して併合する)
+
+  def __init__(self, path, compresslevel=6):
+    """コンストラクタ
+
+    書き込み中は一時ファイルに書き出し、closeで置き換えます。
+    索引のエントリは_SORT_BUFFER_ENTRIES件ずつ並べ替えて一時ファイルに書き出し、closeで併合するため、メモリ使用量はレコード数に比例しません。
+
+    :param path: スナップショットのファイルパス
+    :type path: string
+    :param compresslevel: gzipの圧縮レベル(1〜9), defaults to 6
+    :type compresslevel: int, optional
+    """
+    self.path = path
+    self.compresslevel = compresslevel
+    self.count = 0
+    self.blocks = 0
+    self._data = open(path + self._TMP_SUFFIX, 'wb')
+    self._entries = []
+    self._runs = None
+    self._run_sizes = []
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close(commit=exc_type is None)
+
+  def write_block(self, records):
+    """レコードのリストを1つのブロックとして書き込み
+
+    :param records: レコードのリスト
+    :type records: list
+    """
+    if not records:
+      return
+    lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    block = gzip.compress(lines.encode('utf-8'), compresslevel=self.compresslevel)
+    offset = self._data.tell()
+    entries = [_ENTRY.pack(_id_key(record['id']), offset, len(block), line_no) for line_no, record in enumerate(records)]
+    self._data.write(block)
+    self._entries.extend(entries)
+    if len(self._entries) >= self._SORT_BUFFER_ENTRIES:
+      self._flush_run()
+    self.count += len(records)
+    self.blocks += 1
+
+  def _flush_run(self):
+    """メモリ上の索引のエントリを並べ替えて一時ファイルに書き出す
+    """
+    if not self._entries:
+      return
+    if self._runs is None:
+      import tempfile
+      self._runs = tempfile.TemporaryFile()
+    self._entries.sort()
+    self._runs.write(b''.join(self._entries))
+    self._run_sizes.append(len(self._entries))
+    self._entries = []
+
+  def _sorted_entries(self):
+    """全ての索引のエントリをレコードIDの順に取得（ジェネレーター）
+
+    :yield: エントリ
+    :rtype: bytes
+    """
+    if self._runs is None:
+      self._entries.sort()
+      for entry in self._entries:
+        yield entry
+      return
+    self._flush_run()
+    self._runs.flush()
+    runs = mmap.mmap(self._runs.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      def read_run(start, count):
+        for position in range(start, start + count * _ENTRY.size, _ENTRY.size):
+          yield runs[position:position + _ENTRY.size]
+      starts = [sum(self._run_sizes[:i]) * _ENTRY.size for i in range(len(self._run_sizes))]
+      for entry in heapq.merge(*[read_run(start, count) for start, count in zip(starts, self._run_sizes)]):
+        yield entry
+    finally:
+      runs.close()
+
+  def _write_index(self, path):
+    """索引ファイルを書き込み
+
+    :param path: 索引ファイルのパス
+    :type path: string
+    """
+    with open(path, 'wb') as f:
+      f.write(_INDEX_MAGIC)
+      chunk = []
+      for entry in self._sorted_entries():
+        chunk.append(entry)
+        if len(chunk) >= 4096:
+          f.write(b''.join(chunk))
+          chunk = []
+      f.write(b''.join(chunk))
+
+  def close(self, commit=True):
+    """ファイルを閉じる
+
+    :param commit: 一時ファイルでスナップショットを置き換えるかどうか, defaults to True
+    :type commit: bool, optional
+    """
+    self._data.close()
+    index_tmp_path = self.path + self._INDEX_SUFFIX + self._TMP_SUFFIX
+    try:
+      if commit:
+        self._write_index(index_tmp_path)
+        os.replace(self.path + self._TMP_SUFFIX, self.path)
+        os.replace(index_tmp_path, self.path + self._INDEX_SUFFIX)
+      else:
+        os.remove(self.path + self._TMP_SUFFIX)
+    finally:
+      self._entries = []
+      if self._runs is not None:
+        self._runs.close()
+        self._runs = None
+
+
+class AirtableSnapshot(object):
+  """スナップショットの読み込みクラス
+
+  ファイルをメモリマップで開き、必要なブロックのみを展開します。
+
+  >>> with AirtableSnapshot('orders.jsonl.gz') as snapshot:
+  ...   print(len(snapshot))
+  ...   print(snapshot.get('recXXX'))
+  ...   for record in snapshot:
+  ...     process(record)
+
+  :param object: objectを継承
+  :type object: object
+  """
+  _INDEX_SUFFIX = '.idx'
+  _READ_SIZE = 64 * 1024  # 順次読み込みで1回に展開に渡すバイト数
+
+  def __init__(self, path):
+    """コンストラクタ
+
+    :param path: スナップショットのファイルパス
+    :type path: string
+    """
+    self.path = path
+    self._file = open(path, 'rb')
+    size = os.fstat(self._file.fileno()).st_size
+    self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+    self._index_file = None
+    self._index = None
+    self._cached_block = (None, None)
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def close(self):
+    """ファイルを閉じる
+    """
+    if self._mmap is not None:
+      self._mmap.close()
+      self._mmap = None
+    if self._index is not None:
+      self._index.close()
+      self._index = None
+      self._index_file.close()
+    self._file.close()
+
+  def _load_index(self):
+    """索引ファイルをメモリマップで開く
+
+    :raises ValueError: 索引ファイルの形式が異なる場合に送出される
+    :return: 索引
+    :rtype: _SnapshotIndex
+    """
+    if self._index is None:
+      self._index_file = open(self.path + self._INDEX_SUFFIX, 'rb')
+      try:
+        self._index = _SnapshotIndex(mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ))
+      except Exception:
+        self._index_file.close()
+        raise
+    return self._index
+
+  def _read_block(self, offset, length):
+    """ブロックを展開して行のリストを取得
+
+    直前に展開したブロックは再利用します。
+
+    :param offset: ブロックの位置
+    :type offset: int
+    :param length: ブロックのサイズ
+    :type length: int
+    :return: JSON文字列の行のリスト
+    :rtype: list
+    """
+    cached_offset, cached_lines = self._cached_block
+    if cached_offset == offset:
+      return cached_lines
+    data = zlib.decompress(self._mmap[offset:offset + length], wbits=31)
+    lines = self._split_lines(data)
+    self._cached_block = (offset, lines)
+    return lines
+
+  @classmethod
+  def _split_lines(cls, data):
+    """展開したブロックを行に分割
+
+    JSONはU+2028等の改行扱いの文字をエスケープしないため、str.splitlinesではなく'\\n'のみで分割します。
+
+    :param data: 展開したブロック
+    :type data: bytes
+    :return: JSON文字列の行のリスト
+    :rtype: list
+    """
+    lines = data.decode('utf-8').split('\n')
+    if lines and not lines[-1]:
+      lines.pop()
+    return lines
+
+  def __len__(self):
+    """レコード数を取得
+
+    :return: レコード数
+    :rtype: int
+    """
+    return len(self._load_index())
+
+  def __contains__(self, id):
+    """レコードIDが含まれているかどうか
+
+    :param id: レコードID
+    :type id: string
+    :return: 含まれている場合はTrue
+    :rtype: bool
+    """
+    return self._load_index().find(id) is not None
+
+  def get(self, id, default=None):
+    """レコードIDでレコードを取得
+
+    :param id: レコードID
+    :type id: string
+    :param default: レコードがない場合の値, defaults to None
+    :type default: object, optional
+    :return: レコード
+    :rtype: dict
+    """
+    location = self._load_index().find(id)
+    if location is None:
+      return default
+    offset, length, line_no = location
+    return json.loads(self._read_block(offset, length)[line_no])
+
+  def __iter__(self):
+    """全てのレコードを順に取得
+
+    ブロックを先頭から1つずつ展開するため、索引は使用しません。
+    展開には_READ_SIZEずつ渡すため、メモリ使用量はファイルサイズではなくブロックのサイズに比例します。
+
+    :yield: レコード
+    :rtype: dict
+    """
+    if self._mmap is None:
+      return
+    offset = 0
+    size = len(self._mmap)
+    while offset < size:
+      decompressor = zlib.decompressobj(wbits=31)
+      chunks = []
+      while not decompressor.eof and offset < size:
+        data = self._mmap[offset:offset + self._READ_SIZE]
+        chunks.append(decompressor.decompress(data))
+        offset += len(data)
+      offset -= len(decompressor.unused_data)
+      for line in self._split_lines(b''.join(chunks)):
+        yield json.loads(line)
+
+
+class _SnapshotIndex(object):
+  """メモリマップした索引ファイルを二分探索するクラス
+
+  エントリをシーケンスとして参照できるため、bisectで探索します。
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, data):
+    """コンストラクタ
+
+    :param data: 索引ファイルのメモリマップ
+    :type data: mmap.mmap
+    :raises ValueError: 索引ファイルの形式が異なる場合に送出される
+    """
+    if data[:len(_INDEX_MAGIC)] != _INDEX_MAGIC or (len(data) - len(_INDEX_MAGIC)) % _ENTRY.size:
+      data.close()
+      raise ValueError('Unsupported snapshot index format. Please recreate the snapshot.')
+    self._data = data
+    pass
+
+  def __len__(self):
+    return (len(self._data) - len(_INDEX_MAGIC)) // _ENTRY.size
+
+  def __getitem__(self, i):
+    """i番目のエントリのキーを取得
+
+    :param i: エントリの番号
+    :type i: int
+    :return: キー
+    :rtype: bytes
+    """
+    position = len(_INDEX_MAGIC) + i * _ENTRY.size
+    return self._data[position:position + _ID_WIDTH]
+
+  def find(self, id):
+    """レコードIDの位置を検索
+
+    :param id: レコードID
+    :type id: string
+    :return: (ブロックの位置, ブロックのサイズ, ブロック内の行番号)(ない場合はNone)
+    :rtype: tuple
+    """
+    try:
+      key = _id_key(id)
+    except ValueError:
+      return None
+    i = bisect.bisect_left(self, key)
+    if i == len(self) or self[i] != key:
+      return None
+    _, offset, length, line_no = _ENTRY.unpack_from(self._data, len(_INDEX_MAGIC) + i * _ENTRY.size)
+    return (offset, length, line_no)
+
+  def close(self):
+    """メモリマップを閉じる
+    """
+    self._data.close()
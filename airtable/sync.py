@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""テーブルの同期
+
+テーブルのレコードを指定したレコードの集合と一致させるための、最小限の登録・更新・削除を算出して適用します。
+現在のテーブルはページ単位で読み込み、キーとフィールド値のハッシュのみを保持します。
+"""
+import hashlib
+import json
+
+from .airtable import Deadline
+
+
+class AirtableSyncPlan(object):
+  """テーブルの同期計画クラス
+
+  登録・更新・削除するレコードを保持します。
+  applyを呼び出すまでテーブルは変更されません(dry-run)。
+
+  >>> plan = client.sync_to(rows, key='Code', dry_run=True)
+  >>> print(plan.summary())
+  {'create': 3, 'update': 1, 'delete': 0, 'unchanged': 120}
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, client, key, creates, updates, deletes, unchanged):
+    """コンストラクタ
+
+    :param client: 同期対象のテーブルのクライアント
+    :type client: AirtableClient
+    :param key: レコードを対応付けるキーのフィールド名
+    :type key: string
+    :param creates: 登録するレコードのフィールドのリスト
+    :type creates: list
+    :param updates: 更新するレコードのリスト({'id': 'XXX', 'fields': {...}})
+    :type updates: list
+    :param deletes: 削除するレコードIDのリスト
+    :type deletes: list
+    :param unchanged: 変更のないレコード数
+    :type unchanged: int
+    """
+    self.client = client
+    self.key = key
+    self.creates = creates
+    self.updates = updates
+    self.deletes = deletes
+    self.unchanged = unchanged
+    self.results = {}
+    pass
+
+  @classmethod
+  def _normalize(cls, value):
+    """比較用にフィールドの値を正規化
+
+    Airtableは空の値のフィールドを返却しないため、空の値はNoneとして扱います。
+
+    :param value: フィールドの値
+    :type value: object
+    :return: 正規化した値
+    :rtype: object
+    """
+    if value is False or (isinstance(value, (str, list, dict)) and not value):
+      return None
+    return value
+
+  @classmethod
+  def _hash(cls, fields, field_names):
+    """比較対象のフィールドの値のハッシュを取得
+
+    :param fields: レコードのフィールド
+    :type fields: dict
+    :param field_names: 比較対象のフィールド名のリスト
+    :type field_names: list
+    :return: ハッシュ値
+    :rtype: string
+    """
+    normalized = [cls._normalize(fields.get(name)) for name in field_names]
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+  @classmethod
+  def build(cls, client, rows, key, delete=True, formula=None, view=None):
+    """現在のテーブルと指定したレコードの差分から同期計画を作成
+
+    比較対象は全てのrowsに含まれるフィールドです。更新するレコードのうち、rowにないフィールドは空にします。
+
+    :param client: 同期対象のテーブルのクライアント
+    :type client: AirtableClient
+    :param rows: テーブルの内容とするレコードのフィールドのイテラブル
+    :type rows: list
+    :param key: レコードを対応付けるキーのフィールド名
+    :type key: string
+    :param delete: rowsに含まれないレコードを削除するかどうか, defaults to True
+    :type delete: bool, optional
+    :param formula: 同期対象とするレコードの条件式, defaults to None
+    :type formula: string, optional
+    :param view: 同期対象とするビュー名, defaults to None
+    :type view: string, optional
+    :raises ValueError: rowsにキーのないレコードや重複したキーがある場合に送出される
+    :return: 同期計画
+    :rtype: AirtableSyncPlan
+    """
+    desired = {}
+    field_names = set()
+    for row in rows:
+      if row.get(key) is None:
+        raise ValueError("All rows must have the key field '{}'.".format(key))
+      key_value = str(row[key])
+      if key_value in desired:
+        raise ValueError("The key '{}' is duplicated in rows.".format(key_value))
+      desired[key_value] = row
+      field_names.update(row.keys())
+    field_names = sorted(field_names)
+
+    current = {}
+    deletes = []
+    for page in client.iter_pages(formula=formula, fields=field_names, view=view):
+      for record in page.records:
+        fields = record.get('fields', {})
+        key_value = str(fields.get(key))
+        if fields.get(key) is None or key_value in current:
+          deletes.append(record['id'])
+          continue
+        current[key_value] = (record['id'], cls._hash(fields, field_names))
+
+    creates = []
+    updates = []
+    unchanged = 0
+    for key_value, row in desired.items():
+      if key_value not in current:
+        creates.append(row)
+        continue
+      record_id, record_hash = current.pop(key_value)
+      if record_hash == cls._hash(row, field_names):
+        unchanged += 1
+      else:
+        # 比較は全てのrowsのフィールドで行うため、rowにないフィールドはNoneを送信して空にする
+        fields = dict.fromkeys(field_names)
+        fields.update(row)
+        updates.append({'id': record_id, 'fields': fields})
+
+    if delete:
+      deletes.extend(record_id for record_id, _ in current.values())
+    else:
+      deletes = []
+
+    return cls(client, key, creates, updates, deletes, unchanged)
+
+  def summary(self):
+    """同期計画の件数を取得
+
+    :return: 登録・更新・削除・変更なしの件数
+    :rtype: dict
+    """
+    return {
+      'create': len(self.creates),
+      'update': len(self.updates),
+      'delete': len(self.deletes),
+      'unchanged': self.unchanged
+    }
+
+  def apply(self, deadline=None):
+    """同期計画をテーブルに適用
+
+    登録・更新・削除をそれぞれ一括処理(最大10件/リクエスト)で送信します。
+    結果はresultsに'create'/'update'/'delete' -> AirtableResponseとして格納されます。
+
+    :param deadline: 適用にかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :return: self
+    :rtype: AirtableSyncPlan
+    """
+    deadline = Deadline.make(deadline)
+    if self.creates:
+      self.results['create'] = self.client.bulk_insert(self.creates, deadline=deadline)
+    if self.updates:
+      self.results['update'] = self.client.bulk_update(self.updates, deadline=deadline)
+    if self.deletes:
+      self.results['delete'] = self.client.bulk_delete(ids=self.deletes, deadline=deadline)
+    return self
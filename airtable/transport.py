@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""HTTPトランスポート
+
+AirtableClientがHTTPリクエストを送信する層です。
+RequestsTransportはrequests.Session(HTTP/1.1)、HTTP2Transportはhttpx(HTTP/2)で送信します。
+HTTP2Transportはホスト毎に1つのコネクションで複数のリクエストを多重化するため、
+並行してリクエストを送信する場合にコネクションの確立コストとソケット数を削減できます。
+
+トランスポートのレスポンスはrequests.Responseと同じインターフェース
+(status_code, url, headers, json(), raise_for_status())を持ちます。
+
+RecordingTransportは送受信したリクエスト・レスポンスをファイルに記録し、ReplayTransportは記録したファイルから
+ネットワークに接続せずにレスポンスを再生します。オフラインでの再現可能な性能測定・テストに使用します。
+"""
+import collections
+import json
+import threading
+import time
+
+from .exceptions import AirtableReplayError
+
+
+class Transport(object):
+  """HTTPトランスポートの基底クラス
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def request(self, method, url, params=None, json_data=None, timeout=None, headers=None):
+    """HTTPリクエスト送信
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param url: リクエストURL
+    :type url: string
+    :param params: リクエストパラメータオブジェクト, defaults to None
+    :type params: dict, optional
+    :param json_data: リクエストJSONデータオブジェクト, defaults to None
+    :type json_data: dict, optional
+    :param timeout: (接続タイムアウト, 読み込みタイムアウト), defaults to None
+    :type timeout: tuple, optional
+    :param headers: リクエストヘッダー, defaults to None
+    :type headers: dict, optional
+    :return: レスポンスオブジェクト
+    :rtype: requests.Response
+    """
+    raise NotImplementedError()
+
+  def close(self):
+    """コネクションを閉じる
+    """
+    pass
+
+
+class RequestsTransport(Transport):
+  """requests.Sessionで送信するトランスポート
+
+  :param Transport: Transportを継承
+  :type Transport: Transport
+  """
+  def __init__(self, session=None):
+    """コンストラクタ
+
+    :param session: 送信に使用するセッション, defaults to None ※未指定の場合は新規に生成
+    :type session: requests.Session, optional
+    """
+    if session is None:
+      import requests
+      session = requests.Session()
+    self.session = session
+    pass
+
+  def request(self, method, url, params=None, json_data=None, timeout=None, headers=None):
+    """HTTPリクエスト送信
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param url: リクエストURL
+    :type url: string
+    :param params: リクエストパラメータオブジェクト, defaults to None
+    :type params: dict, optional
+    :param json_data: リクエストJSONデータオブジェクト, defaults to None
+    :type json_data: dict, optional
+    :param timeout: (接続タイムアウト, 読み込みタイムアウト), defaults to None
+    :type timeout: tuple, optional
+    :param headers: リクエストヘッダー, defaults to None
+    :type headers: dict, optional
+    :return: レスポンスオブジェクト
+    :rtype: requests.Response
+    """
+    return self.session.request(method, url, params=params, json=json_data, timeout=timeout, headers=headers)
+
+  def close(self):
+    """セッションを閉じる
+    """
+    self.session.close()
+
+
+class HTTP2Response(object):
+  """HTTP2Transportのレスポンスクラス
+
+  httpx.Responseをrequests.Responseと同じインターフェースで扱うためのラッパーです。
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, response):
+    """コンストラクタ
+
+    :param response: httpxのレスポンス
+    :type response: httpx.Response
+    """
+    self._response = response
+    self.status_code = response.status_code
+    self.url = str(response.url)
+    self.headers = response.headers
+    self.reason = response.reason_phrase
+    pass
+
+  @property
+  def content(self):
+    """レスポンスボディのgetter
+
+    :return: レスポンスボディ
+    :rtype: bytes
+    """
+    return self._response.content
+
+  @property
+  def text(self):
+    """レスポンスボディ(文字列)のgetter
+
+    :return: レスポンスボディ
+    :rtype: string
+    """
+    return self._response.text
+
+  def json(self):
+    """レスポンスボディのJSONオブジェクトを取得
+
+    :raises ValueError: JSONとして解釈できない場合に送出される
+    :return: JSONオブジェクト
+    :rtype: dict
+    """
+    return self._response.json()
+
+  def raise_for_status(self):
+    """エラーのステータスコードの場合に例外を送出
+
+    :raises requests.exceptions.HTTPError: ステータスコードが4xx/5xxの場合に送出される
+    """
+    if 400 <= self.status_code < 600:
+      import requests
+      kind = 'Client' if self.status_code < 500 else 'Server'
+      raise requests.exceptions.HTTPError('{} {} Error: {} for url: {}'.format(self.status_code, kind, self.reason, self.url), response=self)
+
+
+class HTTP2Transport(Transport):
+  """httpxのHTTP/2で送信するトランスポート
+
+  ホスト毎に1つのコネクションで並行するリクエストを多重化します。
+  スレッドセーフなため、複数のクライアントで共有してください。
+  httpxのHTTP/2サポートが必要です(pip install 'httpx[http2]')。
+
+  >>> factory = AirtableClientFactory(base_id='XXX', api_key='XXX', transport='http2')
+
+  :param Transport: Transportを継承
+  :type Transport: Transport
+  """
+  def __init__(self, max_connections=10):
+    """コンストラクタ
+
+    :param max_connections: 最大コネクション数, defaults to 10
+    :type max_connections: int, optional
+    :raises ImportError: httpxのHTTP/2サポートがインストールされていない場合に送出される
+    """
+    try:
+      import httpx
+      import h2  # noqa: F401
+    except ImportError as exc:
+      raise ImportError("HTTP2Transport requires 'httpx[http2]'. Please install it with \"pip install 'httpx[http2]'\".") from exc
+    self._httpx = httpx
+    self.client = httpx.Client(http2=True, limits=httpx.Limits(max_connections=max_connections))
+    pass
+
+  def request(self, method, url, params=None, json_data=None, timeout=None, headers=None):
+    """HTTPリクエスト送信
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param url: リクエストURL
+    :type url: string
+    :param params: リクエストパラメータオブジェクト, defaults to None
+    :type params: dict, optional
+    :param json_data: リクエストJSONデータオブジェクト, defaults to None
+    :type json_data: dict, optional
+    :param timeout: (接続タイムアウト, 読み込みタイムアウト), defaults to None
+    :type timeout: tuple, optional
+    :param headers: リクエストヘッダー, defaults to None
+    :type headers: dict, optional
+    :raises requests.exceptions.Timeout: タイムアウトした場合に送出される
+    :raises requests.exceptions.ConnectionError: 接続に失敗した場合に送出される
+    :return: レスポンスオブジェクト
+    :rtype: HTTP2Response
+    """
+    import requests
+    httpx = self._httpx
+    if isinstance(timeout, tuple):
+      timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+    try:
+      response = self.client.request(method.upper(), url, params=params, json=json_data, timeout=timeout, headers=headers)
+    except httpx.TimeoutException as exc:
+      raise requests.exceptions.Timeout(str(exc)) from exc
+    except httpx.TransportError as exc:
+      raise requests.exceptions.ConnectionError(str(exc)) from exc
+    return HTTP2Response(response)
+
+  def close(self):
+    """コネクションを閉じる
+    """
+    self.client.close()
+
+
+def _request_key(method, url, params=None, json_data=None):
+  """リクエストを照合するためのキーを取得
+
+  :param method: HTTPメソッド
+  :type method: string
+  :param url: リクエストURL
+  :type url: string
+  :param params: リクエストパラメータオブジェクト, defaults to None
+  :type params: dict, optional
+  :param json_data: リクエストJSONデータオブジェクト, defaults to None
+  :type json_data: dict, optional
+  :return: キー
+  :rtype: string
+  """
+  normalized = sorted((str(k), [str(v) for v in (value if isinstance(value, (list, tuple)) else [value])]) for k, value in (params or {}).items())
+  return json.dumps([method.lower(), url, normalized, json_data], sort_keys=True, ensure_ascii=False)
+
+
+class RecordingTransport(Transport):
+  """リクエスト・レスポンスをファイルに記録するトランスポート
+
+  内部のトランスポートで送信し、リクエスト(メソッド, URL, パラメータ, JSONデータ)とレスポンス(ステータスコード, ヘッダー, ボディ)、
+  所要時間を1行1件のJSONとして記録します。ページングのoffsetはパラメータとして記録されます。
+  APIキーを含むリクエストヘッダーは記録しません。
+
+  >>> transport = RecordingTransport('cassette.jsonl')
+  >>> client = AirtableClient('XXX', 'TABLE', 'XXX', transport=transport)
+  >>> client.get_all()
+  >>> transport.close()
+
+  :param Transport: Transportを継承
+  :type Transport: Transport
+  """
+  def __init__(self, path, transport=None):
+    """コンストラクタ
+
+    :param path: 記録先のファイルパス(既存のファイルは上書き)
+    :type path: string
+    :param transport: 送信に使用するトランスポート, defaults to None ※未指定の場合はRequestsTransport
+    :type transport: Transport, optional
+    """
+    self.path = path
+    self.transport = transport or RequestsTransport()
+    self._file = open(path, 'w', encoding='utf-8')
+    self._lock = threading.Lock()
+    pass
+
+  def request(self, method, url, params=None, json_data=None, timeout=None, headers=None):
+    """HTTPリクエストを送信して記録
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param url: リクエストURL
+    :type url: string
+    :param params: リクエストパラメータオブジェクト, defaults to None
+    :type params: dict, optional
+    :param json_data: リクエストJSONデータオブジェクト, defaults to None
+    :type json_data: dict, optional
+    :param timeout: (接続タイムアウト, 読み込みタイムアウト), defaults to None
+    :type timeout: tuple, optional
+    :param headers: リクエストヘッダー, defaults to None
+    :type headers: dict, optional
+    :return: レスポンスオブジェクト
+    :rtype: requests.Response
+    """
+    started = time.monotonic()
+    response = self.transport.request(method, url, params=params, json_data=json_data, timeout=timeout, headers=headers)
+    entry = {
+      'method': method.lower(),
+      'url': url,
+      'params': params,
+      'json': json_data,
+      'elapsed': time.monotonic() - started,
+      'status_code': response.status_code,
+      'reason': getattr(response, 'reason', None),
+      'response_url': response.url,
+      'headers': dict(response.headers),
+      'body': response.text
+    }
+    line = json.dumps(entry, ensure_ascii=False) + '\n'
+    with self._lock:
+      self._file.write(line)
+      self._file.flush()
+    return response
+
+  def close(self):
+    """記録先のファイルと内部のトランスポートを閉じる
+    """
+    with self._lock:
+      self._file.close()
+    self.transport.close()
+
+
+class ReplayTransport(Transport):
+  """記録したファイルからレスポンスを再生するトランスポート
+
+  RecordingTransportで記録したファイルを読み込み、メソッド・URL・パラメータ・JSONデータが一致するレスポンスを返却します。
+  同じリクエストが複数記録されている場合は記録順に返却し、使い切った後は最後のレスポンスを繰り返し返却します。
+  latencyで応答までの待ち時間を再現できます。
+
+  - None: 待たない
+  - 'recorded': 記録時の所要時間
+  - 数値: 固定の秒数
+  - 関数: 記録内容のdictを受け取り、秒数を返却する関数
+
+  >>> transport = ReplayTransport('cassette.jsonl', latency='recorded')
+  >>> client = AirtableClient('XXX', 'TABLE', 'dummy', transport=transport)
+  >>> client.get_all()
+
+  :param Transport: Transportを継承
+  :type Transport: Transport
+  """
+  def __init__(self, path, latency=None):
+    """コンストラクタ
+
+    :param path: 記録したファイルのパス
+    :type path: string
+    :param latency: 応答までの待ち時間, defaults to None
+    :type latency: string|float|function, optional
+    """
+    self.path = path
+    self.latency = latency
+    self._entries = {}
+    self._lock = threading.Lock()
+    with open(path, 'r', encoding='utf-8') as f:
+      for line in f:
+        if not line.strip():
+          continue
+        entry = json.loads(line)
+        key = _request_key(entry['method'], entry['url'], entry['params'], entry['json'])
+        self._entries.setdefault(key, collections.deque()).append(entry)
+    pass
+
+  def _delay(self, entry):
+    """応答までの待ち時間を取得
+
+    :param entry: 記録内容
+    :type entry: dict
+    :return: 秒数
+    :rtype: float
+    """
+    if self.latency is None:
+      return 0
+    if self.latency == 'recorded':
+      return entry.get('elapsed') or 0
+    if callable(self.latency):
+      return self.latency(entry)
+    return self.latency
+
+  @classmethod
+  def _make_response(cls, entry):
+    """記録内容からレスポンスオブジェクトを生成
+
+    :param entry: 記録内容
+    :type entry: dict
+    :return: レスポンスオブジェクト
+    :rtype: requests.Response
+    """
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    response = requests.Response()
+    response.status_code = entry['status_code']
+    response.reason = entry.get('reason')
+    response.url = entry.get('response_url') or entry['url']
+    response.headers = CaseInsensitiveDict(entry.get('headers') or {})
+    response.encoding = 'utf-8'
+    response._content = entry['body'].encode('utf-8')
+    return response
+
+  def request(self, method, url, params=None, json_data=None, timeout=None, headers=None):
+    """記録したレスポンスを返却
+
+    :param method: HTTPメソッド
+    :type method: string
+    :param url: リクエストURL
+    :type url: string
+    :param params: リクエストパラメータオブジェクト, defaults to None
+    :type params: dict, optional
+    :param json_data: リクエストJSONデータオブジェクト, defaults to None
+    :type json_data: dict, optional
+    :param timeout: (接続タイムアウト, 読み込みタイムアウト), defaults to None
+    :type timeout: tuple, optional
+    :param headers: リクエストヘッダー(使用しません), defaults to None
+    :type headers: dict, optional
+    :raises AirtableReplayError: 一致するリクエストが記録されていない場合に送出される
+    :raises requests.exceptions.Timeout: 待ち時間が読み込みタイムアウトを超える場合に送出される
+    :return: レスポンスオブジェクト
+    :rtype: requests.Response
+    """
+    key = _request_key(method, url, params, json_data)
+    with self._lock:
+      entries = self._entries.get(key)
+      if not entries:
+        raise AirtableReplayError('No recorded response for {} {} (params={}, json={}).'.format(method.upper(), url, params, json_data))
+      entry = entries.popleft() if len(entries) > 1 else entries[0]
+    delay = self._delay(entry)
+    if delay > 0:
+      read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+      if read_timeout is not None and delay > read_timeout:
+        import requests
+        time.sleep(read_timeout)
+        raise requests.exceptions.Timeout('Replayed response exceeded the read timeout of {} seconds.'.format(read_timeout))
+      time.sleep(delay)
+    return self._make_response(entry)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""Webhookによる変更の通知
+
+AirtableのWebhookのペイロードを読み込み、レコードの登録・更新・削除をレコードID単位の変更として通知します。
+変更を受け取ったキャッシュ(AirtableLoaderなど)は、関係する検索結果のみを破棄できます。
+
+Airtableからの通知(notificationUrlへのPOST)には変更内容が含まれないため、通知を受けてペイロードAPIをカーソル位置から読み込みます。
+通知の受信方法は自由です。AirtableWebhookReceiverでローカルにHTTPサーバーを起動するか、
+既存のWebアプリケーションからAirtableWebhook.handle_notificationを呼び出してください。
+通知を受信できない環境では、一定間隔でペイロードを読み込むこともできます。
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import posixpath
+import threading
+import traceback
+
+
+class AirtableChange(object):
+  """レコードの変更クラス
+
+  :param object: objectを継承
+  :type object: object
+  """
+  CREATED = 'created'
+  UPDATED = 'updated'
+  DELETED = 'deleted'
+
+  def __init__(self, kind, table_id, record_id, transaction=None, timestamp=None):
+    """コンストラクタ
+
+    :param kind: 変更の種類('created'/'updated'/'deleted')
+    :type kind: string
+    :param table_id: テーブルID
+    :type table_id: string
+    :param record_id: レコードID
+    :type record_id: string
+    :param transaction: ベースのトランザクション番号, defaults to None
+    :type transaction: int, optional
+    :param timestamp: 変更日時, defaults to None
+    :type timestamp: string, optional
+    """
+    self.kind = kind
+    self.table_id = table_id
+    self.record_id = record_id
+    self.transaction = transaction
+    self.timestamp = timestamp
+    pass
+
+  def __repr__(self):
+    return 'AirtableChange({!r}, {!r}, {!r})'.format(self.kind, self.table_id, self.record_id)
+
+
+class AirtableWebhook(object):
+  """Webhookのペイロードの読み込みクラス
+
+  カーソル位置から未読のペイロードを読み込み、変更を登録された関数に通知します。
+  cursor_pathを指定した場合は、読み込んだカーソル位置をファイルに保存し、再起動後はその位置から読み込みます。
+  startで起動したスレッドでの読み込みに失敗した場合、その例外をlast_errorで参照できます。
+
+  >>> webhook = AirtableWebhook(client, 'achXXX', table_id='tblXXX', cursor_path='webhook.cursor')
+  >>> webhook.attach(loader)
+  >>> webhook.start(interval=60)
+
+  :param object: objectを継承
+  :type object: object
+  """
+  _FIRST_CURSOR = 1
+  _MAC_HEADER = 'X-Airtable-Content-MAC'
+  _MAC_PREFIX = 'hmac-sha256='
+
+  def __init__(self, client, webhook_id, table_id=None, cursor=None, cursor_path=None, mac_secret=None, api_url=None):
+    """コンストラクタ
+
+    :param client: ペイロードの読み込みに使用するAirtableクライアント(Webhookと同じベース)
+    :type client: AirtableClient
+    :param webhook_id: WebhookのID
+    :type webhook_id: string
+    :param table_id: 通知対象とするテーブルID, defaults to None ※未指定の場合は全テーブル
+    :type table_id: string, optional
+    :param cursor: 読み込みを開始するカーソル位置, defaults to None ※未指定の場合はcursor_pathの値または1
+    :type cursor: int, optional
+    :param cursor_path: カーソル位置を保存するファイルパス, defaults to None
+    :type cursor_path: string, optional
+    :param mac_secret: 通知の署名を検証するためのmacSecretBase64, defaults to None ※未指定の場合は検証しない
+    :type mac_secret: string, optional
+    :param api_url: APIのURL, defaults to None ※未指定の場合はクライアントのAPIのURL
+    :type api_url: string, optional
+    """
+    self.client = client
+    self.webhook_id = webhook_id
+    self.table_id = table_id
+    self.cursor_path = cursor_path
+    self.mac_secret = base64.b64decode(mac_secret) if mac_secret else None
+    self.api_url = api_url or client._API_URL
+    self.cursor = cursor or self._load_cursor() or self._FIRST_CURSOR
+    self._callbacks = []
+    self._poll_lock = threading.Lock()
+    self._notified = threading.Event()
+    self._stopped = threading.Event()
+    self._thread = None
+    self.last_error = None
+    pass
+
+  @property
+  def payloads_url(self):
+    """ペイロードAPIのURLのgetter
+
+    :return: ペイロードAPIのURL
+    :rtype: string
+    """
+    return posixpath.join(self.api_url, 'bases', self.client.base_id, 'webhooks', self.webhook_id, 'payloads')
+
+  def _load_cursor(self):
+    """保存されたカーソル位置を読み込み
+
+    :return: カーソル位置(保存されていない場合はNone)
+    :rtype: int
+    """
+    if not self.cursor_path or not os.path.isfile(self.cursor_path):
+      return None
+    with open(self.cursor_path, 'r') as f:
+      value = f.read().strip()
+    return int(value) if value else None
+
+  def _save_cursor(self):
+    """カーソル位置を保存
+    """
+    if not self.cursor_path:
+      return
+    tmp_path = self.cursor_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+      f.write(str(self.cursor))
+    os.replace(tmp_path, self.cursor_path)
+
+  def subscribe(self, callback):
+    """変更を通知する関数を登録
+
+    関数はペイロードのページ毎に、AirtableChangeのリストを引数として呼び出されます。
+
+    :param callback: 変更を通知する関数
+    :type callback: function
+    """
+    self._callbacks.append(callback)
+
+  def attach(self, loader):
+    """変更に応じてAirtableLoaderの検索結果を破棄するように登録
+
+    :param loader: 検索結果を破棄するローダー
+    :type loader: AirtableLoader
+    """
+    self.subscribe(lambda changes: loader.invalidate(change.record_id for change in changes))
+
+  def parse_payload(self, payload):
+    """ペイロードからレコードの変更を取り出す
+
+    :param payload: ペイロード
+    :type payload: dict
+    :return: 変更のリスト
+    :rtype: list
+    """
+    changes = []
+    transaction = payload.get('baseTransactionNumber')
+    timestamp = payload.get('timestamp')
+    for table_id, table in (payload.get('changedTablesById') or {}).items():
+      if self.table_id and table_id != self.table_id:
+        continue
+      for record_id in table.get('createdRecordsById') or {}:
+        changes.append(AirtableChange(AirtableChange.CREATED, table_id, record_id, transaction, timestamp))
+      for record_id in table.get('changedRecordsById') or {}:
+        changes.append(AirtableChange(AirtableChange.UPDATED, table_id, record_id, transaction, timestamp))
+      for record_id in table.get('destroyedRecordIds') or []:
+        changes.append(AirtableChange(AirtableChange.DELETED, table_id, record_id, transaction, timestamp))
+    return changes
+
+  def poll(self, deadline=None):
+    """未読のペイロードを全て読み込み、変更を通知
+
+    ページ毎に登録された関数を呼び出してからカーソル位置を進めるため、関数で例外が発生した場合はそのページを再度読み込みます。
+    複数のスレッドから呼び出した場合は順に実行されます。
+
+    :param deadline: 読み込みにかける時間の上限(秒数またはDeadline), defaults to None
+    :type deadline: float|Deadline, optional
+    :return: 読み込んだ変更のリスト
+    :rtype: list
+    """
+    from .airtable import Deadline
+    deadline = Deadline.make(deadline)
+    all_changes = []
+    with self._poll_lock:
+      while True:
+        r = self.client._request('get', self.payloads_url, params={'cursor': self.cursor}, deadline=deadline)
+        changes = []
+        for payload in r.get('payloads', []):
+          changes.extend(self.parse_payload(payload))
+        if changes:
+          for callback in self._callbacks:
+            callback(changes)
+          all_changes.extend(changes)
+        if r.get('cursor') is not None and r['cursor'] != self.cursor:
+          self.cursor = r['cursor']
+          self._save_cursor()
+        if not r.get('mightHaveMore'):
+          break
+    return all_changes
+
+  def verify(self, body, headers):
+    """通知の署名を検証
+
+    :param body: 通知のリクエストボディ
+    :type body: bytes
+    :param headers: 通知のリクエストヘッダー
+    :type headers: dict
+    :return: 署名が正しい(またはmac_secretが未指定の)場合はTrue
+    :rtype: bool
+    """
+    if self.mac_secret is None:
+      return True
+    signature = None
+    for name, value in (headers or {}).items():
+      if name.lower() == self._MAC_HEADER.lower():
+        signature = value
+    if not signature or not signature.startswith(self._MAC_PREFIX):
+      return False
+    expected = hmac.new(self.mac_secret, body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len(self._MAC_PREFIX):])
+
+  def handle_notification(self, body, headers=None):
+    """Airtableからの通知を処理
+
+    署名を検証し、ペイロードの読み込みを要求します。読み込みはstartで起動したスレッドで行われます。
+    (スレッドを起動していない場合は、このメソッドの中で読み込みます。)
+
+    :param body: 通知のリクエストボディ
+    :type body: bytes
+    :param headers: 通知のリクエストヘッダー, defaults to None
+    :type headers: dict, optional
+    :return: 通知を受け付けた場合はTrue、署名またはWebhookのIDが一致しない場合はFalse
+    :rtype: bool
+    """
+    if not self.verify(body, headers):
+      return False
+    try:
+      notification = json.loads(body.decode('utf-8')) if body else {}
+    except ValueError:
+      return False
+    webhook_id = (notification.get('webhook') or {}).get('id')
+    if webhook_id and webhook_id != self.webhook_id:
+      return False
+    if self._thread is None:
+      self.poll()
+    else:
+      self._notified.set()
+    return True
+
+  def start(self, interval=None):
+    """ペイロードを読み込むスレッドを起動
+
+    通知を受けた場合と、intervalを指定した場合はinterval秒毎にペイロードを読み込みます。
+    読み込み中(登録された関数を含む)の例外はlast_errorに保持し、スレッドを停止せずに次の読み込みで再試行します。
+    デバッグモードの場合は例外のトレースバックを出力します。
+
+    :param interval: 定期的に読み込む間隔(秒), defaults to None ※未指定の場合は通知を受けた場合のみ
+    :type interval: float, optional
+    """
+    if self._thread is not None:
+      return
+    self._stopped.clear()
+
+    def run():
+      while not self._stopped.is_set():
+        self._notified.wait(interval)
+        self._notified.clear()
+        if self._stopped.is_set():
+          break
+        try:
+          self.poll()
+          self.last_error = None
+        except Exception as e:
+          self.last_error = e
+          if self.client.debug:
+            traceback.print_exc()
+
+    self._thread = threading.Thread(target=run, daemon=True)
+    self._thread.start()
+    if interval:
+      self._notified.set()
+
+  def stop(self):
+    """ペイロードを読み込むスレッドを停止
+    """
+    if self._thread is None:
+      return
+    self._stopped.set()
+    self._notified.set()
+    self._thread.join()
+    self._thread = None
+
+
+class AirtableWebhookReceiver(object):
+  """Webhookの通知を受信するHTTPサーバー
+
+  notificationUrlへのPOSTを受信し、AirtableWebhook.handle_notificationに渡します。
+  TLSの終端やインターネットへの公開はリバースプロキシ等で行ってください。
+
+  >>> receiver = AirtableWebhookReceiver(webhook, host='0.0.0.0', port=8080)
+  >>> receiver.start()
+
+  :param object: objectを継承
+  :type object: object
+  """
+  def __init__(self, webhook, host='127.0.0.1', port=0, path='/'):
+    """コンストラクタ
+
+    :param webhook: 通知を渡すWebhook
+    :type webhook: AirtableWebhook
+    :param host: 待ち受けるホスト, defaults to '127.0.0.1'
+    :type host: string, optional
+    :param port: 待ち受けるポート(0の場合は空いているポート), defaults to 0
+    :type port: int, optional
+    :param path: 通知を受け付けるパス, defaults to '/'
+    :type path: string, optional
+    """
+    self.webhook = webhook
+    self.path = path
+    self._server = _make_server((host, port), self)
+    self._thread = None
+    pass
+
+  @property
+  def url(self):
+    """通知を受け付けるURLのgetter
+
+    :return: URL
+    :rtype: string
+    """
+    host, port = self._server.server_address[:2]
+    return 'http://{}:{}{}'.format(host, port, self.path)
+
+  def start(self):
+    """受信を開始
+
+    ペイロードを読み込むスレッドも起動します。
+    """
+    self.webhook.start()
+    self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    """受信を停止
+    """
+    self._server.shutdown()
+    self._server.server_close()
+    if self._thread is not None:
+      self._thread.join()
+      self._thread = None
+    self.webhook.stop()
+
+
+def _make_server(address, receiver):
+  """通知を受信するHTTPサーバーを生成
+
+  インポート時にhttp.serverを読み込まないように、サーバーの生成時にクラスを定義しています。
+
+  :param address: (ホスト, ポート)
+  :type address: tuple
+  :param receiver: 通知を渡すレシーバー
+  :type receiver: AirtableWebhookReceiver
+  :return: HTTPサーバー
+  :rtype: http.server.HTTPServer
+  """
+  from http.server import HTTPServer, BaseHTTPRequestHandler
+  from socketserver import ThreadingMixIn
+
+  class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+  class NotificationHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+      if self.path.split('?')[0] != receiver.path:
+        self.send_response(404)
+        self.end_headers()
+        return
+      body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+      accepted = receiver.webhook.handle_notification(body, dict(self.headers.items()))
+      self.send_response(204 if accepted else 401)
+      self.end_headers()
+
+    def log_message(self, format, *args):
+      if receiver.webhook.client.debug:
+        BaseHTTPRequestHandler.log_message(self, format, *args)
+
+  return ThreadingHTTPServer(address, NotificationHandler)
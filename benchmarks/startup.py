@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""起動コストのベンチマーク
+
+airtableパッケージのインポート時間と、クライアントの生成時間を計測します。
+インポート時間は毎回新しいPythonプロセスで計測し、インポートで新たに読み込まれたモジュールも表示します。
+ネットワークには接続しません。
+
+  $ python benchmarks/startup.py --repeat 10 --clients 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import json
+import sys
+import time
+before = set(sys.modules)
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(set(sys.modules) - before)}}))
+"""
+
+
+def measure_import(module, repeat):
+  """新しいプロセスでモジュールのインポート時間を計測
+
+  :param module: モジュール名
+  :type module: string
+  :param repeat: 計測回数
+  :type repeat: int
+  :return: (インポート時間のリスト, インポートで新たに読み込まれたモジュール名のリスト)
+  :rtype: tuple
+  """
+  env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+  timings = []
+  modules = []
+  for _ in range(repeat):
+    output = json.loads(subprocess.check_output([sys.executable, '-c', IMPORT_SNIPPET.format(module=module)], env=env, universal_newlines=True))
+    timings.append(output['elapsed'])
+    modules = output['modules']
+  return timings, modules
+
+
+def measure_construct(clients):
+  """ファクトリでのクライアントの生成時間を計測
+
+  :param clients: 生成するクライアント数
+  :type clients: int
+  :return: 1クライアントあたりの生成時間(秒)
+  :rtype: float
+  """
+  sys.path.insert(0, ROOT)
+  from airtable import AirtableClientFactory
+  factory = AirtableClientFactory(base_id='appBENCHMARK', api_key='keyBENCHMARK')
+  started = time.perf_counter()
+  for i in range(clients):
+    factory.create('Table {}'.format(i))
+  return (time.perf_counter() - started) / clients
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Measure the import and client construction cost of the airtable package.')
+  parser.add_argument('--repeat', type=int, default=10, help='number of fresh interpreters used to measure import time')
+  parser.add_argument('--clients', type=int, default=1000, help='number of clients to construct')
+  parser.add_argument('--modules', action='store_true', help='list every module loaded by the import')
+  args = parser.parse_args()
+
+  for module in ('airtable', 'airtable.airtable'):
+    timings, modules = measure_import(module, args.repeat)
+    print('import {:<18} median {:7.2f} ms  min {:7.2f} ms  modules loaded: {}  requests loaded: {}'.format(
+      module, statistics.median(timings) * 1000, min(timings) * 1000, len(modules), 'requests' in modules))
+    print('  airtable modules: {}'.format(', '.join(name for name in modules if name.split('.')[0] == 'airtable')))
+    if args.modules:
+      print('  all modules: {}'.format(', '.join(modules)))
+  print('construct client        {:7.2f} us/client'.format(measure_construct(args.clients) * 1000000))
+
+
+if __name__ == '__main__':
+  main()
@@ -10,6 +10,8 @@ with open(os.path.join(here, "airtable", "__version__.py"), mode="r") as f:
 setup_requires = ["pytest-runner"]
 install_requires = ["requests>=2"]
 tests_require = ["requests-mock", "requests", "mock"]
+extras_require = {"http2": ["httpx[http2]"], "parquet": ["pyarrow"]}
+entry_points = {"console_scripts": ["airtable-client=airtable.cli:main"]}
 
 setup(
     name=about["__name__"],
@@ -22,6 +24,8 @@ setup(
     setup_requires=setup_requires,
     install_requires=install_requires,
     tests_require=tests_require,
+    extras_require=extras_require,
+    entry_points=entry_points,
     python_requires="!=2.7.*, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*",
     keywords=["airtable", "api"],
     license=about["__license__"],
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+import pytest
+
+from airtable.transport import ReplayTransport, Transport
+
+
+class StubTransport(Transport):
+  """handle(method, url, params, json_data)の返却値((ステータスコード, ボディ)またはボディ)を応答するトランスポート"""
+  def __init__(self, handle):
+    self.handle = handle
+    self.requests = []
+    self._lock = threading.Lock()
+
+  def request(self, method, url, params=None, json_data=None, timeout=None, headers=None):
+    with self._lock:
+      self.requests.append({'method': method, 'url': url, 'params': params, 'json': json_data})
+    result = self.handle(method, url, params, json_data)
+    status_code, body = result if isinstance(result, tuple) else (200, result)
+    return ReplayTransport._make_response({'status_code': status_code, 'reason': None, 'url': url, 'body': json.dumps(body)})
+
+
+@pytest.fixture
+def stub_transport():
+  """StubTransportを生成する関数"""
+  return StubTransport
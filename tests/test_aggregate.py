@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import pytest
+import requests_mock
+
+from airtable.airtable import AirtableClient
+
+URL = 'https://api.airtable.com/v0/appXXX/Table'
+
+
+def test_count_fetches_only_the_given_field():
+  client = AirtableClient('appXXX', 'Table', 'keyXXX')
+  with requests_mock.Mocker() as m:
+    m.get(URL, [
+      {'json': {'records': [{'id': 'rec1', 'fields': {'Name': 'a'}}], 'offset': 'page2'}},
+      {'json': {'records': [{'id': 'rec2', 'fields': {'Name': 'b'}}]}},
+    ])
+    assert client.count(field='Name') == 2
+    queries = [request.qs for request in m.request_history]
+
+  assert all(query['fields'] == ['name'] for query in queries)
+
+
+def test_count_without_field_does_not_fetch_every_field():
+  client = AirtableClient('appXXX', 'Table', 'keyXXX')
+  with requests_mock.Mocker() as m:
+    with pytest.raises(ValueError):
+      client.count()
+    assert not m.request_history
+
+
+def test_aggregate_groups_and_sums_requested_fields():
+  client = AirtableClient('appXXX', 'Table', 'keyXXX')
+  records = [
+    {'id': 'rec1', 'fields': {'Region': 'East', 'Amount': 10}},
+    {'id': 'rec2', 'fields': {'Region': 'East', 'Amount': 5}},
+    {'id': 'rec3', 'fields': {'Region': 'West'}},
+  ]
+  with requests_mock.Mocker() as m:
+    m.get(URL, json={'records': records})
+    result = client.aggregate(group_by='Region', sum='Amount')
+    query = m.request_history[0].qs
+
+  assert sorted(query['fields']) == ['amount', 'region']
+  assert result == {'East': {'count': 2, 'sum': {'Amount': 15}}, 'West': {'count': 1, 'sum': {'Amount': 0}}}
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import pytest
+
+from airtable.attachments import AirtableAttachmentDownloader
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+  daemon_threads = True
+  request_queue_size = 64
+
+
+@pytest.fixture
+def files():
+  """/{名前}でファイルを返却し、同時にダウンロードされている数の最大値を記録するサーバー"""
+  state = {'files': {}, 'active': 0, 'max_active': 0, 'requests': 0}
+  lock = threading.Lock()
+
+  class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+      pass
+
+    def do_GET(self):
+      body = state['files'].get(self.path.lstrip('/'))
+      with lock:
+        state['requests'] += 1
+        state['active'] += 1
+        state['max_active'] = max(state['max_active'], state['active'])
+      try:
+        time.sleep(0.05)
+        if body is None:
+          self.send_response(404)
+          self.end_headers()
+          return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+      finally:
+        with lock:
+          state['active'] -= 1
+
+  httpd = _Server(('127.0.0.1', 0), Handler)
+  threading.Thread(target=httpd.serve_forever, daemon=True).start()
+  state['url'] = 'http://127.0.0.1:{}/'.format(httpd.server_address[1])
+  yield state
+  httpd.shutdown()
+  httpd.server_close()
+
+
+def _records(files, count):
+  records = []
+  for n in range(count):
+    name = 'file{}'.format(n)
+    files['files'][name] = os.urandom(1000 + n)
+    files['files'][name + '_small'] = b'thumb'
+    attachment = {'id': 'att{}'.format(n), 'url': files['url'] + name, 'filename': 'photo.jpg', 'size': 1000 + n,
+                  'thumbnails': {'small': {'url': files['url'] + name + '_small'}}}
+    records.append({'id': 'rec{}'.format(n), 'fields': {'Photos': [attachment], 'Name': 'x'}})
+  return records
+
+
+def test_downloads_in_parallel_and_skips_existing_files(files, tmp_path):
+  records = _records(files, 12)
+  records.append({'id': 'recMissing', 'fields': {'Photos': [{'id': 'attMissing', 'url': files['url'] + 'missing', 'filename': 'a.jpg'}]}})
+  downloader = AirtableAttachmentDownloader(str(tmp_path), thumbnails=['small'], max_workers=4, chunk_size=100)
+
+  result = downloader.download(records)
+
+  assert result['downloaded'] == 24
+  assert [info['id'] for info, _ in result['errors']] == ['attMissing']
+  assert 1 < files['max_active'] <= 4
+  with open(os.path.join(str(tmp_path), 'rec3', 'att3_photo.jpg'), 'rb') as f:
+    assert f.read() == files['files']['file3']
+  with open(os.path.join(str(tmp_path), 'rec3', 'att3_small_photo.jpg'), 'rb') as f:
+    assert f.read() == b'thumb'
+  assert not [name for _, _, names in os.walk(str(tmp_path)) for name in names if name.endswith('.part')]
+
+  requests_before = files['requests']
+  result = downloader.download(records[:12])
+  assert result == {'downloaded': 0, 'skipped': 24, 'errors': []}
+  assert files['requests'] == requests_before
+
+
+def test_streams_chunks_to_a_callable(files):
+  records = _records(files, 2)
+  received = {}
+
+  def destination(info, chunks):
+    received[info['id']] = [len(chunk) for chunk in chunks]
+    assert max(received[info['id']]) <= 256
+
+  result = AirtableAttachmentDownloader(destination, fields=['Photos'], chunk_size=256).download(records)
+
+  assert result['downloaded'] == 2
+  assert {id: sum(sizes) for id, sizes in received.items()} == {'att0': 1000, 'att1': 1001}
+  assert all(len(sizes) > 1 for sizes in received.values())
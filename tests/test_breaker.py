@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from airtable import AirtableClientFactory, CircuitBreaker, CircuitState
+from airtable.airtable import AirtableClient
+
+
+@pytest.mark.parametrize('value', [None, False])
+def test_factory_disabled_circuit_breaker(value):
+  client = AirtableClientFactory(base_id='appXXX', api_key='keyXXX', circuit_breaker=value).create('Table')
+  assert client.circuit_breaker is None
+
+
+def test_factory_shares_circuit_breaker_per_base():
+  factory = AirtableClientFactory(base_id='appXXX', api_key='keyXXX', circuit_breaker={'failure_threshold': 2})
+  client = factory.create('Table')
+  assert client.circuit_breaker is factory.create('Other').circuit_breaker
+  assert client.circuit_breaker.failure_threshold == 2
+
+
+def test_factory_rejects_circuit_breaker_instance():
+  with pytest.raises(ValueError):
+    AirtableClientFactory(base_id='appXXX', api_key='keyXXX', circuit_breaker=CircuitBreaker())
+
+
+class _InterruptedTransport(object):
+  def request(self, method, url, **kwargs):
+    raise KeyboardInterrupt()
+
+
+def _half_open_breaker():
+  breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+  breaker.record_failure(breaker.acquire())
+  time.sleep(0.06)
+  assert breaker.state is CircuitState.HALF_OPEN
+  return breaker
+
+
+def test_interrupted_probe_releases_its_slot():
+  breaker = _half_open_breaker()
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', circuit_breaker=breaker, transport=_InterruptedTransport())
+
+  with pytest.raises(KeyboardInterrupt):
+    client.get()
+
+  breaker.release(breaker.acquire())
+
+
+def test_late_failure_from_before_open_is_ignored():
+  breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+  late = breaker.acquire()
+  breaker.record_failure(breaker.acquire())
+  time.sleep(0.06)
+  probe = breaker.acquire()
+
+  breaker.record_failure(late)
+  assert breaker.state is CircuitState.HALF_OPEN
+  breaker.record_success(0.01, probe)
+  assert breaker.state is CircuitState.CLOSED
+
+
+def test_late_success_from_before_open_is_ignored():
+  breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+  late = breaker.acquire()
+  breaker.record_failure(breaker.acquire())
+
+  breaker.record_success(0.01, late)
+  assert breaker.state is CircuitState.OPEN
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import csv
+
+import pytest
+import requests_mock
+
+from airtable.cli import main
+
+URL = 'https://api.airtable.com/v0/appXXX/Table'
+RECORDS = [
+  {'id': 'rec1', 'createdTime': '2020-01-01T00:00:00.000Z', 'fields': {
+    'Name': 'a', 'Count': 3, 'Done': True, 'Tags': ['x', 'y'], 'Owner': ['recUSR'],
+    'Photo': [{'id': 'att1', 'url': 'https://example.com/a.png', 'filename': 'a.png', 'size': 3}]}},
+]
+COMMON = ['--base-id', 'appXXX', '--table', 'Table', '--api-key', 'keyXXX', '--quiet']
+
+
+def test_csv_export_then_import_with_typecast(tmp_path):
+  path = str(tmp_path / 'table.csv')
+  with requests_mock.Mocker() as m:
+    m.get(URL, json={'records': RECORDS})
+    assert main(['export', '--output', path] + COMMON) == 0
+
+    m.post(URL, json=lambda request, context: {'records': [dict(record, id='recNEW') for record in request.json()['records']]})
+    assert main(['import', '--input', path, '--typecast', '--json-fields', 'Tags', 'Owner', 'Photo'] + COMMON) == 0
+    body = m.request_history[-1].json()
+
+  assert body['typecast'] is True
+  assert body['records'] == [{'fields': {
+    'Name': 'a', 'Count': '3', 'Done': 'True', 'Tags': ['x', 'y'], 'Owner': ['recUSR'],
+    'Photo': [{'url': 'https://example.com/a.png', 'filename': 'a.png'}]}}]
+
+
+def test_csv_export_keeps_fields_first_seen_on_a_later_page(tmp_path):
+  path = str(tmp_path / 'table.csv')
+  with requests_mock.Mocker() as m:
+    m.get(URL, [
+      {'json': {'records': [{'id': 'rec1', 'createdTime': 't', 'fields': {'Name': 'a'}}], 'offset': 'page2'}},
+      {'json': {'records': [{'id': 'rec2', 'createdTime': 't', 'fields': {'Name': 'b', 'Note': 'sparse'}}]}},
+    ])
+    assert main(['export', '--output', path] + COMMON) == 0
+
+  with open(path, newline='') as f:
+    rows = list(csv.DictReader(f))
+  assert [row['Note'] for row in rows] == ['', 'sparse']
+
+
+def test_csv_import_reads_text_as_text_unless_marked_json(tmp_path):
+  path = str(tmp_path / 'table.csv')
+  with open(path, 'w', newline='') as f:
+    f.write('Name,Tags\n"[1, 2]","[""x""]"\n')
+  with requests_mock.Mocker() as m:
+    m.post(URL, json=lambda request, context: {'records': [dict(record, id='recNEW') for record in request.json()['records']]})
+    assert main(['import', '--input', path, '--json-fields', 'Tags'] + COMMON) == 0
+    body = m.request_history[-1].json()
+
+  assert body['records'] == [{'fields': {'Name': '[1, 2]', 'Tags': ['x']}}]
+
+
+def test_parquet_export_keeps_integers_and_sparse_columns(tmp_path):
+  pyarrow = pytest.importorskip('pyarrow')
+  import pyarrow.parquet
+  path = str(tmp_path / 'table.parquet')
+  with requests_mock.Mocker() as m:
+    m.get(URL, [
+      {'json': {'records': [{'id': 'rec1', 'createdTime': 't', 'fields': {'Big': 2 ** 60, 'Mixed': 1}}], 'offset': 'page2'}},
+      {'json': {'records': [{'id': 'rec2', 'createdTime': 't', 'fields': {'Big': 1, 'Mixed': 1.5, 'Note': 'sparse'}}]}},
+    ])
+    assert main(['export', '--output', path] + COMMON) == 0
+
+  table = pyarrow.parquet.read_table(path)
+  assert table.schema.field('Big').type == pyarrow.int64()
+  assert table.schema.field('Mixed').type == pyarrow.float64()
+  assert table.column('Big').to_pylist() == [2 ** 60, 1]
+  assert table.column('Note').to_pylist() == [None, 'sparse']
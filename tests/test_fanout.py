@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from airtable.airtable import AirtableClientFactory
+
+
+def test_results_are_tagged_by_source_and_bases_run_concurrently(stub_transport):
+  # 2つのベースのリクエストが同時に送信されていなければ、Barrierがタイムアウトする
+  barrier = threading.Barrier(2, timeout=5)
+
+  def handle(method, url, params, json_data):
+    base_id = url.split('/')[4]
+    if base_id == 'appBAD':
+      return (404, {'error': {'type': 'NOT_FOUND'}})
+    barrier.wait()
+    return {'records': [{'id': 'rec' + base_id, 'fields': {'formula': params.get('filterByFormula')}}]}
+
+  factory = AirtableClientFactory(api_key='keyXXX', transport=stub_transport(handle))
+  specs = [
+    ('appA', 'Orders', {'formula': 'A'}),
+    {'base_id': 'appB', 'table_name': 'Orders', 'query': {'formula': 'B'}},
+    ('appBAD', 'Orders'),
+  ]
+  results = {result.base_id: result for result in factory.fan_out(specs, max_workers=3)}
+
+  assert sorted(results) == ['appA', 'appB', 'appBAD']
+  for base_id, formula in (('appA', 'A'), ('appB', 'B')):
+    assert results[base_id].table_name == 'Orders'
+    assert results[base_id].query == {'formula': formula}
+    assert results[base_id].error is None
+    assert results[base_id].response.get_list() == [{'id': 'rec' + base_id, 'fields': {'formula': formula}}]
+  assert results['appBAD'].response is None
+  assert results['appBAD'].error.response.status_code == 404
+  assert factory.get_rate_limiter('appA') is not factory.get_rate_limiter('appB')
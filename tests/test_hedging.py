@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import pytest
+
+from airtable.airtable import AirtableClient
+from airtable.hedging import HedgePolicy
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+  daemon_threads = True
+  request_queue_size = 64
+
+
+@pytest.fixture
+def server():
+  """呼び出し毎にhandle(通し番号)を実行するローカルのAPIサーバー"""
+  state = {'handle': None, 'calls': itertools.count(), 'count': 0}
+  lock = threading.Lock()
+
+  class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+      pass
+
+    def do_GET(self):
+      with lock:
+        call = next(state['calls'])
+        state['count'] += 1
+      if not state['handle'](call):
+        self.connection.close()
+        return
+      body = json.dumps({'records': [{'id': 'rec{}'.format(call), 'fields': {}}]}).encode('utf-8')
+      self.send_response(200)
+      self.send_header('Content-Type', 'application/json')
+      self.send_header('Content-Length', str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+  httpd = _Server(('127.0.0.1', 0), Handler)
+  threading.Thread(target=httpd.serve_forever, daemon=True).start()
+  state['url'] = 'http://127.0.0.1:{}/v0/appXXX/Table'.format(httpd.server_address[1])
+  yield state
+  httpd.shutdown()
+  httpd.server_close()
+
+
+def _client(server, delay):
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', hedge=HedgePolicy(default_delay=delay))
+  client.BASE_URL = server['url']
+  return client
+
+
+def test_concurrent_primaries_are_not_capped_and_not_hedged(server):
+  server['handle'] = lambda call: time.sleep(0.2) or True
+  client = _client(server, 0.5)
+
+  started = time.monotonic()
+  with ThreadPoolExecutor(max_workers=12) as executor:
+    list(executor.map(lambda _: client.get(), range(12)))
+  elapsed = time.monotonic() - started
+
+  assert elapsed < 0.45
+  assert server['count'] == 12
+
+
+def test_hedge_is_used_when_primary_fails(server):
+  # 1つ目のリクエストは応答せずに接続を切る
+  server['handle'] = lambda call: call != 0 or (time.sleep(0.3) and False)
+  client = _client(server, 0.05)
+
+  r = client.get()
+
+  assert [record['id'] for record in r.records] == ['rec1']
+  assert server['count'] == 2
+
+
+def test_fast_hedge_beats_slow_primary(server):
+  # 1つ目のリクエストは1秒後に成功する
+  server['handle'] = lambda call: call != 0 or time.sleep(1.0) or True
+  client = _client(server, 0.05)
+
+  started = time.monotonic()
+  r = client.get()
+  elapsed = time.monotonic() - started
+
+  assert elapsed < 0.5
+  assert [record['id'] for record in r.records] == ['rec1']
+  assert server['count'] == 2
+
+
+def test_primary_answering_before_delay_is_not_hedged(server):
+  server['handle'] = lambda call: True
+  client = _client(server, 0.5)
+
+  r = client.get()
+  time.sleep(0.6)
+
+  assert [record['id'] for record in r.records] == ['rec0']
+  assert server['count'] == 1
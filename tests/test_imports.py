@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loaded_modules(code):
+  env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+  snippet = 'import json, sys\nbefore = set(sys.modules)\n' + code + '\nprint(json.dumps(sorted(set(sys.modules) - before)))'
+  return set(json.loads(subprocess.check_output([sys.executable, '-c', snippet], env=env, universal_newlines=True)))
+
+
+def test_import_does_not_load_optional_features():
+  modules = _loaded_modules('import airtable')
+
+  assert {'airtable', 'airtable.airtable'} <= modules
+  for name in ('requests', 'airtable.snapshot', 'airtable.webhooks', 'airtable.transport', 'airtable.pipeline', 'airtable.loader',
+               'airtable.migration', 'gzip', 'mmap', 'hmac', 'http.server', 'concurrent.futures'):
+    assert name not in modules
+
+
+def test_optional_feature_is_loaded_on_first_access():
+  modules = _loaded_modules('from airtable import AirtableSnapshot')
+
+  assert 'airtable.snapshot' in modules
+  assert 'airtable.webhooks' not in modules
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import re
+
+from airtable.airtable import AirtableClient
+
+TABLES = {
+  'Orders': [
+    [{'id': 'recO1', 'fields': {'Customer': ['recC1']}}, {'id': 'recO2', 'fields': {'Customer': ['recC2', 'recC1']}}],
+    [{'id': 'recO3', 'fields': {'Customer': ['recC1', 'recC3']}}, {'id': 'recO4', 'fields': {}}],
+  ],
+  'Customers': {
+    'recC1': {'id': 'recC1', 'fields': {'Account': ['recA1']}},
+    'recC2': {'id': 'recC2', 'fields': {'Account': ['recA1']}},
+    'recC3': {'id': 'recC3', 'fields': {'Account': ['recA2']}},
+  },
+  'Accounts': {
+    'recA1': {'id': 'recA1', 'fields': {'Name': 'a1'}},
+    'recA2': {'id': 'recA2', 'fields': {'Name': 'a2'}},
+  },
+}
+
+
+def _handle(method, url, params, json_data):
+  table = url.rstrip('/').split('/')[-1]
+  if table == 'Orders':
+    page = int(params.get('offset') or 0)
+    body = {'records': [dict(record, fields=dict(record['fields'])) for record in TABLES['Orders'][page]]}
+    if page + 1 < len(TABLES['Orders']):
+      body['offset'] = str(page + 1)
+    return body
+  ids = re.findall(r'RECORD_ID\(\)="(\w+)"', params['filterByFormula'])
+  return {'records': [dict(TABLES[table][id], fields=dict(TABLES[table][id]['fields'])) for id in ids]}
+
+
+def _client(transport, table):
+  client = AirtableClient('appXXX', table, 'keyXXX', transport=transport)
+  client._API_LIMIT = 0
+  return client
+
+
+def test_linked_records_are_loaded_in_batches_per_page(stub_transport):
+  transport = stub_transport(_handle)
+  orders = _client(transport, 'Orders')
+  customers = _client(transport, 'Customers')
+  accounts = _client(transport, 'Accounts')
+
+  r = orders.get_all(include={'Customer': (customers, {'Account': accounts})})
+
+  by_id = {record['id']: record for record in r.records}
+  assert [customer['id'] for customer in by_id['recO2']['included']['Customer']] == ['recC2', 'recC1']
+  assert [customer['id'] for customer in by_id['recO3']['included']['Customer']] == ['recC1', 'recC3']
+  assert by_id['recO4']['included']['Customer'] == []
+  assert by_id['recO3']['included']['Customer'][1]['included']['Account'][0]['fields'] == {'Name': 'a2'}
+
+  # ページ毎に未取得のリンク先を1回の検索でまとめて取得し、取得済みのレコードは再検索しない
+  lookups = [(request['url'].split('/')[-1], re.findall(r'rec\w+', request['params']['filterByFormula'])) for request in transport.requests if 'filterByFormula' in (request['params'] or {})]
+  assert lookups == [
+    ('Customers', ['recC1', 'recC2']),
+    ('Accounts', ['recA1']),
+    ('Customers', ['recC3']),
+    ('Accounts', ['recA2']),
+  ]
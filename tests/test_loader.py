@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from airtable.airtable import AirtableResponse
+from airtable.loader import AirtableLoader
+
+
+class FakeClient(object):
+  """get_allの呼び出しを記録し、failuresが残っている間は失敗するクライアント"""
+  def __init__(self, failures=0):
+    self.failures = failures
+    self.calls = []
+
+  def get_all(self, formula=None, fields=None, view=None):
+    self.calls.append(formula)
+    if self.failures:
+      self.failures -= 1
+      raise ConnectionError('temporary failure')
+    ids = [part.split('"')[1] for part in formula[3:-1].split(',')]
+    return AirtableResponse(records=[{'id': id, 'fields': {}} for id in ids])
+
+
+def test_failed_lookup_is_retried():
+  client = FakeClient(failures=1)
+  loader = AirtableLoader(client)
+
+  with pytest.raises(ConnectionError):
+    loader.find('rec1')
+  r = loader.find('rec1')
+
+  assert r.get_ids() == 'rec1'
+  assert len(client.calls) == 2
+
+
+def test_successful_lookup_is_reused():
+  client = FakeClient()
+  loader = AirtableLoader(client)
+
+  loader.find('rec1')
+  loader.find('rec1')
+
+  assert len(client.calls) == 1
+
+
+def test_cache_is_bounded():
+  client = FakeClient()
+  loader = AirtableLoader(client, cache_size=2)
+
+  futures = [loader.load(id) for id in ['rec1', 'rec2', 'rec3']]
+  loader.dispatch()
+  [future.result() for future in futures]
+  loader.find('rec1')
+
+  assert len(loader._futures) == 2
+  assert len(client.calls) == 2
+
+
+def test_cache_expires(monkeypatch):
+  client = FakeClient()
+  loader = AirtableLoader(client, cache_ttl=10)
+  now = [100.0]
+  monkeypatch.setattr('airtable.loader.time.monotonic', lambda: now[0])
+
+  loader.find('rec1')
+  now[0] += 11
+  loader.find('rec1')
+
+  assert len(client.calls) == 2
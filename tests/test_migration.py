@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+import pytest
+
+from airtable.airtable import AirtableResponse
+from airtable.migration import AirtableIdMap, AirtableTableCopier
+
+
+class FakeTable(object):
+  """メモリ上のテーブル(iter_pages/bulk_insert/bulk_updateのみ)"""
+  max_records_per_request = 2
+
+  def __init__(self, records=None):
+    self.records = {record['id']: record for record in (records or [])}
+    self.ids = ('recD{}'.format(i) for i in itertools.count())
+    self.inserted = 0
+    self.updated = []
+    self.fail_after_insert = False
+
+  def iter_pages(self, formula=None, fields=None, view=None, prefetch=None):
+    records = list(self.records.values())
+    if formula and formula.startswith('NOT('):
+      name = formula[5:formula.index('}')]
+      records = [record for record in records if record['fields'].get(name)]
+    for start in range(0, len(records), 2):
+      yield AirtableResponse(records=records[start:start + 2])
+
+  def bulk_insert(self, fields_list):
+    written = []
+    for fields in fields_list:
+      record = {'id': next(self.ids), 'fields': dict(fields)}
+      self.records[record['id']] = record
+      written.append(record)
+    self.inserted += len(written)
+    if self.fail_after_insert:
+      # 登録は成功したが、応答を受け取る前に中断した
+      raise KeyboardInterrupt()
+    return AirtableResponse(records=written)
+
+  def bulk_update(self, records, stream=False):
+    for batch in AirtableTableCopier._chunk(records, 2):
+      self.updated.extend(record['id'] for record in batch)
+      for record in batch:
+        self.records[record['id']]['fields'].update(record['fields'])
+      yield AirtableResponse(records=[self.records[record['id']] for record in batch])
+
+
+SOURCE = [
+  {'id': 'recS1', 'fields': {'Name': 'a'}},
+  {'id': 'recS2', 'fields': {'Name': 'b', 'Parent': ['recS1']}},
+  {'id': 'recS3', 'fields': {'Name': 'c', 'Parent': ['recS1']}},
+]
+
+
+def test_rerun_after_interrupted_insert_does_not_duplicate(tmp_path):
+  source = FakeTable(SOURCE)
+  destination = FakeTable()
+  path = str(tmp_path / 'tasks.idmap')
+  destination.fail_after_insert = True
+  with pytest.raises(KeyboardInterrupt):
+    with AirtableTableCopier(source, destination, id_map=path, source_id_field='Source ID') as copier:
+      copier.run()
+
+  destination.fail_after_insert = False
+  with AirtableTableCopier(source, destination, id_map=path, source_id_field='Source ID') as copier:
+    result = copier.run()
+
+  assert result['recovered'] == 2
+  assert result['copied'] == 1
+  assert destination.inserted == 3
+  assert sorted(record['fields']['Source ID'] for record in destination.records.values()) == ['recS1', 'recS2', 'recS3']
+
+
+def test_id_map_is_saved_after_each_batch(tmp_path):
+  source = FakeTable(SOURCE)
+  destination = FakeTable()
+  path = str(tmp_path / 'tasks.idmap')
+  original = destination.bulk_insert
+
+  def insert_then_stop(fields_list):
+    if destination.inserted:
+      raise KeyboardInterrupt()
+    return original(fields_list)
+
+  destination.bulk_insert = insert_then_stop
+  with pytest.raises(KeyboardInterrupt):
+    with AirtableTableCopier(source, destination, id_map=path) as copier:
+      copier.run()
+
+  with AirtableIdMap(path) as id_map:
+    assert len(id_map) == 2
+
+
+def test_rerun_skips_links_already_updated(tmp_path):
+  source = FakeTable(SOURCE)
+  destination = FakeTable()
+  path = str(tmp_path / 'tasks.idmap')
+  with AirtableTableCopier(source, destination, link_fields=['Parent'], id_map=path) as copier:
+    first = copier.run()
+  updated = list(destination.updated)
+  with AirtableTableCopier(source, destination, link_fields=['Parent'], id_map=path) as copier:
+    second = copier.run()
+
+  assert first['linked'] == 2
+  assert second == {'copied': 0, 'skipped': 3, 'recovered': 0, 'linked': 0, 'unmapped_links': 0, 'errors': []}
+  assert destination.updated == updated
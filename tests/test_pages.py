@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+import requests
+
+from airtable.airtable import AirtableClient
+
+
+def _paged(pages, fail_at=None):
+  """offset毎に1ページを返却するハンドラー"""
+  def handle(method, url, params, json_data):
+    page = int((params or {}).get('offset') or 0)
+    if page == fail_at:
+      return (500, {'error': 'SERVER_ERROR'})
+    body = {'records': [{'id': 'rec{}'.format(page), 'fields': {}}]}
+    if page + 1 < pages:
+      body['offset'] = str(page + 1)
+    return body
+  return handle
+
+
+def _client(transport):
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', transport=transport)
+  client._API_LIMIT = 0
+  return client
+
+
+def test_prefetch_returns_pages_in_order(stub_transport):
+  client = _client(stub_transport(_paged(10)))
+  pages = list(client.iter_pages(prefetch=2))
+  assert [page.get_ids() for page in pages] == ['rec{}'.format(i) for i in range(10)]
+  assert [page.offset for page in pages][-1] is None
+
+
+def test_prefetch_depth_is_bounded(stub_transport):
+  transport = stub_transport(_paged(10))
+  pages = _client(transport).iter_pages(prefetch=2)
+  assert next(pages).get_ids() == 'rec0'
+  time.sleep(0.3)
+  # 取り出した1ページ + キューの2ページ + キューへの追加を待っている1ページ
+  assert len(transport.requests) <= 4
+  pages.close()
+
+
+def test_prefetch_raises_errors_in_the_consumer(stub_transport):
+  pages = _client(stub_transport(_paged(10, fail_at=2))).iter_pages(prefetch=2)
+  assert next(pages).get_ids() == 'rec0'
+  assert next(pages).get_ids() == 'rec1'
+  with pytest.raises(requests.exceptions.HTTPError):
+    next(pages)
+
+
+def test_long_queries_are_sent_as_post_list_records(stub_transport):
+  def handle(method, url, params, json_data):
+    query = json_data if method == 'post' else params
+    return _paged(3)(method, url, query, None)
+
+  transport = stub_transport(handle)
+  client = _client(transport)
+  formula = 'OR(' + ','.join('{{Code}}="{:05d}"'.format(n) for n in range(1000)) + ')'
+  sort = [{'field': 'Code', 'direction': 'desc'}]
+
+  r = client.get_all(formula=formula, sort=sort, fields=['Code', 'Name'])
+
+  assert r.get_ids() == ['rec0', 'rec1', 'rec2']
+  assert [(request['method'], request['url'], request['params']) for request in transport.requests] == [('post', 'https://api.airtable.com/v0/appXXX/Table/listRecords', None)] * 3
+  bodies = [request['json'] for request in transport.requests]
+  assert [body.get('offset') for body in bodies] == [None, '1', '2']
+  assert all(body['filterByFormula'] == formula and body['fields'] == ['Code', 'Name'] for body in bodies)
+  assert all(body['sort'] == [{'field': 'Code', 'direction': 'desc'}] for body in bodies)
+
+  transport.requests.clear()
+  client.get_all(formula='{Code}="00001"', fields=['Code'])
+  assert [request['method'] for request in transport.requests] == ['get'] * 3
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from airtable.airtable import AirtableClient
+from airtable.pipeline import AirtablePipeline
+
+
+def _double(record):
+  return record * 2
+
+
+def test_backlog_is_bounded_while_workers_are_busy():
+  release = threading.Event()
+  consumed = []
+
+  def records():
+    for n in range(1000):
+      consumed.append(n)
+      yield n
+
+  def func(record):
+    release.wait(5)
+    return record
+
+  results = AirtablePipeline(func, workers=2, max_pending=4).map(records())
+  reader = threading.Thread(target=lambda: results.__next__(), daemon=True)
+  reader.start()
+  time.sleep(0.2)
+  # 処理待ちのmax_pending件と、空きを待っている1件までしか読み込まない
+  assert len(consumed) <= 5
+  release.set()
+  reader.join(5)
+  assert list(results) == list(range(1, 1000))
+
+
+def test_ordered_and_unordered_results():
+  def func(record):
+    time.sleep(0.1 if record == 0 else 0.0)
+    return record
+
+  assert list(AirtablePipeline(func, workers=4).map(range(8))) == list(range(8))
+  unordered = list(AirtablePipeline(func, workers=4, ordered=False).map(range(8)))
+  assert sorted(unordered) == list(range(8))
+  assert unordered[0] != 0
+
+
+def test_errors_are_raised_in_the_consumer():
+  def func(record):
+    if record == 3:
+      raise ValueError('bad record')
+    return record
+
+  results = AirtablePipeline(func, workers=2).map(range(10))
+  assert [next(results) for _ in range(3)] == [0, 1, 2]
+  with pytest.raises(ValueError):
+    next(results)
+
+
+def test_process_pool_with_chunks():
+  assert list(AirtablePipeline(_double, workers=2, processes=True, chunk_size=7).map(range(30))) == [n * 2 for n in range(30)]
+
+
+def test_map_records_feeds_the_batched_write_path(stub_transport):
+  def handle(method, url, params, json_data):
+    if method == 'patch':
+      return {'records': json_data['records']}
+    page = int(params.get('offset') or 0)
+    body = {'records': [{'id': 'rec{}'.format(page * 10 + n), 'fields': {'n': page * 10 + n}} for n in range(10)]}
+    if page < 2:
+      body['offset'] = str(page + 1)
+    return body
+
+  transport = stub_transport(handle)
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', transport=transport)
+  client._API_LIMIT = 0
+
+  def score(record):
+    if record['fields']['n'] % 3 == 0:
+      return None
+    return {'id': record['id'], 'fields': {'Score': record['fields']['n'] * 10}}
+
+  batches = list(client.map_records(score, workers=3, write='update'))
+
+  updated = [record for r in batches for record in r.records]
+  assert [record['id'] for record in updated] == ['rec{}'.format(n) for n in range(30) if n % 3]
+  assert updated[0]['fields'] == {'Score': 10}
+  assert [len(request['json']['records']) for request in transport.requests if request['method'] == 'patch'] == [10, 10]
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from airtable.exceptions import AirtableDeadlineExceeded
+from airtable.ratelimit import RateLimiter, FileRateLimitBackend, RequestPriority
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _waiting(limiter):
+  with limiter._cond:
+    return sum(len(tickets) for clients in limiter._queues.values() for tickets in clients.values())
+
+
+def _acquire_in_order(limiter, requests):
+  """送信待ちに並んだ順序を固定してacquireし、送信枠を確保した順に名前を返却"""
+  order = []
+  threads = []
+  for name, priority, client_key in requests:
+    expected = _waiting(limiter) + 1
+
+    def run(name=name, priority=priority, client_key=client_key):
+      limiter.acquire(priority=priority, client_key=client_key)
+      order.append(name)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    threads.append(thread)
+    while _waiting(limiter) < expected:
+      time.sleep(0.001)
+  for thread in threads:
+    thread.join(5)
+  return order
+
+
+def _hold(limiter, seconds):
+  """送信枠の割り当てをseconds秒止め、その間にacquireを送信待ちに並べられるようにする"""
+  limiter.acquire()
+  limiter.penalize(seconds)
+  thread = threading.Thread(target=limiter.acquire, daemon=True)
+  thread.start()
+  while not limiter._dispatching:
+    time.sleep(0.001)
+  return thread
+
+
+def test_interactive_requests_jump_ahead_of_bulk():
+  limiter = RateLimiter(rate=1, per=0.05)
+  hold = _hold(limiter, 0.3)
+  order = _acquire_in_order(limiter, [
+    ('bulk1', RequestPriority.BULK, 'job'),
+    ('bulk2', RequestPriority.BULK, 'job'),
+    ('interactive1', RequestPriority.INTERACTIVE, 'ui'),
+    ('bulk3', RequestPriority.BULK, 'job'),
+    ('interactive2', RequestPriority.INTERACTIVE, 'ui'),
+  ])
+  hold.join(5)
+
+  assert order == ['interactive1', 'interactive2', 'bulk1', 'bulk2', 'bulk3']
+
+
+def test_clients_of_the_same_priority_take_turns():
+  limiter = RateLimiter(rate=1, per=0.05)
+  hold = _hold(limiter, 0.3)
+  order = _acquire_in_order(limiter, [('a{}'.format(i), RequestPriority.BULK, 'a') for i in range(3)] + [('b{}'.format(i), RequestPriority.BULK, 'b') for i in range(2)])
+  hold.join(5)
+
+  assert order == ['a0', 'b0', 'a1', 'b1', 'a2']
+
+
+def test_timed_out_acquire_does_not_reserve_a_slot():
+  limiter = RateLimiter(rate=1, per=0.5)
+  started = time.monotonic()
+  limiter.acquire()
+
+  with pytest.raises(AirtableDeadlineExceeded):
+    limiter.acquire(timeout=0.1)
+  limiter.acquire()
+
+  # 取り消した送信枠の分(さらに0.5秒)は待たない
+  assert time.monotonic() - started < 0.8
+
+
+def test_file_backend_does_not_reserve_beyond_max_wait(tmp_path):
+  backend = FileRateLimitBackend(str(tmp_path))
+  first = backend.reserve('appXXX', 10.0)
+
+  assert backend.reserve('appXXX', 10.0, max_wait=1.0) is None
+  assert backend.reserve('appXXX', 10.0) == pytest.approx(first + 10.0)
+
+
+def test_file_backend_shares_slots_across_processes(tmp_path):
+  env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+  snippet = (
+    'import json, sys\n'
+    'from airtable.ratelimit import FileRateLimitBackend\n'
+    'backend = FileRateLimitBackend(sys.argv[1])\n'
+    'print(json.dumps([backend.reserve("appXXX", 0.05) for _ in range(20)]))\n'
+  )
+  workers = [subprocess.Popen([sys.executable, '-c', snippet, str(tmp_path)], env=env, stdout=subprocess.PIPE, universal_newlines=True) for _ in range(4)]
+  slots = sorted(slot for worker in workers for slot in json.loads(worker.communicate(timeout=30)[0]))
+
+  # 4プロセスが確保した送信枠が重複せず、0.05秒以上の間隔で並ぶ
+  assert len(slots) == 80
+  assert min(b - a for a, b in zip(slots, slots[1:])) >= 0.05 - 1e-6
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from airtable.airtable import AirtableClient, AirtableResponse
+
+
+def _client(transport):
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', transport=transport)
+  client._API_LIMIT = 0
+  return client
+
+
+def _echo(method, url, params, json_data):
+  return {'records': json_data['records']}
+
+
+def test_save_all_sends_only_changed_fields_of_changed_records(stub_transport):
+  transport = stub_transport(_echo)
+  client = _client(transport)
+  response = AirtableResponse(records=[{'id': 'rec{}'.format(n), 'fields': {'n': n, 'Status': 'open', 'Note': 'x'}} for n in range(12)])
+  records = response.as_records(client)
+
+  records[0]['Status'] = 'open'  # 同じ値の再設定は変更にならない
+  records[1]['Status'] = 'done'
+  del records[2]['Note']
+  for record in records[3:]:
+    record['Status'] = 'done'
+
+  assert not records[0].is_dirty()
+  assert records[1].changed_fields() == {'Status': 'done'}
+  assert records[2].changed_fields() == {'Note': None}
+
+  r = client.save_all(records)
+
+  assert [(request['method'], len(request['json']['records'])) for request in transport.requests] == [('patch', 10), ('patch', 1)]
+  sent = [record for request in transport.requests for record in request['json']['records']]
+  assert sent[0] == {'id': 'rec1', 'fields': {'Status': 'done'}}
+  assert sent[1] == {'id': 'rec2', 'fields': {'Note': None}}
+  assert r.size() == 11
+  assert not any(record.is_dirty() for record in records)
+
+  assert client.save_all(records).size() == 0
+  assert records[5].save().size() == 0
+  assert len(transport.requests) == 2
+
+
+def test_failed_records_stay_dirty(stub_transport):
+  def handle(method, url, params, json_data):
+    if any(record['fields'].get('Status') == 'bad' for record in json_data['records']):
+      return (422, {'error': {'type': 'INVALID_VALUE_FOR_COLUMN'}})
+    return _echo(method, url, params, json_data)
+
+  client = _client(stub_transport(handle))
+  records = AirtableResponse(records=[{'id': 'rec{}'.format(n), 'fields': {'Status': 'open'}} for n in range(3)]).as_records(client)
+  records[0]['Status'] = 'done'
+  records[1]['Status'] = 'bad'
+  records[2]['Status'] = 'done'
+
+  r = client.save_all(records)
+
+  assert [error['index'] for error in r.errors] == [1]
+  assert [record.is_dirty() for record in records] == [False, True, False]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from airtable.airtable import AirtableResponse
+
+RECORDS = [
+  {'id': 'rec1', 'fields': {'Email': 'a@example.com', 'Customer': ['recC1'], 'Tags': ['x', 'y'], 'Address': {'city': 'Tokyo'}}},
+  {'id': 'rec2', 'fields': {'Email': 'b@example.com', 'Customer': ['recC1', 'recC2'], 'Tags': ['y']}},
+  {'id': 'rec3', 'fields': {'Email': 'a@example.com', 'Customer': ['recC2']}},
+]
+
+
+def test_by_id():
+  r = AirtableResponse(records=RECORDS)
+  assert r.by_id('rec2') is RECORDS[1]
+  assert r.by_id('recXXX') is None
+  assert AirtableResponse(records=RECORDS[0]).by_id('rec1') is RECORDS[0]
+
+
+def test_index_on_unique_and_multi_valued():
+  r = AirtableResponse(records=RECORDS)
+
+  assert r.index_on('Email', unique=True) == {'a@example.com': RECORDS[0], 'b@example.com': RECORDS[1]}
+  assert r.index_on('Email')['a@example.com'] == [RECORDS[0], RECORDS[2]]
+  assert r.index_on('Customer')['recC1'] == [RECORDS[0], RECORDS[1]]
+  assert r.index_on('Tags')[None] == [RECORDS[2]]
+  # ハッシュできない値は索引に含めない
+  assert r.index_on('Address') == {None: [RECORDS[1], RECORDS[2]]}
+  assert r.index_on('Email') is r.index_on('Email')
+
+
+def test_filter_and_group_by():
+  r = AirtableResponse(records=RECORDS)
+
+  assert r.filter('Tags', 'y') == [RECORDS[0], RECORDS[1]]
+  assert r.filter('Tags', 'z') == []
+  groups = r.group_by('Customer')
+  assert groups == {'recC1': [RECORDS[0], RECORDS[1]], 'recC2': [RECORDS[1], RECORDS[2]]}
+  groups['recC1'].clear()
+  assert r.filter('Customer', 'recC1') == [RECORDS[0], RECORDS[1]]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import os
+import tracemalloc
+
+from airtable.snapshot import AirtableSnapshot, AirtableSnapshotWriter
+
+
+def _write(path, pages):
+  with AirtableSnapshotWriter(path) as writer:
+    for records in pages:
+      writer.write_block(records)
+
+
+def test_line_separators_in_values(tmp_path):
+  path = str(tmp_path / 'snapshot.jsonl.gz')
+  notes = ['line\u2028separator', 'paragraph\u2029separator', 'next\x85line', 'form\x0cfeed', 'carriage\rreturn']
+  records = [{'id': 'rec{}'.format(i), 'fields': {'Notes': note}} for i, note in enumerate(notes)]
+  records.append({'id': 'rec{}'.format(len(notes)), 'fields': {'Notes': 'plain'}})
+  _write(path, [records[:3], records[3:]])
+
+  with AirtableSnapshot(path) as snapshot:
+    assert len(snapshot) == len(records)
+    for record in records:
+      assert snapshot.get(record['id']) == record
+    assert list(snapshot) == records
+
+
+def test_iteration_memory_is_bounded_by_block_size(tmp_path):
+  path = str(tmp_path / 'snapshot.jsonl.gz')
+  pages = [[{'id': 'rec{}_{}'.format(block, i), 'fields': {'Data': os.urandom(256).hex()}} for i in range(100)] for block in range(200)]
+  _write(path, pages)
+  size = os.path.getsize(path)
+
+  with AirtableSnapshot(path) as snapshot:
+    tracemalloc.start()
+    try:
+      count = sum(1 for _ in snapshot)
+      _, peak = tracemalloc.get_traced_memory()
+    finally:
+      tracemalloc.stop()
+
+  assert count == 200 * 100
+  # 1ブロックは約30KB(圧縮後)のため、ファイル全体(約7MB)を複製していないことを確認する
+  assert peak < size / 10
+
+
+def test_index_is_sorted_across_runs(tmp_path, monkeypatch):
+  monkeypatch.setattr(AirtableSnapshotWriter, '_SORT_BUFFER_ENTRIES', 50)
+  path = str(tmp_path / 'snapshot.jsonl.gz')
+  ids = ['rec{:05d}'.format((i * 7919) % 1000) for i in range(1000)]
+  _write(path, [[{'id': id, 'fields': {'n': n}} for n, id in enumerate(ids[i:i + 30], i)] for i in range(0, 1000, 30)])
+
+  with AirtableSnapshot(path) as snapshot:
+    assert len(snapshot) == 1000
+    for n, id in enumerate(ids):
+      assert snapshot.get(id) == {'id': id, 'fields': {'n': n}}
+    assert 'rec99999' not in snapshot
+    assert 'rec' not in snapshot
+    assert 'x' * 40 not in snapshot
+
+
+def test_lookup_does_not_load_index(tmp_path):
+  path = str(tmp_path / 'snapshot.jsonl.gz')
+  _write(path, [[{'id': 'rec{}_{}'.format(block, i), 'fields': {}} for i in range(1000)] for block in range(100)])
+  index_size = os.path.getsize(path + '.idx')
+
+  with AirtableSnapshot(path) as snapshot:
+    tracemalloc.start()
+    try:
+      assert len(snapshot) == 100 * 1000
+      assert snapshot.get('rec42_421') == {'id': 'rec42_421', 'fields': {}}
+      assert 'rec100_0' not in snapshot
+      _, peak = tracemalloc.get_traced_memory()
+    finally:
+      tracemalloc.stop()
+
+  # 索引(約4.8MB)をメモリに読み込まず、展開した1ブロック分程度に収まることを確認する
+  assert peak < index_size / 20
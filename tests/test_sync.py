@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from airtable.airtable import AirtableResponse
+from airtable.sync import AirtableSyncPlan
+
+
+class FakeClient(object):
+  def __init__(self, records):
+    self.records = {record['id']: dict(record['fields']) for record in records}
+
+  def iter_pages(self, formula=None, fields=None, view=None):
+    records = [{'id': id, 'fields': {name: value for name, value in record.items() if name in fields}} for id, record in self.records.items()]
+    yield AirtableResponse(records=records)
+
+  def bulk_update(self, records, deadline=None):
+    for record in records:
+      fields = self.records[record['id']]
+      fields.update(record['fields'])
+      for name in [name for name, value in fields.items() if value is None]:
+        del fields[name]
+    return AirtableResponse(records=records)
+
+
+def test_update_clears_fields_missing_from_row():
+  client = FakeClient([
+    {'id': 'rec1', 'fields': {'Code': 'A', 'Name': 'old', 'Note': 'stale'}},
+    {'id': 'rec2', 'fields': {'Code': 'B', 'Name': 'b'}},
+  ])
+  rows = [{'Code': 'A', 'Name': 'new'}, {'Code': 'B', 'Name': 'b', 'Note': 'n'}]
+
+  plan = AirtableSyncPlan.build(client, rows, 'Code')
+  assert plan.summary() == {'create': 0, 'update': 2, 'delete': 0, 'unchanged': 0}
+  assert plan.updates[0]['fields'] == {'Code': 'A', 'Name': 'new', 'Note': None}
+  plan.apply()
+
+  assert AirtableSyncPlan.build(client, rows, 'Code').summary() == {'create': 0, 'update': 0, 'delete': 0, 'unchanged': 2}
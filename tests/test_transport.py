@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+import pytest
+import requests
+
+from airtable.airtable import AirtableClient
+from airtable.exceptions import AirtableReplayError
+from airtable.transport import RecordingTransport, ReplayTransport
+
+
+def _paged(method, url, params, json_data):
+  page = int((params or {}).get('offset') or 0)
+  body = {'records': [{'id': 'rec{}'.format(page), 'fields': {'formula': params.get('filterByFormula')}}]}
+  if page < 2:
+    body['offset'] = str(page + 1)
+  return body
+
+
+def _client(transport, **kwargs):
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', transport=transport, **kwargs)
+  client._API_LIMIT = 0
+  return client
+
+
+@pytest.fixture
+def cassette(tmp_path, stub_transport):
+  """get_all(formula='A')の3ページ分を記録したファイル"""
+  path = str(tmp_path / 'cassette.jsonl')
+  transport = RecordingTransport(path, transport=stub_transport(_paged))
+  _client(transport).get_all(formula='A')
+  transport.close()
+  return path
+
+
+def test_recorded_pages_are_replayed_without_network(cassette):
+  with open(cassette, 'r', encoding='utf-8') as f:
+    entries = [json.loads(line) for line in f]
+  assert [entry['params'].get('offset') for entry in entries] == [None, '1', '2']
+  assert all('keyXXX' not in json.dumps(entry) for entry in entries)
+
+  r = _client(ReplayTransport(cassette)).get_all(formula='A')
+
+  assert r.get_ids() == ['rec0', 'rec1', 'rec2']
+  with pytest.raises(AirtableReplayError):
+    _client(ReplayTransport(cassette)).get_all(formula='B')
+
+
+def test_replay_latency_and_read_timeout(cassette):
+  started = time.monotonic()
+  _client(ReplayTransport(cassette, latency=0.05)).get_all(formula='A')
+  assert time.monotonic() - started >= 0.15
+
+  with pytest.raises(requests.exceptions.Timeout):
+    _client(ReplayTransport(cassette, latency=lambda entry: 1.0), timeout=0.05).get_all(formula='A')
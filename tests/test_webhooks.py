@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+import pytest
+
+from airtable.airtable import AirtableClient
+from airtable.webhooks import AirtableWebhook, AirtableWebhookReceiver
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+  daemon_threads = True
+
+
+@pytest.fixture
+def api():
+  """カーソル位置毎に1件の変更を返却するペイロードAPIのスタブ"""
+  state = {'cursors': []}
+
+  class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+      pass
+
+    def do_GET(self):
+      cursor = int(self.path.split('cursor=')[1].split('&')[0])
+      state['cursors'].append(cursor)
+      payload = {'baseTransactionNumber': cursor, 'changedTablesById': {'tblXXX': {'changedRecordsById': {'rec{}'.format(cursor): {}}}}}
+      body = json.dumps({'payloads': [payload], 'cursor': cursor + 1, 'mightHaveMore': False}).encode('utf-8')
+      self.send_response(200)
+      self.send_header('Content-Type', 'application/json')
+      self.send_header('Content-Length', str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+
+  httpd = _Server(('127.0.0.1', 0), Handler)
+  threading.Thread(target=httpd.serve_forever, daemon=True).start()
+  state['url'] = 'http://127.0.0.1:{}/v0'.format(httpd.server_address[1])
+  yield state
+  httpd.shutdown()
+  httpd.server_close()
+
+
+def _notify(receiver):
+  body = json.dumps({'base': {'id': 'appXXX'}, 'webhook': {'id': 'achXXX'}}).encode('utf-8')
+  request = urllib.request.Request(receiver.url, data=body, method='POST', headers={'Content-Type': 'application/json'})
+  with urllib.request.urlopen(request) as r:
+    assert r.status == 204
+
+
+def _wait_for(condition, timeout=5.0):
+  until = time.monotonic() + timeout
+  while not condition():
+    assert time.monotonic() < until
+    time.sleep(0.01)
+
+
+def test_failing_callback_does_not_stop_polling(api, capsys):
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', debug=True)
+  webhook = AirtableWebhook(client, 'achXXX', api_url=api['url'])
+  received = []
+
+  def callback(changes):
+    if not received:
+      received.append(None)
+      raise RuntimeError('callback failed')
+    received.append([change.record_id for change in changes])
+
+  webhook.subscribe(callback)
+  receiver = AirtableWebhookReceiver(webhook)
+  receiver.start()
+  try:
+    _notify(receiver)
+    _wait_for(lambda: webhook.last_error is not None)
+    assert isinstance(webhook.last_error, RuntimeError)
+    assert webhook.cursor == 1
+    assert webhook._thread.is_alive()
+
+    _notify(receiver)
+    _wait_for(lambda: len(received) == 2)
+    _wait_for(lambda: webhook.last_error is None)
+    assert received[1] == ['rec1']
+    assert webhook.cursor == 2
+    assert webhook._thread.is_alive()
+  finally:
+    receiver.stop()
+
+  assert api['cursors'] == [1, 1]
+  assert 'RuntimeError: callback failed' in capsys.readouterr().err
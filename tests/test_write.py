@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import json
+
+from airtable.airtable import AirtableClient
+
+
+def _client(transport, **kwargs):
+  client = AirtableClient('appXXX', 'Table', 'keyXXX', transport=transport, **kwargs)
+  client._API_LIMIT = 0
+  return client
+
+
+def _echo(reject=lambda fields: False, status_code=422):
+  """登録したレコードにIDを付けて返却し、rejectに一致するレコードを含むバッチは失敗させるハンドラー"""
+  def handle(method, url, params, json_data):
+    records = json_data['records']
+    if any(reject(record['fields']) for record in records):
+      return (status_code, {'error': {'type': 'INVALID_VALUE_FOR_COLUMN'}})
+    return {'records': [{'id': 'rec{}'.format(record['fields']['n']), 'fields': record['fields']} for record in records]}
+  return handle
+
+
+def test_batches_are_packed_by_count_and_size(stub_transport):
+  transport = stub_transport(_echo())
+  client = _client(transport, max_request_bytes=1000)
+  rows = [{'n': n, 'text': 'x' * (300 if n in (3, 4) else 10)} for n in range(25)]
+
+  r = client.bulk_insert(rows)
+
+  assert r.errors == []
+  assert [record['fields']['n'] for record in r.records] == list(range(25))
+  batches = [request['json']['records'] for request in transport.requests]
+  assert all(len(batch) <= 10 for batch in batches)
+  assert all(len(json.dumps({'records': batch})) <= 1000 for batch in batches)
+  # 大きいレコードを含む最初のバッチのみ、サイズの上限で10件未満になる
+  assert len(batches[0]) < 10 and [len(batch) for batch in batches[1:-1]] == [10] * (len(batches) - 2)
+
+
+def test_failed_batch_is_split_to_isolate_bad_records(stub_transport):
+  transport = stub_transport(_echo(reject=lambda fields: fields.get('bad')))
+  rows = [{'n': n, 'bad': n in (6, 13)} for n in range(20)]
+
+  r = _client(transport).bulk_insert(rows)
+
+  assert sorted(record['fields']['n'] for record in r.records) == [n for n in range(20) if n not in (6, 13)]
+  assert [(error['index'], error['record']['fields']['n']) for error in r.errors] == [(6, 6), (13, 13)]
+  assert r.errors[0]['error'] == {'type': 'INVALID_VALUE_FOR_COLUMN'}
+
+
+def test_payload_too_large_is_split_and_oversize_records_are_not_sent(stub_transport):
+  transport = stub_transport(_echo(reject=lambda fields: len(fields['text']) > 100, status_code=413))
+  client = _client(transport, max_request_bytes=2000)
+  rows = [{'n': n, 'text': 'x' * {2: 500, 5: 5000}.get(n, 10)} for n in range(8)]
+
+  r = client.bulk_insert(rows)
+
+  assert sorted(record['fields']['n'] for record in r.records) == [0, 1, 3, 4, 6, 7]
+  assert [error['index'] for error in r.errors] == [2, 5]
+  assert r.errors[1]['error']['type'] == 'RECORD_TOO_LARGE'
+  assert all(5 not in [record['fields']['n'] for record in request['json']['records']] for request in transport.requests)
+
+
+def test_bulk_insert_streams_a_generator(stub_transport):
+  transport = stub_transport(_echo())
+  consumed = []
+
+  def rows():
+    for n in range(25):
+      consumed.append(n)
+      yield {'n': n}
+
+  batches = _client(transport).bulk_insert(rows(), stream=True)
+  first = next(batches)
+  assert first.get_ids() == ['rec{}'.format(n) for n in range(10)]
+  # 最初のバッチの送信時点では、次のバッチの判定に必要な1件までしか読み込まない
+  assert len(consumed) <= 11
+  assert [r.size() for r in batches] == [10, 5]
+
+
+def test_bulk_delete_sends_batched_records_parameter(stub_transport):
+  def handle(method, url, params, json_data):
+    return {'records': [{'id': id, 'deleted': True} for id in params['records[]']]}
+
+  transport = stub_transport(handle)
+  ids = ('rec{}'.format(n) for n in range(15))
+  records = [{'id': 'rec15', 'fields': {}}]
+
+  r = _client(transport).bulk_delete(ids=ids, records=records)
+
+  assert r.get_ids() == ['rec{}'.format(n) for n in range(16)]
+  assert [(request['method'], request['url']) for request in transport.requests] == [('delete', 'https://api.airtable.com/v0/appXXX/Table')] * 2
+  assert [request['params']['records[]'] for request in transport.requests] == [['rec{}'.format(n) for n in range(10)], ['rec{}'.format(n) for n in range(10, 16)]]